@@ -14,13 +14,6 @@ from pathlib import Path
 from dotenv import load_dotenv
 import os
 
-# Usar PyMySQL como alternativa a mysqlclient (compatible con Windows)
-try:
-    import pymysql
-    pymysql.install_as_MySQLdb()
-except ImportError:
-    pass
-
 load_dotenv()
 
 
@@ -62,6 +55,10 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Después de sesiones: solo las escrituras de las vistas fijan a la primaria
+    'MatchDeportivoAPP.replicas.FijarPrimariaMiddleware',
+    # Último: perfila solo la vista (requiere request.user)
+    'MatchDeportivoAPP.perfilado.PerfilarRequestMiddleware',
 ]
 
 ROOT_URLCONF = 'MatchDeportivo.urls'
@@ -98,12 +95,101 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '3306'),
-        'OPTIONS': {
-            'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
-        },
     }
 }
 
+if DATABASES['default']['ENGINE'] == 'django.db.backends.mysql':
+    DATABASES['default']['OPTIONS'] = {
+        'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+    }
+    # Usar PyMySQL como alternativa a mysqlclient (compatible con Windows).
+    # Solo con MySQL: con otros motores no se paga su importación al arrancar
+    try:
+        import pymysql
+        pymysql.install_as_MySQLdb()
+    except ImportError:
+        pass
+
+# Réplica de lectura opcional (ver MatchDeportivoAPP/replicas.py). Hereda la
+# configuración de 'default' salvo lo que se indique. Para probarla en local
+# con SQLite: DB_ENGINE=django.db.backends.sqlite3, DB_NAME=db.sqlite3,
+# DB_REPLICA_NAME=replica.sqlite3 y "python manage.py sincronizar_replica".
+REPLICA_DB_ALIAS = 'replica'
+if os.getenv('DB_REPLICA_NAME'):
+    DATABASES[REPLICA_DB_ALIAS] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_REPLICA_NAME'),
+        'USER': os.getenv('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.getenv('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': os.getenv('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        # En los tests la réplica es la misma base que 'default'
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['MatchDeportivoAPP.replicas.ReplicaRouter']
+
+# Segundos que un usuario lee de la primaria después de escribir (debe
+# superar el retraso habitual de la réplica)
+REPLICA_FIJACION_SEGUNDOS = int(os.getenv('REPLICA_FIJACION_SEGUNDOS', '10'))
+
+
+# ============================================
+# AUTENTICACIÓN
+# ============================================
+# El login del sitio es por email (una consulta indexada). ModelBackend se
+# mantiene para el panel de administración, que autentica por username.
+AUTHENTICATION_BACKENDS = [
+    'MatchDeportivoAPP.backends.EmailBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+
+# ============================================
+# CACHÉ
+# ============================================
+# LocMem por defecto (un proceso). En producción usar una caché compartida
+# entre workers, p. ej. FileBasedCache o Redis/Memcached:
+#   CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+#   CACHE_LOCATION=/home/usuario/.cache/matchdeportivo
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'matchdeportivo'),
+    }
+}
+# LocMem (y Dummy) son por proceso: lo que un worker invalida sigue vigente
+# en la caché de los demás. Lo que no tolera datos viejos (las sesiones)
+# solo se cachea con una caché compartida.
+CACHE_COMPARTIDA = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Eliminación de cuentas: la solicitud desactiva la cuenta y el comando
+# purgar_cuentas_eliminadas (cron) borra los datos. En desarrollo, con True,
+# la purga empieza también en un hilo del worker web al confirmar.
+ELIMINACION_CUENTA_EN_HILO = os.getenv('ELIMINACION_CUENTA_EN_HILO', 'False') == 'True'
+
+# Limitación de intentos de login (token bucket por IP y por email).
+# Los intentos rechazados no llegan a calcular el hash de la contraseña.
+LOGIN_THROTTLE_HABILITADO = os.getenv('LOGIN_THROTTLE_HABILITADO', 'True') == 'True'
+LOGIN_THROTTLE = {
+    'IP': {'capacidad': 20, 'por_minuto': 10},
+    'EMAIL': {'capacidad': 5, 'por_minuto': 1},
+}
+# Cabecera con la IP real del cliente (p. ej. HTTP_X_REAL_IP detrás de un proxy)
+LOGIN_THROTTLE_IP_HEADER = os.getenv('LOGIN_THROTTLE_IP_HEADER', 'REMOTE_ADDR')
+
+# Perfilado bajo demanda: un usuario staff agrega ?_perfilar=1 (o la cabecera
+# X-Perfilar: 1; con el valor "memoria" también usa tracemalloc) y el perfil
+# queda en PERFILADO_DIRECTORIO. Sin la marca no hay costo adicional.
+# Activo por defecto solo con DEBUG; en producción se habilita explícitamente.
+PERFILADO_HABILITADO = os.getenv('PERFILADO_HABILITADO', str(DEBUG)) == 'True'
+PERFILADO_DIRECTORIO = os.getenv('PERFILADO_DIRECTORIO', os.path.join(BASE_DIR, 'logs', 'perfiles'))
+# Filas de cada sección del resumen (funciones, consultas, memoria)
+PERFILADO_FUNCIONES = 30
+
 
 # ============================================
 # VALIDACIÓN DE CONTRASEÑAS
@@ -166,6 +252,18 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# collectstatic genera nombres con hash de contenido, minifica JS, optimiza
+# imágenes y deja versiones .gz/.br listas para el servidor web.
+# Los archivos con hash pueden servirse con "Cache-Control: max-age=31536000, immutable".
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'MatchDeportivoAPP.storage.MatchDeportivoStaticStorage',
+    },
+}
+
 # Media files (User uploaded files)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -180,6 +278,11 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # ============================================
 
 # Seguridad de Sesiones
+# Con una caché compartida: sesiones en caché con persistencia en BD, sin
+# escribir las que no cambiaron (ver MatchDeportivoAPP/sessions.py). Sin ella
+# solo BD: con LocMem un logout en un worker no invalidaría la sesión
+# cacheada en los demás (lo verifica el check sesiones.E001).
+SESSION_ENGINE = 'MatchDeportivoAPP.sessions' if CACHE_COMPARTIDA else 'django.contrib.sessions.backends.db'
 SESSION_COOKIE_SECURE = not DEBUG  # True en producción (solo HTTPS)
 SESSION_COOKIE_HTTPONLY = True  # No accesible desde JavaScript
 SESSION_COOKIE_SAMESITE = 'Strict'  # Protección CSRF
@@ -206,7 +309,10 @@ X_FRAME_OPTIONS = 'DENY'
 # ============================================
 # LOGGING
 # ============================================
-# Configuración de logging para debugging y monitoreo
+# Configuración de logging para debugging y monitoreo.
+# Los archivos se escriben desde un hilo de fondo: los loggers solo encolan
+# (MatchDeportivoAPP/logs_en_cola.py), sin E/S ni rotación en el request.
+os.makedirs(os.path.join(BASE_DIR, 'logs'), exist_ok=True)
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -237,6 +343,11 @@ LOGGING = {
             'backupCount': 5,
             'formatter': 'verbose',
         },
+        # Encola para 'file' y 'error_file'; el listener se arma en AppConfig.ready()
+        'registro_en_cola': {
+            '()': 'MatchDeportivoAPP.logs_en_cola.ManejadorEnCola',
+            'destinos': ['file', 'error_file'],
+        },
         'console': {
             'level': 'DEBUG' if DEBUG else 'INFO',
             'class': 'logging.StreamHandler',
@@ -245,15 +356,20 @@ LOGGING = {
     },
     'loggers': {
         'django': {
-            'handlers': ['file', 'console'],
+            'handlers': ['registro_en_cola', 'console'],
             'level': 'INFO',
             'propagate': True,
         },
         'MatchDeportivoAPP': {
-            'handlers': ['file', 'error_file', 'console'],
+            'handlers': ['registro_en_cola', 'console'],
             'level': 'DEBUG' if DEBUG else 'INFO',
             'propagate': False,
         },
+        # Solo mantiene vivos los destinos de 'registro_en_cola' (no se usa para registrar)
+        'MatchDeportivoAPP.logs_en_cola.destinos': {
+            'handlers': ['file', 'error_file'],
+            'propagate': False,
+        },
     },
 }
 
@@ -4,59 +4,70 @@ from django.urls import path
 from django.conf import settings
 from django.conf.urls.static import static
 
-from MatchDeportivoAPP import views
+# Las vistas se importan en su primer request (ver MatchDeportivoAPP/views)
+from MatchDeportivoAPP.views import VistaDiferida
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('', views.inicio, name='home'),
-    path('sobre-nosotros/', views.sobre_nosotros, name='sobre_nosotros'),
+    path('', VistaDiferida('general.inicio'), name='home'),
+    path('sobre-nosotros/', VistaDiferida('sobre_nosotros.sobre_nosotros'), name='sobre_nosotros'),
     
     # Autenticación
-    path('inicioSesion/', views.inicioSesion, name='inicioSesion'),
-    # path('olvidoContraseña/', views.olvidoContraseña, name='olvidoContraseña'),  # DESHABILITADO - Inseguro
-    path('registroSesion/', views.registroSesion, name='registroSesion'),
-    path('cerrarSesion/', views.cerrarSesion, name="cerrarSesion"),
+    path('inicioSesion/', VistaDiferida('auth.inicioSesion'), name='inicioSesion'),
+    # path('olvidoContraseña/', VistaDiferida('auth.olvidoContraseña'), name='olvidoContraseña'),  # DESHABILITADO - Inseguro
+    path('registroSesion/', VistaDiferida('auth.registroSesion'), name='registroSesion'),
+    path('cerrarSesion/', VistaDiferida('auth.cerrarSesion'), name="cerrarSesion"),
 
     # Usuarios - Perfil
-    path('perfil/', views.ver_perfil, name='ver_perfil'),  # Vista principal (solo lectura)
-    path('perfil/completar/', views.completar_perfil, name='completar_perfil'),  # Primera vez
-    path('perfil/editar/', views.editar_perfil, name='editar_perfil'),  # Edición
-    path('perfil/valoraciones/', views.valoraciones_detalladas, name='valoraciones_detalladas'),  # Lista de ratings
-    path('perfil/eliminar/', views.eliminar_cuenta, name='eliminar_cuenta'),
-    path('participante/<int:user_id>/', views.perfil_participante, name='perfil_participante'),
+    path('perfil/', VistaDiferida('perfiles.ver_perfil'), name='ver_perfil'),  # Vista principal (solo lectura)
+    path('perfil/completar/', VistaDiferida('perfiles.completar_perfil'), name='completar_perfil'),  # Primera vez
+    path('perfil/editar/', VistaDiferida('perfiles.editar_perfil'), name='editar_perfil'),  # Edición
+    path('perfil/valoraciones/', VistaDiferida('perfiles.valoraciones_detalladas'), name='valoraciones_detalladas'),  # Lista de ratings
+    path('perfil/eliminar/', VistaDiferida('perfiles.eliminar_cuenta'), name='eliminar_cuenta'),
+    path('participante/<int:user_id>/', VistaDiferida('perfiles.perfil_participante'), name='perfil_participante'),
     # Usuarios - Notificaciones
-    path('notificaciones/', views.notificaciones, name='notificaciones'),
-    path('notificaciones/marcar-leidas/', views.marcar_todas_leidas, name='marcar_leidas'),
+    path('notificaciones/', VistaDiferida('notificaciones.notificaciones'), name='notificaciones'),
+    path('notificaciones/marcar-leidas/', VistaDiferida('notificaciones.marcar_todas_leidas'), name='marcar_leidas'),
     
     # Compatibilidad (DEPRECATED)
-    path('perfil-old/', views.perfil, name='perfil'),  # Redirige a ver_perfil
+    path('perfil-old/', VistaDiferida('perfiles.perfil'), name='perfil'),  # Redirige a ver_perfil
 
     # Actividades
-    path('actividades/', views.actividades, name='actividades'),
-    path('detalle_actividad/<int:pk>/', views.detalle_actividad, name='detalle_actividad'),
-    path('crear_actividad/', views.crear_actividad, name='crear_actividad'),
-    path('editar_actividad/<int:pk>/', views.editar_actividad, name='editar_actividad'),
-    path('cancelar_actividad/<int:pk>/', views.eliminar_actividad, name='cancelar_actividad'),
-    path('mis_actividades/', views.mis_actividades, name='mis_actividades'),
-    path('reseña_actividad/', views.reseña_actividad, name='reseña_actividad'),
+    path('actividades/', VistaDiferida('actividades.actividades'), name='actividades'),
+    path('detalle_actividad/<int:pk>/', VistaDiferida('actividades.detalle_actividad'), name='detalle_actividad'),
+    path('crear_actividad/', VistaDiferida('actividades.crear_actividad'), name='crear_actividad'),
+    path('editar_actividad/<int:pk>/', VistaDiferida('actividades.editar_actividad'), name='editar_actividad'),
+    path('cancelar_actividad/<int:pk>/', VistaDiferida('actividades.eliminar_actividad'), name='cancelar_actividad'),
+    path('mis_actividades/', VistaDiferida('actividades.mis_actividades'), name='mis_actividades'),
+    path('mis_actividades/estadisticas/', VistaDiferida('estadisticas.estadisticas_organizador'), name='estadisticas_organizador'),
+    path('reseña_actividad/', VistaDiferida('actividades.reseña_actividad'), name='reseña_actividad'),
     
     # Valoraciones
-    path('actividad/<int:pk>/cerrar/', views.cerrar_actividad, name='cerrar_actividad'),
-    path('actividad/<int:pk>/valorar-participantes/', views.valorar_participantes, name='valorar_participantes'),
-    path('actividad/<int:actividad_pk>/valorar/<int:usuario_pk>/', views.valorar_usuario, name='valorar_usuario'),
+    path('actividad/<int:pk>/cerrar/', VistaDiferida('actividades.cerrar_actividad'), name='cerrar_actividad'),
+    path('actividad/<int:pk>/valorar-participantes/', VistaDiferida('actividades.valorar_participantes'), name='valorar_participantes'),
+    path('actividad/<int:actividad_pk>/valorar/<int:usuario_pk>/', VistaDiferida('actividades.valorar_usuario'), name='valorar_usuario'),
     
     # Participantes
-    path('unirse/<int:pk>/', views.unirse_actividad, name='unirse_actividad'),
-    path('salir/<int:pk>/', views.salir_actividad, name='salir_actividad'),
-    path('gestionar/<int:pk>/', views.gestionar_participantes, name='gestionar_participantes'),
-    path('quitar/<int:actividad_pk>/<int:user_id>/', views.quitar_participante, name='quitar_participante'),
+    path('unirse/<int:pk>/', VistaDiferida('actividades.unirse_actividad'), name='unirse_actividad'),
+    path('salir/<int:pk>/', VistaDiferida('actividades.salir_actividad'), name='salir_actividad'),
+    path('gestionar/<int:pk>/', VistaDiferida('actividades.gestionar_participantes'), name='gestionar_participantes'),
+    path('quitar/<int:actividad_pk>/<int:user_id>/', VistaDiferida('actividades.quitar_participante'), name='quitar_participante'),
     
     # Valoraciones
-    path('valorar/<int:actividad_pk>/<int:usuario_pk>/', views.valorar_usuario, name='valorar_usuario'),
+    path('valorar/<int:actividad_pk>/<int:usuario_pk>/', VistaDiferida('actividades.valorar_usuario'), name='valorar_usuario'),
+
+    # API JSON (solo lectura)
+    path('api/v1/actividades/', VistaDiferida('api.api_actividades'), name='api_actividades'),
+    path('api/v1/actividades/<int:pk>/', VistaDiferida('api.api_actividad'), name='api_actividad'),
+
+    # Calendario (.ics con token firmado)
+    path('calendario/<str:token>.ics', VistaDiferida('calendario.calendario_ics'), name='calendario_ics'),
+    path('calendario/regenerar/', VistaDiferida('calendario.regenerar_calendario'), name='regenerar_calendario'),
 
     # Administración
-    path('administracion/logs/', views.ver_logs, name='ver_logs'),
-    path('administracion/usuarios/', views.gestionar_usuarios, name='gestionar_usuarios'),
+    path('administracion/logs/', VistaDiferida('admin.ver_logs'), name='ver_logs'),
+    path('administracion/usuarios/', VistaDiferida('admin.gestionar_usuarios'), name='gestionar_usuarios'),
+    path('administracion/exportar/<str:recurso>/', VistaDiferida('admin.exportar_datos'), name='exportar_datos'),
 ]
 
 # Servir archivos media en desarrollo
@@ -1,13 +1,88 @@
 """Configuración del panel de administración de Django."""
 from django.contrib import admin
-from .models import Log, Perfil, Actividad, Notificacion, Valoracion
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from .models import (
+    Log, Perfil, Actividad, ConteoFaceta, EliminacionCuenta, EstadisticaOrganizador, ListaEspera,
+    MarcaAgregacion, Notificacion, Valoracion,
+)
+
+# Bajo este número de filas el COUNT(*) exacto es barato y se prefiere
+UMBRAL_CONTEO_ESTIMADO = 100_000
+
+
+def conteo_estimado(queryset):
+    """
+    Cantidad aproximada de filas de la tabla según las estadísticas del motor.
+
+    Retorna None si el motor no ofrece estimación (p. ej. SQLite).
+    """
+    conexion = connections[queryset.db]
+    tabla = queryset.model._meta.db_table
+    if conexion.vendor == 'mysql':
+        sql = (
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s"
+        )
+    elif conexion.vendor == 'postgresql':
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE relname = %s"
+    else:
+        return None
+
+    with conexion.cursor() as cursor:
+        cursor.execute(sql, [tabla])
+        fila = cursor.fetchone()
+    if not fila or fila[0] is None or fila[0] < 0:
+        return None
+    return int(fila[0])
+
+
+class ConteoEstimadoPaginator(Paginator):
+    """
+    Paginador para tablas grandes: sin filtros usa el conteo estimado.
+
+    Un COUNT(*) exacto recorre toda la tabla; para un changelist sin filtros
+    basta con el número aproximado de las estadísticas del motor. Con
+    cualquier filtro, búsqueda o rango de fechas el conteo es exacto y su
+    costo depende de que un índice cubra ese filtro: ``accion`` y las fechas
+    sí, las búsquedas de texto no (recorren la tabla igual que la consulta
+    de la página).
+    """
+
+    @cached_property
+    def count(self):
+        if not self.object_list.query.where:
+            estimado = conteo_estimado(self.object_list)
+            if estimado is not None and estimado >= UMBRAL_CONTEO_ESTIMADO:
+                return estimado
+        return super().count
+
+
+class TablaGrandeAdmin(admin.ModelAdmin):
+    """
+    Base para tablas que crecen sin límite (logs, notificaciones).
+
+    La jerarquía de fechas usa ``jerarquia_fechas``
+    (templatetags/admin_tablas_grandes.py): solo consulta el mínimo y el
+    máximo de la columna y convierte a la zona horaria local en Python, así
+    que tampoco necesita las tablas de zonas horarias de MySQL/MariaDB.
+    """
+    paginator = ConteoEstimadoPaginator
+    change_list_template = 'admin/tabla_grande_change_list.html'
+    # Evita el segundo COUNT(*) sobre toda la tabla al filtrar
+    show_full_result_count = False
 
 
 @admin.register(Log)
-class LogAdmin(admin.ModelAdmin):
+class LogAdmin(TablaGrandeAdmin):
     """Administración de logs del sistema."""
     list_display = ('usuario', 'accion', 'descripcion', 'fecha')
-    list_filter = ('accion', 'fecha')
+    list_filter = ('accion',)
+    list_select_related = ('usuario',)
+    date_hierarchy = 'fecha'
+    autocomplete_fields = ('usuario',)
     search_fields = ('usuario__username', 'descripcion')
     ordering = ('-fecha',)
 
@@ -16,6 +91,8 @@ class LogAdmin(admin.ModelAdmin):
 class PerfilAdmin(admin.ModelAdmin):
     """Administración de perfiles de usuario."""
     list_display = ('usuario', 'nombre_completo', 'disciplina_preferida', 'nivel')
+    list_select_related = ('usuario',)
+    autocomplete_fields = ('usuario',)
     list_filter = ('disciplina_preferida', 'nivel')
     search_fields = ('usuario__username', 'nombre_completo', 'nickname')
 
@@ -25,15 +102,33 @@ class ActividadAdmin(admin.ModelAdmin):
     """Administración de actividades deportivas."""
     list_display = ('titulo', 'deporte', 'organizador', 'fecha', 'cupos', 'nivel')
     list_filter = ('deporte', 'nivel', 'fecha')
+    list_select_related = ('organizador',)
+    autocomplete_fields = ('organizador',)
+    raw_id_fields = ('participantes',)
     search_fields = ('titulo', 'organizador__username', 'lugar')
     ordering = ('-fecha', '-hora_inicio')
 
 
+@admin.register(ListaEspera)
+class ListaEsperaAdmin(admin.ModelAdmin):
+    """Administración de listas de espera."""
+    list_display = ('actividad', 'usuario', 'creada_en')
+    list_select_related = ('actividad', 'usuario')
+    autocomplete_fields = ('usuario',)
+    raw_id_fields = ('actividad',)
+    search_fields = ('actividad__titulo', 'usuario__username')
+    ordering = ('actividad', 'creada_en')
+
+
 @admin.register(Notificacion)
-class NotificacionAdmin(admin.ModelAdmin):
+class NotificacionAdmin(TablaGrandeAdmin):
     """Administración de notificaciones."""
-    list_display = ('usuario', 'tipo', 'mensaje', 'leida', 'fecha_creacion')
-    list_filter = ('tipo', 'leida', 'fecha_creacion')
+    list_display = ('usuario', 'tipo', 'mensaje', 'contador', 'leida', 'fecha_creacion', 'actualizada_en')
+    list_filter = ('tipo', 'leida')
+    list_select_related = ('usuario',)
+    date_hierarchy = 'fecha_creacion'
+    autocomplete_fields = ('usuario',)
+    raw_id_fields = ('actividad',)
     search_fields = ('usuario__username', 'mensaje')
     ordering = ('-fecha_creacion',)
 
@@ -43,6 +138,53 @@ class ValoracionAdmin(admin.ModelAdmin):
     """Administración de valoraciones entre usuarios."""
     list_display = ('evaluador', 'evaluado', 'actividad', 'puntuacion', 'fecha_creacion')
     list_filter = ('puntuacion', 'fecha_creacion')
+    list_select_related = ('evaluador', 'evaluado', 'actividad')
+    autocomplete_fields = ('evaluador', 'evaluado')
+    raw_id_fields = ('actividad',)
     search_fields = ('evaluador__username', 'evaluado__username', 'actividad__titulo')
     ordering = ('-fecha_creacion',)
     readonly_fields = ('fecha_creacion',)
+
+
+@admin.register(EliminacionCuenta)
+class EliminacionCuentaAdmin(admin.ModelAdmin):
+    """Seguimiento de eliminaciones de cuentas en segundo plano."""
+    list_display = ('usuario_id', 'estado', 'etapa', 'filas_eliminadas', 'solicitada_en', 'completada_en')
+    list_filter = ('estado',)
+    readonly_fields = ('usuario_id', 'estado', 'etapa', 'filas_eliminadas', 'error',
+                       'solicitada_en', 'actualizada_en', 'completada_en')
+
+
+@admin.register(ConteoFaceta)
+class ConteoFacetaAdmin(admin.ModelAdmin):
+    """Contadores de actividades abiertas (se corrigen con ``recalcular_facetas``)."""
+    list_display = ('faceta', 'valor', 'abiertas')
+    list_filter = ('faceta',)
+    ordering = ('faceta', 'valor')
+    readonly_fields = ('faceta', 'valor', 'abiertas')
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(EstadisticaOrganizador)
+class EstadisticaOrganizadorAdmin(TablaGrandeAdmin):
+    """Estadísticas diarias agregadas (se reconstruyen con ``agregar_estadisticas --completo``)."""
+    list_display = ('organizador', 'fecha', 'deporte', 'actividades', 'cupos_ocupados', 'cupos_ofrecidos', 'valoraciones')
+    list_filter = ('deporte',)
+    list_select_related = ('organizador',)
+    date_hierarchy = 'fecha'
+    autocomplete_fields = ('organizador',)
+    search_fields = ('organizador__username',)
+    ordering = ('-fecha',)
+    readonly_fields = ('organizador', 'fecha', 'deporte', 'actividades', 'actividades_vacias', 'cupos_ofrecidos',
+                       'cupos_ocupados', 'valoraciones', 'suma_puntuaciones')
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(MarcaAgregacion)
+class MarcaAgregacionAdmin(admin.ModelAdmin):
+    """Marcas de agua de las agregaciones incrementales."""
+    list_display = ('nombre', 'procesado_hasta')
@@ -0,0 +1,67 @@
+"""
+Trabajo diferido hasta que confirma la transacción, agrupado por función.
+
+Los receptores de ``post_delete`` corren una vez por fila: borrar una
+actividad con decenas de valoraciones los dispara decenas de veces. Con
+``acumular_al_confirmar`` cada llamada solo agrega sus valores al lote de la
+transacción, y cada función se ejecuta una vez al confirmar con todos ellos.
+
+El lote vive en el hilo (como la conexión), identificado por el alias y el
+bloque ``atomic`` más externo, y lo vacía un único callback de
+``on_commit``. Ese callback queda atado al savepoint en que se registró: si
+una llamada llega con otra pila de savepoints (el anterior pudo revertirse)
+se registra de nuevo; el primero que corre vacía el lote y los demás no hacen
+nada. Las funciones deben ser idempotentes: los valores agregados dentro de
+un savepoint revertido no se descartan.
+"""
+import threading
+from collections import defaultdict
+from functools import partial
+
+from django.db import transaction
+
+_hilo = threading.local()
+
+
+class _Lote:
+    """Valores pendientes por función de una transacción."""
+
+    def __init__(self, bloque):
+        self.bloque = bloque
+        self.valores = defaultdict(set)
+        # Pila de savepoints del último registro en on_commit
+        self.registrado_en = None
+
+
+def _vaciar(alias, lote):
+    lotes = _hilo.__dict__.get('lotes', {})
+    if lotes.get(alias) is lote:
+        del lotes[alias]
+    pendientes, lote.valores = lote.valores, defaultdict(set)
+    for funcion, valores in pendientes.items():
+        funcion(valores)
+
+
+def acumular_al_confirmar(funcion, valores):
+    """
+    Ejecuta ``funcion(conjunto)`` al confirmar, con los ``valores`` de todas las llamadas.
+
+    Las llamadas con la misma ``funcion`` en una transacción comparten el
+    conjunto. Fuera de una transacción la ejecuta en el acto.
+    """
+    conexion = transaction.get_connection()
+    if not conexion.in_atomic_block:
+        funcion(set(valores))
+        return
+
+    lotes = _hilo.__dict__.setdefault('lotes', {})
+    lote = lotes.get(conexion.alias)
+    if lote is None or lote.bloque is not conexion.atomic_blocks[0]:
+        # Lo que quedó de una transacción anterior se revirtió
+        lote = lotes[conexion.alias] = _Lote(conexion.atomic_blocks[0])
+    lote.valores[funcion].update(valores)
+
+    pila = tuple(conexion.savepoint_ids)
+    if lote.registrado_en != pila:
+        lote.registrado_en = pila
+        transaction.on_commit(partial(_vaciar, conexion.alias, lote))
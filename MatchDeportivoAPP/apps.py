@@ -15,3 +15,8 @@ class MatchdeportivoappConfig(AppConfig):
 
     def ready(self):
         import MatchDeportivoAPP.signals
+        import MatchDeportivoAPP.checks
+        from MatchDeportivoAPP import logs_en_cola
+
+        # El logging ya está configurado: se conectan las colas con sus archivos
+        logs_en_cola.iniciar()
@@ -0,0 +1,42 @@
+"""Backends de autenticación de MatchDeportivo."""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+
+def normalizar_email(email):
+    """Forma canónica de un email: sin espacios y en minúsculas."""
+    return (email or '').strip().lower()
+
+
+class EmailBackend(ModelBackend):
+    """
+    Autenticación con email y contraseña.
+
+    Resuelve el usuario en una sola consulta sobre la columna ``email``
+    (indexada y única sin distinguir mayúsculas, ver migración 0011) y pasa
+    el objeto directamente a la verificación de contraseña, sin volver a
+    buscarlo por username.
+
+    Si el email no existe se calcula igualmente un hash de la contraseña, para
+    que la respuesta tarde lo mismo y no revele qué emails están registrados.
+    """
+
+    def authenticate(self, request, email=None, password=None):
+        if email is None or password is None:
+            return None
+
+        email = normalizar_email(email)
+        user = None
+        if email:
+            user = UserModel._default_manager.filter(email=email).first()
+
+        if user is None:
+            # Hash "de relleno" para igualar el tiempo de respuesta
+            UserModel().set_password(password)
+            return None
+
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
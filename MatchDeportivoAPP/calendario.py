@@ -0,0 +1,191 @@
+"""
+Feed iCalendar (.ics) por usuario, con caché e invalidación explícita.
+
+La URL del feed lleva un token firmado con ``SECRET_KEY`` con el usuario y
+la versión de su enlace (``Perfil.calendario_version``). Regenerar el enlace
+incrementa la versión y el token anterior deja de servir. El contenido, su
+ETag y la versión vigente se guardan en la caché; las vistas que cambian lo
+que ve un usuario (unirse, salir, editar, cerrar, eliminar) llaman a
+``invalidar_calendarios`` con los afectados.
+
+Los clientes de calendario consultan cada pocos minutos: un acierto de caché
+o un ``304`` no hace ninguna consulta al ORM.
+
+La invalidación borra las claves de la caché configurada. Con una caché por
+proceso (LocMem, la de desarrollo) solo se borran en el worker que hizo el
+cambio: los demás pueden servir el feed anterior, o aceptar un token recién
+revocado, hasta ``CALENDARIO_CACHE_SEGUNDOS``. En producción con varios
+workers se necesita una caché compartida (ver ``CACHE_COMPARTIDA`` en
+settings).
+"""
+import hashlib
+from datetime import timedelta, timezone as dt_timezone
+
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .constants import CALENDARIO_CACHE_SEGUNDOS, CALENDARIO_DIAS_PASADOS
+from .models import Actividad, Perfil
+
+SALT_TOKEN = 'MatchDeportivoAPP.calendario'
+
+Participacion = Actividad.participantes.through
+
+
+def token_calendario(usuario_id, version):
+    """Token firmado para la URL del feed del usuario (``version`` de su enlace)."""
+    return signing.dumps([usuario_id, version], salt=SALT_TOKEN)
+
+
+def usuario_de_token(token):
+    """``(usuario_id, version)`` del token, o None si la firma no es válida."""
+    try:
+        datos = signing.loads(token, salt=SALT_TOKEN)
+    except signing.BadSignature:
+        return None
+    # Los enlaces anteriores a las versiones solo llevan el id: versión 0
+    if isinstance(datos, int):
+        datos = [datos, 0]
+    if isinstance(datos, list) and len(datos) == 2 and all(isinstance(d, int) for d in datos):
+        return tuple(datos)
+    return None
+
+
+def _clave_cache(usuario_id):
+    return f'calendario:ics:{usuario_id}'
+
+
+def obtener_calendario(usuario_id, version):
+    """
+    ``(contenido, etag)`` del feed, desde la caché o generándolo.
+
+    Retorna None si el usuario no existe, está desactivado o ``version`` no
+    es la de su enlace vigente.
+    """
+    clave = _clave_cache(usuario_id)
+    guardado = cache.get(clave)
+    if guardado is None:
+        vigente = Perfil.objects.filter(
+            usuario_id=usuario_id, usuario__is_active=True,
+        ).values_list('calendario_version', flat=True).first()
+        if vigente is None:
+            return None
+        contenido = generar_ics(usuario_id)
+        guardado = (contenido, hashlib.sha1(contenido).hexdigest(), vigente)
+        cache.set(clave, guardado, CALENDARIO_CACHE_SEGUNDOS)
+
+    contenido, etag, vigente = guardado
+    if version != vigente:
+        return None
+    return contenido, etag
+
+
+def regenerar_token(usuario_id):
+    """Revoca el enlace del feed del usuario. Retorna el token nuevo."""
+    with transaction.atomic():
+        perfil = Perfil.objects.select_for_update().only('calendario_version').get(usuario_id=usuario_id)
+        perfil.calendario_version += 1
+        perfil.save(update_fields=['calendario_version'])
+        invalidar_calendarios([usuario_id])
+    return token_calendario(usuario_id, perfil.calendario_version)
+
+
+def invalidar_calendarios(usuario_ids):
+    """Descarta los feeds cacheados de esos usuarios cuando la transacción confirma."""
+    claves = [_clave_cache(usuario_id) for usuario_id in set(usuario_ids)]
+    if claves:
+        transaction.on_commit(lambda: cache.delete_many(claves))
+
+
+def usuarios_de_actividades(actividad_ids):
+    """Organizadores y participantes de las actividades (afectados por un cambio en ellas)."""
+    actividad_ids = list(actividad_ids)
+    participantes = Participacion.objects.filter(actividad_id__in=actividad_ids).values_list('user_id', flat=True)
+    organizadores = Actividad.objects.filter(pk__in=actividad_ids).values_list('organizador_id', flat=True)
+    return set(participantes) | set(organizadores)
+
+
+# ============================================
+# FORMATO iCalendar (RFC 5545)
+# ============================================
+
+def _escapar(texto):
+    return (
+        (texto or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _plegar(linea):
+    """Pliega líneas de más de 75 octetos (continuación con un espacio)."""
+    crudo = linea.encode('utf-8')
+    if len(crudo) <= 75:
+        return linea
+    partes, actual = [], ''
+    for caracter in linea:
+        limite = 75 if not partes else 74
+        if len((actual + caracter).encode('utf-8')) > limite:
+            partes.append(actual)
+            actual = ''
+        actual += caracter
+    partes.append(actual)
+    return '\r\n '.join(partes)
+
+
+def _fecha_utc(valor):
+    return valor.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def generar_ics(usuario_id):
+    """Genera el .ics con las actividades que el usuario organiza o en las que participa."""
+    desde = timezone.now() - timedelta(days=CALENDARIO_DIAS_PASADOS)
+    participaciones = Participacion.objects.filter(user_id=usuario_id).values('actividad_id')
+    actividades = (
+        Actividad.objects.filter(Q(organizador_id=usuario_id) | Q(pk__in=participaciones))
+        .filter(inicio__gte=desde)
+        .order_by('inicio', 'pk')
+        .values_list(
+            'pk', 'titulo', 'deporte', 'lugar', 'descripcion', 'nivel', 'inicio', 'fin',
+            'actualizada_en', 'cerrada', 'latitud', 'longitud', 'organizador_id',
+        )
+    )
+
+    lineas = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//MatchDeportivo//Actividades//ES',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        'X-WR-CALNAME:MatchDeportivo',
+        f'X-PUBLISHED-TTL:PT{max(CALENDARIO_CACHE_SEGUNDOS // 60, 1)}M',
+    ]
+    for (pk, titulo, deporte, lugar, descripcion, nivel, inicio, fin,
+         actualizada_en, cerrada, latitud, longitud, organizador_id) in actividades:
+        detalle = f"{deporte.capitalize()} - nivel {nivel}"
+        if organizador_id == usuario_id:
+            detalle += " (organizas)"
+        if cerrada:
+            detalle += " (finalizada)"
+        if descripcion:
+            detalle += f"\n\n{descripcion}"
+
+        lineas += [
+            'BEGIN:VEVENT',
+            f'UID:actividad-{pk}@matchdeportivo',
+            f'DTSTAMP:{_fecha_utc(actualizada_en)}',
+            f'LAST-MODIFIED:{_fecha_utc(actualizada_en)}',
+            f'DTSTART:{_fecha_utc(inicio)}',
+            f'DTEND:{_fecha_utc(fin)}',
+            f'SUMMARY:{_escapar(titulo)}',
+            f'LOCATION:{_escapar(lugar)}',
+            f'DESCRIPTION:{_escapar(detalle)}',
+        ]
+        if latitud is not None and longitud is not None:
+            lineas.append(f'GEO:{latitud};{longitud}')
+        lineas.append('END:VEVENT')
+    lineas.append('END:VCALENDAR')
+
+    return ('\r\n'.join(_plegar(linea) for linea in lineas) + '\r\n').encode('utf-8')
@@ -0,0 +1,35 @@
+"""
+Checks de sistema de MatchDeportivoAPP (``python manage.py check``).
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+CACHES_POR_PROCESO = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+MOTORES_SESION_EN_CACHE = (
+    'MatchDeportivoAPP.sessions',
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+@register(Tags.security, deploy=False)
+def sesiones_en_cache_compartida(app_configs, **kwargs):
+    """Las sesiones en caché necesitan una caché compartida entre workers."""
+    if settings.SESSION_ENGINE not in MOTORES_SESION_EN_CACHE:
+        return []
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in CACHES_POR_PROCESO:
+        return []
+    return [Error(
+        f"SESSION_ENGINE={settings.SESSION_ENGINE!r} con la caché por proceso {backend!r}.",
+        hint=(
+            "Un logout o una cuenta eliminada en un worker dejaría la sesión vigente en la "
+            "caché de los demás. Configurar CACHE_BACKEND con una caché compartida (Redis, "
+            "Memcached, DatabaseCache, FileBasedCache) o usar django.contrib.sessions.backends.db."
+        ),
+        id='sesiones.E001',
+    )]
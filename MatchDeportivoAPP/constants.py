@@ -32,3 +32,40 @@ RADIO_BUSQUEDA_DEFAULT = 50
 
 # Radio de la Tierra en kilómetros (para cálculos de distancia)
 RADIO_TIERRA_KM = 6371
+
+# API JSON: tamaño de página por defecto y máximo
+API_LIMITE_DEFAULT = 20
+API_LIMITE_MAXIMO = 100
+
+# Duración asumida (minutos) de una actividad sin hora_fin
+DURACION_ACTIVIDAD_DEFAULT_MINUTOS = 120
+
+# Exportaciones en streaming: filas leídas por consulta
+EXPORTACION_LOTE = 2000
+
+# Mis actividades: máximo de próximas actividades y tamaño de página del historial
+MIS_ACTIVIDADES_PROXIMAS_LIMITE = 20
+MIS_ACTIVIDADES_HISTORIAL_POR_PAGINA = 10
+
+# Conteos del filtro de actividades: vigencia en caché (segundos)
+FACETAS_CACHE_SEGUNDOS = 5 * 60
+
+# Feed iCalendar: vigencia en caché (segundos) y días de historial incluidos
+CALENDARIO_CACHE_SEGUNDOS = 15 * 60
+CALENDARIO_DIAS_PASADOS = 90
+
+# Notificaciones: tipos que se agrupan en un resumen por usuario (con el texto
+# del resumen), ventana de agrupación, IDs de actividades guardados por
+# resumen, tamaño de la bandeja y retención de las ya leídas
+NOTIFICACIONES_AGRUPABLES = {
+    'NUEVA_ACTIVIDAD': "{contador} nuevas actividades cerca de ti. La más reciente: {titulo}.",
+    'RECORDATORIO_VALORACION': "{contador} actividades terminaron. ¡Valora a tus compañeros! La más reciente: {titulo}.",
+}
+NOTIFICACIONES_AGRUPACION_HORAS = 24
+NOTIFICACIONES_AGRUPACION_MAX_IDS = 50
+NOTIFICACIONES_BANDEJA_LIMITE = 50
+NOTIFICACIONES_RETENCION_DIAS = 90
+
+# Panel de estadísticas del organizador: períodos (días) y período por defecto
+ESTADISTICAS_PERIODOS_DIAS = (30, 90, 365)
+ESTADISTICAS_PERIODO_DEFAULT = 90
@@ -0,0 +1,75 @@
+"""Decoradores de vistas reutilizables."""
+import hashlib
+from calendar import timegm
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .replicas import leer_de_replica
+
+
+def respuesta_condicional(obtener_estado):
+    """
+    Responde ``304 Not Modified`` sin ejecutar la vista si nada cambió.
+
+    ``obtener_estado(request, *args, **kwargs)`` debe resolver, idealmente en
+    una sola consulta indexada, una tupla ``(ultima_modificacion, *extras)``
+    donde ``ultima_modificacion`` es un datetime (normalmente el
+    ``actualizada_en`` del objeto) y ``extras`` cualquier otro dato que altere
+    el HTML (por ejemplo, si el usuario es participante). Si retorna None se
+    ejecuta la vista normalmente.
+
+    El ETag también incluye al usuario y la URL completa, porque las páginas
+    son personalizadas y paginadas. Las respuestas se marcan como privadas y
+    el navegador debe revalidarlas siempre.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def _vista(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return vista(request, *args, **kwargs)
+
+            estado = obtener_estado(request, *args, **kwargs)
+            if not estado or estado[0] is None:
+                return vista(request, *args, **kwargs)
+
+            ultima_modificacion, *extras = estado
+            huella = '|'.join(str(parte) for parte in (
+                request.user.pk,
+                request.get_full_path(),
+                ultima_modificacion.timestamp(),
+                *extras,
+            ))
+            etag = quote_etag(hashlib.sha1(huella.encode()).hexdigest())
+            last_modified = timegm(ultima_modificacion.utctimetuple())
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = vista(request, *args, **kwargs)
+                if response.status_code == 200:
+                    response.headers.setdefault('ETag', etag)
+                    response.headers.setdefault('Last-Modified', http_date(last_modified))
+
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return _vista
+    return decorador
+
+
+def lectura_en_replica(vista):
+    """
+    Ejecuta la vista leyendo de la réplica (ver replicas.py).
+
+    Solo para GET/HEAD y si el usuario no escribió recientemente (cookie de
+    ``FijarPrimariaMiddleware``); en otro caso la vista lee de la primaria.
+    Debe ir debajo de ``@login_required`` y encima de ``@respuesta_condicional``
+    para que el cálculo del ETag también use la réplica.
+    """
+    @wraps(vista)
+    def _vista(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or getattr(request, 'fijado_a_primaria', False):
+            return vista(request, *args, **kwargs)
+        with leer_de_replica():
+            return vista(request, *args, **kwargs)
+    return _vista
@@ -0,0 +1,241 @@
+"""
+Eliminación de cuentas por etapas y en lotes acotados.
+
+``request.user.delete()`` carga en memoria todo lo relacionado (actividades,
+participaciones, valoraciones, notificaciones, logs) y lo borra en una sola
+transacción larga. En su lugar:
+
+1. ``iniciar_eliminacion`` desactiva la cuenta al instante (no puede volver a
+   iniciar sesión), libera su username/email y registra una
+   ``EliminacionCuenta``.
+2. ``purgar_cuenta`` borra los datos etapa por etapa, en lotes de ``lote``
+   filas, cada uno en su propia transacción corta. El progreso (etapa y filas
+   eliminadas) queda en ``EliminacionCuenta``.
+3. La purga la ejecuta ``purgar_cuentas_eliminadas`` (cron), que también
+   retoma las interrumpidas: cada etapa solo consulta las filas que aún
+   existen, así que repetir un lote es inofensivo.
+
+Con ``ELIMINACION_CUENTA_EN_HILO = True`` (solo para desarrollo) la purga
+empieza además en un hilo del worker web al confirmar; si el worker se
+reinicia a mitad, la termina igualmente el comando.
+"""
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .calendario import invalidar_calendarios
+from .facetas import descontar
+from .lista_espera import promover_lista_espera
+from .models import Actividad, EliminacionCuenta, ListaEspera, Log, Notificacion, Perfil, Valoracion
+
+logger = logging.getLogger(__name__)
+
+LOTE_DEFAULT = 500
+
+# Una eliminación EN_PROCESO sin avances durante este tiempo se considera
+# abandonada (el proceso murió) y puede retomarse.
+TIEMPO_ABANDONO = timedelta(minutes=10)
+
+Participacion = Actividad.participantes.through
+
+
+def iniciar_eliminacion(usuario):
+    """Desactiva la cuenta y registra la eliminación pendiente. Retorna el registro."""
+    with transaction.atomic():
+        eliminacion, _ = EliminacionCuenta.objects.get_or_create(usuario_id=usuario.pk)
+        # Desactivar y liberar username/email para que puedan reutilizarse
+        usuario.is_active = False
+        usuario.username = f"eliminado-{usuario.pk}"
+        usuario.email = ''
+        usuario.set_unusable_password()
+        usuario.save(update_fields=['is_active', 'username', 'email', 'password'])
+        # Su feed .ics deja de servirse desde ya
+        invalidar_calendarios([usuario.pk])
+
+        if getattr(settings, 'ELIMINACION_CUENTA_EN_HILO', False):
+            transaction.on_commit(lambda: _lanzar_hilo(eliminacion.pk))
+
+    logger.info(f"Eliminación de cuenta solicitada: usuario {usuario.pk}")
+    return eliminacion
+
+
+def _lanzar_hilo(eliminacion_pk):
+    hilo = threading.Thread(
+        target=_purgar_en_hilo,
+        args=(eliminacion_pk,),
+        name=f"eliminacion-cuenta-{eliminacion_pk}",
+        daemon=True,
+    )
+    hilo.start()
+
+
+def _purgar_en_hilo(eliminacion_pk):
+    try:
+        eliminacion = EliminacionCuenta.objects.get(pk=eliminacion_pk)
+        purgar_cuenta(eliminacion)
+    except Exception:
+        logger.exception(f"Falló la eliminación en segundo plano {eliminacion_pk}; la retomará cron")
+    finally:
+        close_old_connections()
+
+
+def _reclamar(eliminacion):
+    """Marca la eliminación como EN_PROCESO si nadie más la está ejecutando."""
+    ahora = timezone.now()
+    disponible = Q(estado__in=[EliminacionCuenta.PENDIENTE, EliminacionCuenta.ERROR]) | Q(
+        estado=EliminacionCuenta.EN_PROCESO, actualizada_en__lt=ahora - TIEMPO_ABANDONO,
+    )
+    return EliminacionCuenta.objects.filter(disponible, pk=eliminacion.pk).update(
+        estado=EliminacionCuenta.EN_PROCESO, actualizada_en=ahora,
+    ) == 1
+
+
+def purgar_cuenta(eliminacion, lote=LOTE_DEFAULT):
+    """
+    Ejecuta (o retoma) las etapas de borrado de ``eliminacion``.
+
+    Retorna False si otro proceso ya la está ejecutando.
+    """
+    if not _reclamar(eliminacion):
+        return False
+
+    uid = eliminacion.usuario_id
+    try:
+        for etapa, borrar_lote in ETAPAS:
+            while True:
+                with transaction.atomic():
+                    borradas = borrar_lote(uid, lote)
+                    EliminacionCuenta.objects.filter(pk=eliminacion.pk).update(
+                        etapa=etapa,
+                        filas_eliminadas=F('filas_eliminadas') + borradas,
+                        actualizada_en=timezone.now(),
+                    )
+                if borradas:
+                    logger.info(f"Eliminación {eliminacion.pk} (usuario {uid}): {etapa} -{borradas}")
+                if borradas < lote:
+                    break
+    except Exception as e:
+        EliminacionCuenta.objects.filter(pk=eliminacion.pk).update(
+            estado=EliminacionCuenta.ERROR, error=str(e)[:1000], actualizada_en=timezone.now(),
+        )
+        raise
+
+    EliminacionCuenta.objects.filter(pk=eliminacion.pk).update(
+        estado=EliminacionCuenta.COMPLETADA,
+        etapa='',
+        error='',
+        completada_en=timezone.now(),
+    )
+    eliminacion.refresh_from_db()
+    logger.info(
+        f"Cuenta del usuario {uid} eliminada: {eliminacion.filas_eliminadas} filas en total"
+    )
+    return True
+
+
+# ============================================
+# ETAPAS
+# ============================================
+# Cada función borra (o desvincula) hasta ``lote`` filas del usuario ``uid``
+# y retorna cuántas procesó. Se ejecutan en orden; al llegar a la última el
+# borrado del usuario ya no tiene nada que arrastrar en cascada.
+
+def _borrar(queryset, lote):
+    pks = list(queryset.order_by().values_list('pk', flat=True)[:lote])
+    if not pks:
+        return 0
+    queryset.model.objects.filter(pk__in=pks).delete()
+    return len(pks)
+
+
+def _notificaciones(uid, lote):
+    return _borrar(Notificacion.objects.filter(Q(usuario_id=uid) | Q(actividad__organizador_id=uid)), lote)
+
+
+def _listas_espera(uid, lote):
+    return _borrar(ListaEspera.objects.filter(Q(usuario_id=uid) | Q(actividad__organizador_id=uid)), lote)
+
+
+def _valoraciones(uid, lote):
+    """Valoraciones dadas, recibidas o de sus actividades; recalcula los ratings afectados."""
+    filas = list(
+        Valoracion.objects.filter(
+            Q(evaluador_id=uid) | Q(evaluado_id=uid) | Q(actividad__organizador_id=uid)
+        ).order_by().values_list('pk', 'evaluado_id')[:lote]
+    )
+    if not filas:
+        return 0
+    Valoracion.objects.filter(pk__in=[pk for pk, _ in filas]).delete()
+    Perfil.recalcular_ratings_al_confirmar({evaluado for _, evaluado in filas} - {uid})
+    return len(filas)
+
+
+def _participaciones(uid, lote):
+    """Sale de las actividades ajenas: libera el cupo y promueve la lista de espera."""
+    filas = list(
+        Participacion.objects.filter(user_id=uid).order_by().values_list('pk', 'actividad_id')[:lote]
+    )
+    if not filas:
+        return 0
+    Participacion.objects.filter(pk__in=[pk for pk, _ in filas]).delete()
+
+    abiertas = Actividad.objects.select_for_update().filter(
+        pk__in=[actividad_id for _, actividad_id in filas],
+        cerrada=False,
+    ).exclude(organizador_id=uid)
+    for actividad in abiertas:
+        actividad.cupos += 1
+        actividad.save(update_fields=['cupos', 'actualizada_en'])
+        promover_lista_espera(actividad)
+    return len(filas)
+
+
+def _participantes_de_sus_actividades(uid, lote):
+    """Saca a los participantes de sus actividades (y las quita de sus calendarios)."""
+    filas = list(
+        Participacion.objects.filter(actividad__organizador_id=uid).order_by().values_list('pk', 'user_id')[:lote]
+    )
+    if not filas:
+        return 0
+    Participacion.objects.filter(pk__in=[pk for pk, _ in filas]).delete()
+    invalidar_calendarios(user_id for _, user_id in filas)
+    return len(filas)
+
+
+def _actividades(uid, lote):
+    """Borra sus actividades y descuenta las abiertas de los contadores de facetas."""
+    pks = list(Actividad.objects.filter(organizador_id=uid).order_by().values_list('pk', flat=True)[:lote])
+    if not pks:
+        return 0
+    descontar(Actividad.objects.filter(pk__in=pks, cerrada=False))
+    Actividad.objects.filter(pk__in=pks).delete()
+    return len(pks)
+
+
+def _logs(uid, lote):
+    """Los logs se conservan para auditoría, desvinculados del usuario."""
+    pks = list(Log.objects.filter(usuario_id=uid).order_by().values_list('pk', flat=True)[:lote])
+    return Log.objects.filter(pk__in=pks).update(usuario=None)
+
+
+def _usuario(uid, lote):
+    borrados, _ = User.objects.filter(pk=uid).delete()
+    return borrados
+
+
+ETAPAS = [
+    ('notificaciones', _notificaciones),
+    ('listas_espera', _listas_espera),
+    ('valoraciones', _valoraciones),
+    ('participaciones', _participaciones),
+    ('participantes_actividades', _participantes_de_sus_actividades),
+    ('actividades', _actividades),
+    ('logs', _logs),
+    ('usuario', _usuario),
+]
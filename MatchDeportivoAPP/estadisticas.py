@@ -0,0 +1,210 @@
+"""
+Estadísticas de organizadores agregadas por día y deporte.
+
+``EstadisticaOrganizador`` guarda, por organizador, día y deporte, las
+actividades finalizadas, los cupos ofrecidos y ocupados y las valoraciones
+que recibió el organizador en ellas. El panel (views/estadisticas.py) solo
+lee estas filas.
+
+El comando ``agregar_estadisticas`` las mantiene de forma incremental con
+una marca de agua (``MarcaAgregacion``): busca los días con cambios desde la
+última corrida (actividades cerradas o modificadas, valoraciones nuevas) y
+recalcula solo esos días desde las tablas de origen. Recalcular un día es
+idempotente, así que la ventana se solapa un poco con la corrida anterior
+para no perder transacciones que confirmaron tarde.
+
+Borrar una actividad finalizada o una valoración no deja fecha de
+modificación que detectar: las señales de borrado registran el día en
+``DiaPorAgregar`` (``marcar_dias``, ``marcar_actividades``) y la corrida
+incremental lo incluye. Los borrados que no emiten señales (SQL directo) solo
+se corrigen con la reconstrucción completa (``--completo``).
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import Actividad, DiaPorAgregar, EstadisticaOrganizador, MarcaAgregacion, Valoracion
+
+MARCA = 'estadisticas_organizador'
+
+# Margen hacia atrás de cada corrida incremental
+SOLAPAMIENTO = timedelta(minutes=5)
+
+# Organizadores recalculados por grupo de consultas
+LOTE_ORGANIZADORES = 200
+
+Participacion = Actividad.participantes.through
+
+CAMPOS = ('actividades', 'actividades_vacias', 'cupos_ofrecidos', 'cupos_ocupados', 'valoraciones', 'suma_puntuaciones')
+
+
+def dias_modificados(desde, hasta):
+    """``{organizador_id: {fecha}}`` con cambios en ``(desde, hasta]``."""
+    dias = defaultdict(set)
+    actividades = Actividad.objects.filter(
+        cerrada=True, actualizada_en__gt=desde, actualizada_en__lte=hasta,
+    ).values_list('organizador_id', 'fecha')
+    valoraciones = Valoracion.objects.filter(
+        fecha_creacion__gt=desde, fecha_creacion__lte=hasta,
+        evaluado_id=F('actividad__organizador_id'), actividad__cerrada=True,
+    ).values_list('actividad__organizador_id', 'actividad__fecha')
+    for organizador_id, fecha in [*actividades, *valoraciones]:
+        dias[organizador_id].add(fecha)
+    return dias
+
+
+def marcar_dias(dias):
+    """Registra ``(organizador_id, fecha)`` para recalcularlos en la próxima corrida."""
+    dias = set(dias)
+    # Si se borró el organizador, sus estadísticas se fueron con él
+    existentes = set(User.objects.filter(pk__in={o for o, _ in dias}).values_list('pk', flat=True))
+    DiaPorAgregar.objects.bulk_create(
+        [DiaPorAgregar(organizador_id=o, fecha=fecha) for o, fecha in dias if o in existentes],
+        ignore_conflicts=True,
+    )
+
+
+def marcar_actividades(actividad_ids):
+    """Registra los días de las actividades finalizadas de ``actividad_ids`` que aún existen."""
+    marcar_dias(
+        Actividad.objects.filter(pk__in=set(actividad_ids), cerrada=True).values_list('organizador_id', 'fecha')
+    )
+
+
+def _filtro(dias):
+    """Q sobre ``organizador_id``/``fecha`` para ``{organizador_id: {fecha} o None}`` (None = todos)."""
+    filtro = Q()
+    for organizador_id, fechas in dias.items():
+        if fechas is None:
+            filtro |= Q(organizador_id=organizador_id)
+        else:
+            filtro |= Q(organizador_id=organizador_id, fecha__in=sorted(fechas))
+    return filtro
+
+
+def _agregar(actividades):
+    """Filas de ``EstadisticaOrganizador`` calculadas desde ``actividades`` (queryset)."""
+    filas = {}
+    clave = ('organizador_id', 'fecha', 'deporte')
+
+    for fila in actividades.values(*clave).annotate(
+        cantidad=Count('pk'), libres=Sum('cupos'),
+    ).order_by():
+        filas[tuple(fila[c] for c in clave)] = EstadisticaOrganizador(
+            organizador_id=fila['organizador_id'], fecha=fila['fecha'], deporte=fila['deporte'],
+            actividades=fila['cantidad'], cupos_ofrecidos=max(fila['libres'] or 0, 0),
+        )
+
+    for fila in actividades.filter(participantes__isnull=True).values(*clave).annotate(
+        cantidad=Count('pk'),
+    ).order_by():
+        filas[tuple(fila[c] for c in clave)].actividades_vacias = fila['cantidad']
+
+    # Los cupos de una actividad son los que quedaron libres: los ocupados se suman a los ofrecidos
+    por_actividad = ('actividad__organizador_id', 'actividad__fecha', 'actividad__deporte')
+    for fila in Participacion.objects.filter(actividad__in=actividades).values(*por_actividad).annotate(
+        cantidad=Count('pk'),
+    ).order_by():
+        estadistica = filas[tuple(fila[c] for c in por_actividad)]
+        estadistica.cupos_ocupados = fila['cantidad']
+        estadistica.cupos_ofrecidos += fila['cantidad']
+
+    for fila in Valoracion.objects.filter(
+        actividad__in=actividades, evaluado_id=F('actividad__organizador_id'),
+    ).values(*por_actividad).annotate(cantidad=Count('pk'), suma=Sum('puntuacion')).order_by():
+        estadistica = filas[tuple(fila[c] for c in por_actividad)]
+        estadistica.valoraciones = fila['cantidad']
+        estadistica.suma_puntuaciones = fila['suma']
+
+    return list(filas.values())
+
+
+def recalcular(dias):
+    """
+    Reemplaza las estadísticas de ``{organizador_id: {fecha} o None}`` por las calculadas.
+
+    Retorna la cantidad de filas escritas.
+    """
+    organizadores = sorted(dias)
+    escritas = 0
+    for inicio in range(0, len(organizadores), LOTE_ORGANIZADORES):
+        lote = {o: dias[o] for o in organizadores[inicio:inicio + LOTE_ORGANIZADORES]}
+        filtro = _filtro(lote)
+        filas = _agregar(Actividad.objects.filter(filtro, cerrada=True))
+        with transaction.atomic():
+            EstadisticaOrganizador.objects.filter(filtro).delete()
+            EstadisticaOrganizador.objects.bulk_create(filas, batch_size=500)
+        escritas += len(filas)
+    return escritas
+
+
+def actualizar(completo=False):
+    """
+    Procesa los cambios desde la última corrida (o todo, con ``completo``).
+
+    Retorna ``(organizadores, filas)`` recalculados.
+    """
+    with transaction.atomic():
+        # El bloqueo de la marca evita dos corridas simultáneas
+        marca, _ = MarcaAgregacion.objects.select_for_update().get_or_create(nombre=MARCA)
+        ahora = timezone.now()
+
+        pendientes = list(DiaPorAgregar.objects.values_list('pk', 'organizador_id', 'fecha'))
+
+        if completo or marca.procesado_hasta is None:
+            organizadores = Actividad.objects.filter(cerrada=True).values_list('organizador_id', flat=True).distinct()
+            dias = dict.fromkeys(organizadores.order_by())
+            EstadisticaOrganizador.objects.exclude(organizador_id__in=list(dias)).delete()
+        else:
+            dias = dias_modificados(marca.procesado_hasta - SOLAPAMIENTO, ahora)
+            for _, organizador_id, fecha in pendientes:
+                dias[organizador_id].add(fecha)
+
+        filas = recalcular(dias)
+        # Solo las leídas: las que se registren mientras tanto quedan para la próxima
+        DiaPorAgregar.objects.filter(pk__in=[pk for pk, _, _ in pendientes]).delete()
+        marca.procesado_hasta = ahora
+        marca.save(update_fields=['procesado_hasta'])
+    return len(dias), filas
+
+
+def resumen_organizador(organizador_id, desde):
+    """
+    Totales, desglose por deporte y serie mensual del organizador desde ``desde``.
+
+    Lee solo las filas agregadas del período (a lo más una por día y deporte).
+    """
+    totales = dict.fromkeys(CAMPOS, 0)
+    por_deporte = defaultdict(lambda: dict.fromkeys(CAMPOS, 0))
+    por_mes = defaultdict(lambda: dict.fromkeys(CAMPOS, 0))
+
+    for fila in EstadisticaOrganizador.objects.filter(
+        organizador_id=organizador_id, fecha__gte=desde,
+    ).values('fecha', 'deporte', *CAMPOS):
+        for grupo in (totales, por_deporte[fila['deporte']], por_mes[fila['fecha'].replace(day=1)]):
+            for campo in CAMPOS:
+                grupo[campo] += fila[campo]
+
+    def con_tasas(datos):
+        ofrecidos = datos['cupos_ofrecidos']
+        datos['ocupacion'] = round(100 * datos['cupos_ocupados'] / ofrecidos) if ofrecidos else None
+        datos['promedio'] = round(datos['suma_puntuaciones'] / datos['valoraciones'], 2) if datos['valoraciones'] else None
+        return datos
+
+    return {
+        'totales': con_tasas(totales),
+        'por_deporte': sorted(
+            ({'deporte': deporte, **con_tasas(datos)} for deporte, datos in por_deporte.items()),
+            key=lambda d: d['actividades'], reverse=True,
+        ),
+        'por_mes': [{'mes': mes, **con_tasas(datos)} for mes, datos in sorted(por_mes.items())],
+    }
+
+
+def ultima_actualizacion():
+    """Fecha de la última corrida de la agregación, o None."""
+    return MarcaAgregacion.objects.filter(nombre=MARCA).values_list('procesado_hasta', flat=True).first()
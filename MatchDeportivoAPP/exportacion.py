@@ -0,0 +1,123 @@
+"""
+Exportación de datos en streaming (CSV o NDJSON).
+
+Las filas se leen por lotes con paginación por clave (``pk > último``) y se
+entregan de a una a través de un generador, así que la memoria usada depende
+del tamaño del lote y no del total exportado. Se usa paginación por clave en
+lugar de ``.iterator()`` porque con MySQL el driver trae el resultado completo
+a memoria aunque se pida un iterador.
+
+Lo usan la vista ``exportar_datos`` (StreamingHttpResponse) y el comando
+``exportar_datos``.
+"""
+import csv
+import json
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from .constants import EXPORTACION_LOTE
+from .models import Actividad, Log, Valoracion
+
+# recurso -> modelo, campo de fecha para filtrar y columnas (lookups de values_list)
+EXPORTACIONES = {
+    'logs': {
+        'modelo': Log,
+        'campo_fecha': 'fecha',
+        'columnas': ['id', 'fecha', 'usuario_id', 'usuario__username', 'accion', 'descripcion'],
+    },
+    'actividades': {
+        'modelo': Actividad,
+        'campo_fecha': 'fecha',
+        'columnas': [
+            'id', 'titulo', 'deporte', 'nivel', 'lugar', 'fecha', 'hora_inicio', 'hora_fin',
+            'cupos', 'cerrada', 'organizador_id', 'organizador__username', 'creada_en',
+        ],
+    },
+    'valoraciones': {
+        'modelo': Valoracion,
+        'campo_fecha': 'fecha_creacion',
+        'columnas': [
+            'id', 'fecha_creacion', 'actividad_id', 'evaluador_id', 'evaluado_id', 'puntuacion', 'comentario',
+        ],
+    },
+}
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class _Eco:
+    """Buffer mínimo para csv.writer: retorna la línea en lugar de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def _rango(recurso, desde, hasta):
+    """Filtro por rango de fechas (inclusive) que puede usar el índice de la columna."""
+    configuracion = EXPORTACIONES[recurso]
+    campo = configuracion['campo_fecha']
+    es_datetime = configuracion['modelo']._meta.get_field(campo).get_internal_type() == 'DateTimeField'
+
+    filtros = {}
+    if desde:
+        filtros[f'{campo}__gte'] = timezone.make_aware(datetime.combine(desde, time.min)) if es_datetime else desde
+    if hasta:
+        if es_datetime:
+            filtros[f'{campo}__lt'] = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min))
+        else:
+            filtros[f'{campo}__lte'] = hasta
+    return filtros
+
+
+def iterar_filas(recurso, desde=None, hasta=None, lote=EXPORTACION_LOTE):
+    """Genera tuplas con las columnas de ``recurso``, leyendo ``lote`` filas por consulta."""
+    configuracion = EXPORTACIONES[recurso]
+    consulta = (
+        configuracion['modelo'].objects
+        .filter(**_rango(recurso, desde, hasta))
+        .order_by('pk')
+        .values_list(*configuracion['columnas'])
+    )
+
+    ultimo = 0
+    while True:
+        filas = list(consulta.filter(pk__gt=ultimo)[:lote])
+        yield from filas
+        if len(filas) < lote:
+            break
+        ultimo = filas[-1][0]
+
+
+def _serializar_valor(valor):
+    if isinstance(valor, datetime):
+        return timezone.localtime(valor).isoformat() if timezone.is_aware(valor) else valor.isoformat()
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    return valor
+
+
+def exportar_csv(recurso, desde=None, hasta=None, lote=EXPORTACION_LOTE):
+    """Genera las líneas CSV (con encabezado) de ``recurso``."""
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(EXPORTACIONES[recurso]['columnas'])
+    for fila in iterar_filas(recurso, desde, hasta, lote):
+        yield escritor.writerow([_serializar_valor(valor) for valor in fila])
+
+
+def exportar_ndjson(recurso, desde=None, hasta=None, lote=EXPORTACION_LOTE):
+    """Genera un objeto JSON por línea de ``recurso``."""
+    columnas = EXPORTACIONES[recurso]['columnas']
+    for fila in iterar_filas(recurso, desde, hasta, lote):
+        datos = {columna: _serializar_valor(valor) for columna, valor in zip(columnas, fila)}
+        yield json.dumps(datos, ensure_ascii=False) + '\n'
+
+
+def exportar(recurso, formato, desde=None, hasta=None, lote=EXPORTACION_LOTE):
+    """Generador de líneas de ``recurso`` en ``formato`` ('csv' o 'ndjson')."""
+    if formato == 'ndjson':
+        return exportar_ndjson(recurso, desde, hasta, lote)
+    return exportar_csv(recurso, desde, hasta, lote)
@@ -0,0 +1,125 @@
+"""
+Conteos de actividades abiertas por deporte y nivel para el filtro lateral.
+
+Un ``GROUP BY`` sobre ``Actividad`` en cada visita a la lista crece con la
+tabla. En su lugar ``ConteoFaceta`` guarda un contador por valor que cada
+camino de escritura ajusta explícitamente, en la misma transacción que el
+cambio:
+
+- crear, editar, cerrar o eliminar una actividad (views/actividades.py):
+  ``mover_faceta`` con la faceta de antes y la de después;
+- cierres masivos con ``UPDATE`` (comando ``cerrar_actividades_finalizadas``)
+  y borrados por lotes (eliminación de cuentas): ``descontar``.
+
+Los cambios hechos por otros caminos (el admin de Django, la shell) no
+ajustan los contadores: ``recalcular`` reconstruye la tabla desde cero
+(comando ``recalcular_facetas``).
+
+Los conteos se leen de la caché (una sola clave para todas las facetas) y se
+invalidan al confirmar cada ajuste. La invalidación solo alcanza a la caché
+de este proceso si es por proceso (LocMem), así que la clave expira a los
+``FACETAS_CACHE_SEGUNDOS`` para acotar lo que otro worker puede mostrar
+desactualizado.
+"""
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .constants import FACETAS_CACHE_SEGUNDOS
+from .models import Actividad, ConteoFaceta
+
+CLAVE_CACHE = 'facetas:conteos'
+
+
+def _claves(deporte, nivel):
+    return [(ConteoFaceta.DEPORTE, deporte), (ConteoFaceta.NIVEL, nivel)]
+
+
+def ajustar(deltas):
+    """Suma a cada ``(faceta, valor)`` su delta de ``deltas`` (dict o Counter)."""
+    deltas = {clave: delta for clave, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    for (faceta, valor), delta in sorted(deltas.items()):
+        actualizadas = ConteoFaceta.objects.filter(faceta=faceta, valor=valor).update(
+            abiertas=F('abiertas') + delta,
+        )
+        if not actualizadas:
+            try:
+                with transaction.atomic():
+                    ConteoFaceta.objects.create(faceta=faceta, valor=valor, abiertas=delta)
+            except IntegrityError:
+                # Otro proceso creó la fila entre el UPDATE y el INSERT
+                ConteoFaceta.objects.filter(faceta=faceta, valor=valor).update(
+                    abiertas=F('abiertas') + delta,
+                )
+    transaction.on_commit(lambda: cache.delete(CLAVE_CACHE))
+
+
+def mover_faceta(anterior, actual):
+    """
+    Ajusta los contadores cuando una actividad pasa de ``anterior`` a ``actual``.
+
+    Ambos son ``(deporte, nivel)`` si la actividad está (o estaba) abierta, o
+    None si no existía, estaba cerrada o fue eliminada.
+    """
+    if anterior == actual:
+        return
+    deltas = Counter()
+    if anterior is not None:
+        deltas.subtract(dict.fromkeys(_claves(*anterior), 1))
+    if actual is not None:
+        deltas.update(_claves(*actual))
+    ajustar(deltas)
+
+
+def descontar(actividades):
+    """
+    Descuenta de los contadores todas las actividades de ``actividades`` (queryset).
+
+    Para las recién cerradas con ``update()`` o las abiertas que se van a
+    borrar en lote (se llama antes del ``delete()``).
+    """
+    deltas = Counter()
+    for deporte, nivel, cantidad in (
+        actividades.order_by().values('deporte', 'nivel')
+        .annotate(cantidad=Count('pk')).values_list('deporte', 'nivel', 'cantidad')
+    ):
+        for clave in _claves(deporte, nivel):
+            deltas[clave] -= cantidad
+    ajustar(deltas)
+
+
+def conteos():
+    """``{faceta: {valor: abiertas}}`` desde la caché o la tabla de contadores."""
+    datos = cache.get(CLAVE_CACHE)
+    if datos is None:
+        datos = {faceta: {} for faceta, _ in ConteoFaceta.FACETAS}
+        for faceta, valor, abiertas in ConteoFaceta.objects.values_list('faceta', 'valor', 'abiertas'):
+            datos.setdefault(faceta, {})[valor] = abiertas
+        cache.set(CLAVE_CACHE, datos, FACETAS_CACHE_SEGUNDOS)
+    return datos
+
+
+def opciones_con_conteo(opciones, faceta):
+    """``[(valor, nombre, abiertas)]`` para las ``opciones`` (choices) de ``faceta``."""
+    por_valor = conteos().get(faceta, {})
+    return [(valor, nombre, por_valor.get(valor, 0)) for valor, nombre in opciones]
+
+
+@transaction.atomic
+def recalcular():
+    """Reconstruye ``ConteoFaceta`` desde las actividades abiertas. Retorna los conteos."""
+    abiertas = Actividad.objects.filter(cerrada=False).order_by()
+    filas = []
+    for faceta in (ConteoFaceta.DEPORTE, ConteoFaceta.NIVEL):
+        for valor, cantidad in abiertas.values(faceta).annotate(cantidad=Count('pk')).values_list(faceta, 'cantidad'):
+            filas.append(ConteoFaceta(faceta=faceta, valor=valor, abiertas=cantidad))
+
+    ConteoFaceta.objects.all().delete()
+    ConteoFaceta.objects.bulk_create(filas)
+    transaction.on_commit(lambda: cache.delete(CLAVE_CACHE))
+    return filas
@@ -0,0 +1,132 @@
+"""
+Geocodificación offline a partir de un nomenclátor incluido en el proyecto.
+
+``data/gazetteer_cl.tsv`` contiene comunas de Chile, parques y estadios con
+coordenadas aproximadas. Se carga una sola vez en un arreglo ordenado de
+claves normalizadas (sin tildes, minúsculas, sin puntuación), de modo que:
+
+- la búsqueda exacta es una bisección, O(log n);
+- la búsqueda aproximada solo compara contra las claves que comparten la
+  primera letra (un rango contiguo del arreglo).
+
+``geocodificar("Cancha 3, Parque O'Higgins, Santiago")`` prueba primero las
+secuencias de palabras más largas y prefiere recintos (parques, estadios)
+sobre comunas, así que resuelve al parque y no al centro de la comuna.
+"""
+import csv
+import difflib
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+RUTA_NOMENCLATOR = Path(__file__).resolve().parent / 'data' / 'gazetteer_cl.tsv'
+
+# Similitud mínima (0-1) para aceptar una coincidencia aproximada
+SIMILITUD_MINIMA = 0.85
+
+# Palabras consideradas en cada ventana de búsqueda
+MAXIMO_PALABRAS = 6
+
+
+class Lugar(NamedTuple):
+    nombre: str
+    tipo: str
+    comuna: str
+    latitud: Decimal
+    longitud: Decimal
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes ni puntuación y con espacios simples."""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+    texto = texto.replace("'", '').replace('’', '')
+    return ' '.join(re.findall(r'[a-z0-9]+', texto))
+
+
+@lru_cache(maxsize=1)
+def _indice():
+    """Arreglo ordenado de ``(clave, Lugar)`` cargado desde el TSV."""
+    entradas = {}
+    with open(RUTA_NOMENCLATOR, encoding='utf-8') as archivo:
+        filas = csv.DictReader(
+            (linea for linea in archivo if not linea.startswith('#')),
+            delimiter='\t',
+        )
+        for fila in filas:
+            lugar = Lugar(
+                fila['nombre'], fila['tipo'], fila['comuna'],
+                Decimal(fila['latitud']), Decimal(fila['longitud']),
+            )
+            nombres = [fila['nombre'], *filter(None, (fila['alias'] or '').split('|'))]
+            for nombre in nombres:
+                entradas.setdefault(normalizar(nombre), lugar)
+
+    claves = sorted(entradas)
+    return claves, [entradas[clave] for clave in claves]
+
+
+def _exacto(clave):
+    claves, lugares = _indice()
+    i = bisect_left(claves, clave)
+    if i < len(claves) and claves[i] == clave:
+        return lugares[i]
+    return None
+
+
+def _aproximado(clave):
+    """Mejor coincidencia aproximada entre las claves con la misma inicial."""
+    claves, lugares = _indice()
+    inicio = bisect_left(claves, clave[0])
+    fin = bisect_right(claves, clave[0] + '\x7f')
+    candidatos = claves[inicio:fin]
+    coincidencias = difflib.get_close_matches(clave, candidatos, n=1, cutoff=SIMILITUD_MINIMA)
+    if coincidencias:
+        return lugares[inicio + candidatos.index(coincidencias[0])]
+    return None
+
+
+def _ventanas(palabras):
+    """Secuencias contiguas de palabras, de la más larga a la más corta."""
+    for largo in range(min(len(palabras), MAXIMO_PALABRAS), 0, -1):
+        for inicio in range(len(palabras) - largo + 1):
+            yield ' '.join(palabras[inicio:inicio + largo])
+
+
+def _buscar(palabras, buscar):
+    """Primer recinto encontrado o, si no hay, la primera comuna."""
+    comuna = None
+    for ventana in _ventanas(palabras):
+        lugar = buscar(ventana)
+        if lugar is None:
+            continue
+        if lugar.tipo != 'comuna':
+            return lugar
+        comuna = comuna or lugar
+    return comuna
+
+
+@lru_cache(maxsize=2048)
+def buscar_lugar(texto):
+    """Retorna el ``Lugar`` que mejor corresponde a ``texto`` o None."""
+    palabras = normalizar(texto).split()
+    if not palabras:
+        return None
+
+    lugar = _buscar(palabras, _exacto)
+    if lugar is None:
+        # Las palabras muy cortas generan demasiados falsos positivos
+        lugar = _buscar(palabras, lambda v: _aproximado(v) if len(v) >= 4 else None)
+    return lugar
+
+
+def geocodificar(texto):
+    """Retorna ``(latitud, longitud)`` como Decimal, o ``(None, None)`` si no se resuelve."""
+    lugar = buscar_lugar(texto or '')
+    if lugar is None:
+        return None, None
+    return lugar.latitud, lugar.longitud
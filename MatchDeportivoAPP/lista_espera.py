@@ -0,0 +1,91 @@
+"""
+Cupos y lista de espera de las actividades.
+
+Las vistas (unirse, salir, quitar participante, editar) y la eliminación de
+cuentas liberan u ocupan cupos con estas funciones. Todas deben llamarse
+dentro de la transacción que modifica la actividad y con su fila bloqueada
+(``select_for_update``): así dos salidas simultáneas no promueven al mismo
+usuario ni sobrevenden cupos.
+"""
+from django.db.models import Q
+
+from .calendario import invalidar_calendarios
+from .models import Actividad, Notificacion
+
+
+def buscar_conflicto_horario(usuario, actividad):
+    """
+    Primera actividad abierta del usuario que se solapa con ``actividad``, o None.
+
+    Una sola consulta por rango sobre los intervalos indexados
+    (``inicio < otra.fin AND fin > otra.inicio``) entre las actividades en las
+    que participa u organiza.
+    """
+    if actividad.inicio is None or actividad.fin is None:
+        return None
+
+    participaciones = Actividad.participantes.through.objects.filter(user_id=usuario.pk).values('actividad_id')
+    return (
+        Actividad.objects.filter(
+            Q(pk__in=participaciones) | Q(organizador_id=usuario.pk),
+            cerrada=False,
+            inicio__lt=actividad.fin,
+            fin__gt=actividad.inicio,
+        )
+        .exclude(pk=actividad.pk)
+        .only('pk', 'titulo', 'fecha', 'hora_inicio')
+        .first()
+    )
+
+
+def promover_lista_espera(actividad):
+    """
+    Asigna los cupos libres de ``actividad`` a los primeros de su lista de espera.
+
+    Se salta (sin sacarlo de la cola) a quien ya tenga otra actividad en ese
+    horario. Una actividad cerrada no promueve a nadie. Retorna la lista de
+    usuarios promovidos.
+    """
+    promovidos = []
+    if actividad.cerrada or actividad.cupos <= 0:
+        return promovidos
+
+    for entrada in actividad.lista_espera.select_related('usuario'):
+        if actividad.cupos <= 0:
+            break
+        if buscar_conflicto_horario(entrada.usuario, actividad) is not None:
+            continue
+
+        actividad.participantes.add(entrada.usuario)
+        actividad.cupos -= 1
+        entrada.delete()
+        promovidos.append(entrada.usuario)
+
+        Notificacion.objects.create(
+            usuario=entrada.usuario,
+            actividad=actividad,
+            tipo='PROMOCION_LISTA_ESPERA',
+            mensaje=f"¡Se liberó un cupo! Ya estás inscrito en {actividad.titulo} el {actividad.fecha}.",
+        )
+
+    if promovidos:
+        actividad.save()
+        invalidar_calendarios(u.pk for u in promovidos)
+    return promovidos
+
+
+def liberar_cupo(actividad, usuario_id):
+    """
+    Saca al participante, libera su cupo y promueve la lista de espera.
+
+    Retorna False (sin cambiar nada) si ``usuario_id`` no participa en la
+    actividad.
+    """
+    if not actividad.participantes.filter(pk=usuario_id).exists():
+        return False
+    actividad.participantes.remove(usuario_id)
+    actividad.cupos += 1
+    actividad.save()
+    invalidar_calendarios([usuario_id])
+    promover_lista_espera(actividad)
+    return True
@@ -0,0 +1,71 @@
+"""
+Logging sin E/S en el hilo del request.
+
+``ManejadorEnCola`` es el único manejador de archivo que ven los loggers: cada
+registro se encola (una operación en memoria) y un ``QueueListener`` en un
+hilo de fondo lo entrega a los manejadores reales (``RotatingFileHandler``),
+que son los únicos que escriben y rotan archivos.
+
+En ``settings.LOGGING`` los destinos son manejadores comunes, indicados por
+nombre en ``destinos``. Para que ``dictConfig`` los mantenga vivos se asignan
+al logger ``LOGGER_DESTINOS``, que no se usa para registrar. El listener se
+arma en ``AppConfig.ready()`` (``iniciar``), cuando el logging ya está
+configurado: lo que se registre antes queda en la cola y se escribe al
+arrancar.
+
+Al cerrar el proceso (``logging.shutdown`` o una reconfiguración) el
+listener termina de vaciar la cola antes de que se cierren los archivos.
+"""
+import logging
+import queue
+import weakref
+from logging.handlers import QueueHandler, QueueListener
+
+from django.core.exceptions import ImproperlyConfigured
+
+# Logger que solo sostiene los destinos de la cola
+LOGGER_DESTINOS = 'MatchDeportivoAPP.logs_en_cola.destinos'
+
+_sin_iniciar = weakref.WeakSet()
+
+
+class ManejadorEnCola(QueueHandler):
+    """Encola los registros; un hilo de fondo los escribe con los manejadores ``destinos``."""
+
+    def __init__(self, destinos):
+        super().__init__(queue.SimpleQueue())
+        self.destinos = tuple(destinos)
+        self.listener = None
+        _sin_iniciar.add(self)
+
+    def iniciar(self, disponibles):
+        """Arranca el listener con los manejadores de ``disponibles`` cuyos nombres están en ``destinos``."""
+        por_nombre = {manejador.name: manejador for manejador in disponibles}
+        faltantes = [nombre for nombre in self.destinos if nombre not in por_nombre]
+        if faltantes:
+            raise ImproperlyConfigured(
+                f"ManejadorEnCola: destinos sin configurar en el logger {LOGGER_DESTINOS!r}: "
+                f"{', '.join(faltantes)}"
+            )
+        manejadores = [por_nombre[nombre] for nombre in self.destinos]
+        # Sin nivel propio no se encola lo que ningún destino escribiría
+        self.setLevel(min(manejador.level for manejador in manejadores))
+        self.listener = QueueListener(self.queue, *manejadores, respect_handler_level=True)
+        self.listener.start()
+        _sin_iniciar.discard(self)
+
+    def close(self):
+        # Vacía la cola en los destinos antes de cerrar (close puede llamarse
+        # más de una vez: al reconfigurar y en logging.shutdown)
+        _sin_iniciar.discard(self)
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+        super().close()
+
+
+def iniciar():
+    """Arranca los ``ManejadorEnCola`` configurados por ``settings.LOGGING``."""
+    disponibles = logging.getLogger(LOGGER_DESTINOS).handlers
+    for manejador in list(_sin_iniciar):
+        manejador.iniciar(disponibles)
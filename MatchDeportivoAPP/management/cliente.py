@@ -0,0 +1,30 @@
+"""
+Cliente WSGI en proceso para los comandos de carga y benchmark.
+
+``django.test.Client`` usa el host ``testserver`` y peticiones http, que solo
+funcionan dentro del runner de pruebas (que agrega ``testserver`` a
+``ALLOWED_HOSTS``). Desde ``manage.py`` la validación de host respondería 400
+a todo, y con ``DEBUG=False`` ``SECURE_SSL_REDIRECT`` respondería 301.
+"""
+from django.conf import settings
+from django.test import Client
+
+
+def host_permitido():
+    """Primer host concreto de ``ALLOWED_HOSTS`` (``localhost`` si solo hay comodines)."""
+    for host in settings.ALLOWED_HOSTS:
+        host = host.lstrip('.')
+        if host and host != '*':
+            return host
+    return 'localhost'
+
+
+class ClienteLocal(Client):
+    """``Client`` que envía todas las peticiones por HTTPS a un host permitido."""
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('HTTP_HOST', host_permitido())
+        super().__init__(*args, **kwargs)
+
+    def generic(self, method, path, *args, secure=True, **kwargs):
+        return super().generic(method, path, *args, secure=True, **kwargs)
@@ -0,0 +1,37 @@
+"""
+Actualiza las estadísticas diarias de los organizadores (ver estadisticas.py).
+
+Incremental: solo recalcula los días con cambios desde la corrida anterior.
+Pensado para cron, por ejemplo cada 15 minutos:
+
+    */15 * * * * cd /ruta/al/proyecto && python manage.py agregar_estadisticas
+
+Los borrados de actividades finalizadas y valoraciones se registran al
+ocurrir (``DiaPorAgregar``). Con ``--completo`` reconstruye todo (p. ej.
+semanal, para corregir cambios hechos fuera del ORM).
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from MatchDeportivoAPP.estadisticas import actualizar
+
+
+class Command(BaseCommand):
+    help = "Actualiza de forma incremental las estadísticas diarias de los organizadores."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--completo', action='store_true',
+            help='Reconstruye las estadísticas de todos los organizadores',
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        organizadores, filas = actualizar(completo=options['completo'])
+
+        if options['verbosity'] > 0:
+            self.stdout.write(self.style.SUCCESS(
+                f"{organizadores} organizador(es) recalculado(s), {filas} fila(s) escritas "
+                f"en {time.monotonic() - inicio:.1f} s"
+            ))
@@ -0,0 +1,103 @@
+"""
+Mide el costo de logging que paga el hilo del request, con y sin la cola.
+
+    python manage.py benchmark_logging --requests 2000 --registros-por-request 3
+
+Se arman dos loggers aislados que escriben en un directorio temporal con el
+mismo formato y rotación que ``settings.LOGGING``: uno con el
+``RotatingFileHandler`` directo (E/S en el hilo que registra) y otro con
+``ManejadorEnCola`` (solo encola). Cada "request" hace
+``--registros-por-request`` llamadas a ``logger.info`` y se mide cuánto
+tardan en el hilo que las hace; con la cola también se informa cuánto
+demora el listener en vaciarla.
+"""
+import logging
+import statistics
+import tempfile
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from MatchDeportivoAPP.logs_en_cola import ManejadorEnCola
+
+
+class Command(BaseCommand):
+    help = "Compara el costo por request de logging directo a archivo y a través de la cola."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000,
+                            help='Requests simulados por variante (default: 2000)')
+        parser.add_argument('--registros-por-request', type=int, default=3,
+                            help='Llamadas a logger.info por request (default: 3)')
+        parser.add_argument('--max-bytes', type=int, default=None,
+                            help='Tamaño de rotación; por defecto el de settings.LOGGING')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['registros_por_request'] < 1:
+            raise CommandError("--requests y --registros-por-request deben ser positivos")
+
+        archivo = settings.LOGGING['handlers']['file']
+        max_bytes = options['max_bytes'] or archivo.get('maxBytes', 0)
+        formato = settings.LOGGING['formatters'][archivo['formatter']]
+
+        with tempfile.TemporaryDirectory() as directorio:
+            def manejador_archivo(nombre):
+                manejador = RotatingFileHandler(
+                    Path(directorio) / f'{nombre}.log', maxBytes=max_bytes,
+                    backupCount=archivo.get('backupCount', 0), encoding='utf-8',
+                )
+                manejador.setFormatter(logging.Formatter(formato['format'], style=formato.get('style', '%')))
+                manejador.set_name(nombre)
+                return manejador
+
+            directo = manejador_archivo('directo')
+            directo_ms, _ = self._medir('directo', directo, options)
+
+            en_cola = ManejadorEnCola(['cola'])
+            en_cola.iniciar([manejador_archivo('cola')])
+            cola_ms, vaciado = self._medir('cola', en_cola, options)
+
+            directo.close()
+
+        self.stdout.write(
+            f"{options['requests']} requests x {options['registros_por_request']} registros "
+            f"(rotación cada {max_bytes} bytes)"
+        )
+        self.stdout.write(f"{'variante':<12}{'p50 µs':>10}{'p99 µs':>10}{'máx µs':>10}{'total ms':>11}")
+        for nombre, tiempos in (('directo', directo_ms), ('cola', cola_ms)):
+            ordenados = sorted(tiempos)
+            p99 = ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.99))]
+            self.stdout.write(
+                f"{nombre:<12}{1000 * statistics.median(ordenados):>10.1f}{1000 * p99:>10.1f}"
+                f"{1000 * ordenados[-1]:>10.1f}{sum(ordenados):>11.1f}"
+            )
+        self.stdout.write(f"Vaciado de la cola en segundo plano: {1000 * vaciado:.1f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"Por request: {statistics.mean(directo_ms) * 1000:.1f} µs directo -> "
+            f"{statistics.mean(cola_ms) * 1000:.1f} µs con cola"
+        ))
+
+    def _medir(self, nombre, manejador, options):
+        """Milisegundos por request en el hilo que registra, y segundos hasta cerrar el manejador."""
+        logger = logging.getLogger(f'MatchDeportivoAPP.benchmark_logging.{nombre}')
+        logger.handlers = [manejador]
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+        tiempos = []
+        for i in range(options['requests']):
+            inicio = time.perf_counter()
+            for j in range(options['registros_por_request']):
+                logger.info("Actividad %s actualizada por usuario %s (paso %s)", i, 'benchmark', j)
+            tiempos.append(1000 * (time.perf_counter() - inicio))
+
+        inicio = time.perf_counter()
+        if isinstance(manejador, ManejadorEnCola):
+            # Espera a que el listener escriba todo lo encolado
+            manejador.close()
+        vaciado = time.perf_counter() - inicio
+        logger.handlers = []
+        return tiempos, vaciado
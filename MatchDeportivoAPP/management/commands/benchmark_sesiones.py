@@ -0,0 +1,79 @@
+"""
+Compara las consultas por página autenticada entre dos motores de sesión.
+
+    python manage.py benchmark_sesiones --repeticiones 5
+
+Para cada página se cuentan las consultas totales y las que tocan
+``django_session`` con el motor de base de datos de Django y con el motor en
+caché (``MatchDeportivoAPP.sessions``), sea o no el configurado en
+``SESSION_ENGINE``. Las peticiones van por HTTPS a un host de
+``ALLOWED_HOSTS`` (``ClienteLocal``); una página que no responda 2xx o 302
+detiene el comando. Los datos de prueba se crean dentro de una transacción
+que se revierte al final.
+"""
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from MatchDeportivoAPP.management.cliente import ClienteLocal
+
+MOTOR_BASE = 'django.contrib.sessions.backends.db'
+MOTOR_CACHE = 'MatchDeportivoAPP.sessions'
+
+PAGINAS = ['home', 'actividades', 'mis_actividades', 'notificaciones', 'ver_perfil']
+
+
+class Command(BaseCommand):
+    help = "Mide las consultas por página autenticada con y sin el motor de sesiones en caché."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=5,
+                            help='Peticiones medidas por página (default: 5)')
+
+    def handle(self, *args, **options):
+        motores = [MOTOR_BASE, MOTOR_CACHE]
+        repeticiones = options['repeticiones']
+
+        with transaction.atomic():
+            sufijo = uuid.uuid4().hex[:8]
+            usuario = User.objects.create_user(
+                username=f"benchmark-{sufijo}", email=f"benchmark-{sufijo}@ejemplo.test", password='x',
+            )
+            usuario.perfil.nombre_completo = 'Usuario Benchmark'
+            usuario.perfil.save()
+
+            resultados = {motor: self._medir(usuario, motor, repeticiones) for motor in motores}
+            transaction.set_rollback(True)
+
+        antes, despues = (resultados[motor] for motor in motores)
+        self.stdout.write(f"{'página':<18}{'consultas':>22}{'django_session':>22}")
+        for pagina in PAGINAS:
+            (total_a, sesion_a), (total_d, sesion_d) = antes[pagina], despues[pagina]
+            self.stdout.write(
+                f"{pagina:<18}{total_a:>10.1f} -> {total_d:<9.1f}{sesion_a:>10.1f} -> {sesion_d:<9.1f}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Antes: {MOTOR_BASE}\nDespués: {MOTOR_CACHE}"))
+
+    def _medir(self, usuario, motor, repeticiones):
+        medidas = {}
+        with override_settings(SESSION_ENGINE=motor):
+            cliente = ClienteLocal()
+            cliente.force_login(usuario)
+            for pagina in PAGINAS:
+                url = reverse(pagina)
+                respuesta = cliente.get(url)  # calentar cachés
+                if not (200 <= respuesta.status_code < 300 or respuesta.status_code == 302):
+                    raise CommandError(f"'{pagina}' respondió {respuesta.status_code}; no se mide una página real")
+                total = sesion = 0
+                for _ in range(repeticiones):
+                    with CaptureQueriesContext(connection) as capturadas:
+                        cliente.get(url)
+                    total += len(capturadas)
+                    sesion += sum('django_session' in q['sql'] for q in capturadas)
+                medidas[pagina] = (total / repeticiones, sesion / repeticiones)
+        return medidas
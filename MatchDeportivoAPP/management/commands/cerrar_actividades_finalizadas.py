@@ -0,0 +1,97 @@
+"""
+Cierra automáticamente las actividades cuyo horario ya terminó.
+
+Pensado para ejecutarse cada minuto desde cron:
+
+    * * * * * cd /ruta/al/proyecto && python manage.py cerrar_actividades_finalizadas
+
+Cada lote se cierra con un único UPDATE. Es seguro ejecutar invocaciones
+solapadas: cada lote se elige con ``SELECT ... FOR UPDATE`` dentro de la misma
+transacción que lo cierra, así que una invocación concurrente espera y luego
+ya no ve esas filas como abiertas. Los recordatorios de valoración se envían
+una sola vez por actividad sin depender de la precisión de ``fecha_cierre``.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from MatchDeportivoAPP.calendario import invalidar_calendarios, usuarios_de_actividades
+from MatchDeportivoAPP.facetas import descontar
+from MatchDeportivoAPP.models import Actividad
+from MatchDeportivoAPP.resumen_notificaciones import Aviso, notificar_agrupado
+
+
+class Command(BaseCommand):
+    help = "Cierra las actividades finalizadas y recuerda a los participantes valorarse."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote', type=int, default=500,
+            help='Cantidad máxima de actividades cerradas por UPDATE (default: 500)',
+        )
+
+    def handle(self, *args, **options):
+        lote = options['lote']
+        ahora = timezone.now()
+        finalizadas = actividades_finalizadas(ahora)
+
+        total = 0
+        while True:
+            with transaction.atomic():
+                # Bloqueadas hasta el COMMIT: son de esta invocación
+                ids = list(
+                    finalizadas.select_for_update().order_by('pk').values_list('pk', flat=True)[:lote]
+                )
+                if not ids:
+                    break
+
+                descontar(Actividad.objects.filter(pk__in=ids))
+                Actividad.objects.filter(pk__in=ids).update(
+                    cerrada=True,
+                    fecha_cierre=ahora,
+                    actualizada_en=ahora,
+                )
+                cerradas = list(
+                    Actividad.objects.filter(pk__in=ids).values_list('pk', 'organizador_id', 'titulo')
+                )
+                encolar_recordatorios_valoracion(cerradas)
+                invalidar_calendarios(usuarios_de_actividades(ids))
+
+            total += len(ids)
+            if len(ids) < lote:
+                break
+
+        if options['verbosity'] > 0:
+            self.stdout.write(self.style.SUCCESS(f"{total} actividad(es) cerrada(s)"))
+
+
+def actividades_finalizadas(ahora):
+    """Actividades abiertas cuyo ``fin`` (indexado) ya pasó."""
+    return Actividad.objects.filter(cerrada=False, fin__lte=ahora)
+
+
+def encolar_recordatorios_valoracion(cerradas):
+    """Recordatorio para el organizador y cada participante (agrupado por usuario)."""
+    if not cerradas:
+        return
+
+    datos = {pk: (organizador_id, titulo) for pk, organizador_id, titulo in cerradas}
+    participaciones = Actividad.participantes.through.objects.filter(
+        actividad_id__in=datos
+    ).values_list('actividad_id', 'user_id')
+
+    destinatarios = {}
+    for actividad_id, user_id in participaciones:
+        destinatarios.setdefault(actividad_id, {datos[actividad_id][0]}).add(user_id)
+
+    avisos = [
+        Aviso(
+            usuario_id=user_id,
+            actividad_id=actividad_id,
+            titulo=datos[actividad_id][1],
+            mensaje=f"La actividad {datos[actividad_id][1]} terminó. ¡Valora a tus compañeros!",
+        )
+        for actividad_id, usuarios in destinatarios.items()
+        for user_id in usuarios
+    ]
+    notificar_agrupado('RECORDATORIO_VALORACION', avisos)
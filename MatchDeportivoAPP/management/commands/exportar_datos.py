@@ -0,0 +1,56 @@
+"""
+Exporta logs, actividades o valoraciones a CSV o NDJSON en streaming.
+
+    python manage.py exportar_datos logs --desde 2026-01-01 --hasta 2026-01-31 > logs.csv
+    python manage.py exportar_datos valoraciones --formato ndjson --salida valoraciones.ndjson
+
+Las filas se leen por lotes y se escriben a medida que llegan, así que la
+memoria no crece con el tamaño de la exportación.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from MatchDeportivoAPP.constants import EXPORTACION_LOTE
+from MatchDeportivoAPP.exportacion import EXPORTACIONES, FORMATOS, exportar
+
+
+def _fecha(valor):
+    try:
+        fecha = parse_date(valor)
+    except ValueError:
+        fecha = None
+    if fecha is None:
+        raise CommandError(f"Fecha inválida '{valor}': usa AAAA-MM-DD")
+    return fecha
+
+
+class Command(BaseCommand):
+    help = "Exporta datos en streaming a CSV o NDJSON, filtrados por rango de fechas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('recurso', choices=sorted(EXPORTACIONES))
+        parser.add_argument('--formato', choices=sorted(FORMATOS), default='csv')
+        parser.add_argument('--desde', type=_fecha, help='Fecha inicial AAAA-MM-DD (inclusive)')
+        parser.add_argument('--hasta', type=_fecha, help='Fecha final AAAA-MM-DD (inclusive)')
+        parser.add_argument('--salida', help='Archivo de destino (default: salida estándar)')
+        parser.add_argument(
+            '--lote', type=int, default=EXPORTACION_LOTE,
+            help=f'Filas leídas por consulta (default: {EXPORTACION_LOTE})',
+        )
+
+    def handle(self, *args, **options):
+        lineas = exportar(
+            options['recurso'], options['formato'], options['desde'], options['hasta'], options['lote'],
+        )
+
+        if not options['salida']:
+            for linea in lineas:
+                self.stdout.write(linea, ending='')
+            return
+
+        total = -1 if options['formato'] == 'csv' else 0  # sin contar el encabezado
+        with open(options['salida'], 'w', encoding='utf-8', newline='') as archivo:
+            for linea in lineas:
+                archivo.write(linea)
+                total += 1
+        self.stderr.write(self.style.SUCCESS(f"{total} fila(s) exportada(s) a {options['salida']}"))
@@ -0,0 +1,77 @@
+"""
+Completa las coordenadas de actividades y perfiles existentes.
+
+Resuelve ``Actividad.lugar`` y ``Perfil.ubicacion`` con el nomenclátor
+offline (ver geocoding.py) y guarda los resultados por lotes con
+``bulk_update``. Por defecto solo procesa filas sin coordenadas:
+
+    python manage.py geocodificar_ubicaciones --lote 500
+    python manage.py geocodificar_ubicaciones --todas   # recalcula actividades también
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from MatchDeportivoAPP.geocoding import geocodificar
+from MatchDeportivoAPP.models import Actividad, Perfil
+
+
+class Command(BaseCommand):
+    help = "Geocodifica por lotes las actividades y perfiles sin coordenadas."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote', type=int, default=500,
+            help='Filas procesadas por lote (default: 500)',
+        )
+        parser.add_argument(
+            '--todas', action='store_true',
+            help='Recalcula también las actividades que ya tienen coordenadas',
+        )
+
+    def handle(self, *args, **options):
+        actividades = Actividad.objects.all()
+        if not options['todas']:
+            actividades = actividades.filter(latitud__isnull=True)
+        # Los perfiles pueden tener coordenadas exactas elegidas en el mapa:
+        # solo se completan los que no tienen.
+        perfiles = Perfil.objects.filter(latitud__isnull=True).exclude(ubicacion__isnull=True).exclude(ubicacion='')
+
+        for etiqueta, modelo, queryset, campo in (
+            ('Actividades', Actividad, actividades, 'lugar'),
+            ('Perfiles', Perfil, perfiles, 'ubicacion'),
+        ):
+            resueltas, total = self._procesar(modelo, queryset, campo, options['lote'])
+            if options['verbosity'] > 0:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{etiqueta}: {resueltas}/{total} geocodificada(s)"
+                ))
+
+    def _procesar(self, modelo, queryset, campo, lote):
+        """Recorre ``queryset`` por pk (keyset) y guarda los cambios de cada lote con bulk_update."""
+        ultimo_pk = 0
+        resueltas = total = 0
+        while True:
+            filas = list(
+                queryset.filter(pk__gt=ultimo_pk).order_by('pk')
+                .only('pk', campo, 'latitud', 'longitud')[:lote]
+            )
+            if not filas:
+                break
+            ultimo_pk = filas[-1].pk
+            total += len(filas)
+
+            cambiadas = []
+            for fila in filas:
+                coordenadas = geocodificar(getattr(fila, campo))
+                if coordenadas[0] is not None:
+                    resueltas += 1
+                if (fila.latitud, fila.longitud) != coordenadas:
+                    fila.latitud, fila.longitud = coordenadas
+                    cambiadas.append(fila)
+
+            with transaction.atomic():
+                modelo.objects.bulk_update(cambiadas, ['latitud', 'longitud'], batch_size=lote)
+
+            if len(filas) < lote:
+                break
+        return resueltas, total
@@ -0,0 +1,33 @@
+"""
+Elimina las sesiones vencidas por lotes.
+
+Alternativa a ``clearsessions`` que no bloquea ``django_session`` con un único
+DELETE. Pensado para cron, por ejemplo una vez al día:
+
+    0 4 * * * cd /ruta/al/proyecto && python manage.py limpiar_sesiones
+"""
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Elimina las sesiones vencidas en lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote', type=int, default=1000,
+            help='Cantidad máxima de sesiones eliminadas por DELETE (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        engine = import_module(settings.SESSION_ENGINE)
+        try:
+            total = engine.SessionStore.clear_expired(lote=options['lote'])
+        except TypeError:
+            # Motor sin soporte de lotes
+            total = engine.SessionStore.clear_expired()
+
+        if options['verbosity'] > 0:
+            self.stdout.write(self.style.SUCCESS(f"{total or 0} sesión(es) eliminada(s)"))
@@ -0,0 +1,354 @@
+"""
+Genera carga concurrente de usuarios uniéndose y saliendo de las mismas actividades.
+
+Reproduce el "sábado en la mañana": muchos usuarios autenticados compitiendo
+por los cupos de unas pocas actividades. Cada usuario simulado corre en un
+hilo y ejecuta ``--iteraciones`` operaciones del escenario elegido:
+
+- ``rush``: todos intentan unirse a las actividades (y luego navegan la lista);
+- ``churn``: se unen y salen en bucle, liberando y ocupando cupos;
+- ``mixto``: 60 % lista de actividades, 25 % unirse, 15 % salir.
+
+Sin ``--url`` las peticiones van a la aplicación WSGI en este mismo proceso
+(``ClienteLocal``: un ``django.test.Client`` por HTTPS a un host de
+``ALLOWED_HOSTS``, una conexión a la base por hilo). Con ``--url`` van a
+un servidor local ya levantado que use la misma base de datos, p. ej.:
+
+    python manage.py runserver --nothreading   # o gunicorn/uwsgi
+    python manage.py loadtest --url http://127.0.0.1:8000 --usuarios 200 --escenario rush
+
+El servidor debe correr con DEBUG=True (sin redirección a HTTPS). Las
+sesiones se crean directamente en el almacén de sesiones, así que el login
+y su limitación de intentos no intervienen.
+
+Unirse y salir siempre redirigen (302), también cuando fallan: el error llega
+como mensaje flash. Por eso una operación cuenta como error si la respuesta
+es 4xx/5xx, si no hubo respuesta o si trae un mensaje de nivel ERROR en la
+cookie ``messages``.
+
+Al final se reportan el throughput, los percentiles de latencia y la tasa de
+errores por operación, y se verifica la integridad de los cupos de cada
+actividad (cupos restantes + inscritos = capacidad, sin cupos negativos ni
+inscritos que sigan en la lista de espera). Los usuarios y actividades de la
+prueba se eliminan al terminar salvo con ``--conservar``. El comando termina
+con error si hay violaciones o si fallaron todas las peticiones.
+"""
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import time as hora, timedelta
+from http.cookies import SimpleCookie
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http import HttpRequest
+from django.urls import reverse
+from django.utils import timezone
+
+from MatchDeportivoAPP.management.cliente import ClienteLocal
+from MatchDeportivoAPP.models import Actividad, ListaEspera
+
+ESCENARIOS = ('rush', 'churn', 'mixto')
+
+# Peso de cada operación en el escenario mixto
+PESOS_MIXTO = [('actividades', 60), ('unirse', 25), ('salir', 15)]
+
+# Las actividades de la prueba se programan en horarios que no se solapan,
+# para que el control de choques de horario no impida unirse a varias.
+HORA_PRIMERA_ACTIVIDAD = 7
+HORAS_ENTRE_ACTIVIDADES = 2
+
+
+class _SinRedireccion(urllib.request.HTTPRedirectHandler):
+    """Las vistas de unirse/salir responden 302: se mide la acción, no la página siguiente."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Command(BaseCommand):
+    help = "Simula usuarios concurrentes uniéndose y saliendo de actividades y reporta latencias e integridad."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escenario', choices=ESCENARIOS, default='rush',
+                            help='Escenario de carga (default: rush)')
+        parser.add_argument('--usuarios', type=int, default=50,
+                            help='Usuarios simulados (default: 50)')
+        parser.add_argument('--hilos', type=int, default=None,
+                            help='Tamaño del pool de hilos (default: uno por usuario, máx. 64)')
+        parser.add_argument('--actividades', type=int, default=3,
+                            help='Actividades disputadas (default: 3)')
+        parser.add_argument('--cupos', type=int, default=10,
+                            help='Cupos de cada actividad (default: 10)')
+        parser.add_argument('--iteraciones', type=int, default=20,
+                            help='Operaciones por usuario (default: 20)')
+        parser.add_argument('--url', default=None,
+                            help='URL base de un servidor en ejecución (default: WSGI en proceso)')
+        parser.add_argument('--timeout', type=float, default=30,
+                            help='Timeout por petición HTTP en segundos (default: 30)')
+        parser.add_argument('--semilla', type=int, default=None,
+                            help='Semilla aleatoria para repetir una corrida')
+        parser.add_argument('--conservar', action='store_true',
+                            help='No eliminar los usuarios y actividades de la prueba')
+
+    def handle(self, *args, **options):
+        if options['usuarios'] < 1 or options['actividades'] < 1 or options['cupos'] < 1:
+            raise CommandError("--usuarios, --actividades y --cupos deben ser mayores que cero.")
+        if options['actividades'] * HORAS_ENTRE_ACTIVIDADES > 24 - HORA_PRIMERA_ACTIVIDAD:
+            raise CommandError("Demasiadas actividades para programarlas sin solaparse en un día.")
+
+        prefijo = f"carga-{uuid.uuid4().hex[:8]}"
+        usuarios, actividades = self._preparar(prefijo, options)
+        try:
+            resultados, duracion = self._ejecutar(usuarios, actividades, options)
+            tasa_errores = self._reportar(resultados, duracion, options)
+            violaciones = self._verificar_cupos(actividades, options['cupos'])
+        finally:
+            if not options['conservar']:
+                Actividad.objects.filter(pk__in=actividades).delete()
+                User.objects.filter(username__startswith=prefijo).delete()
+            elif options['verbosity'] > 0:
+                self.stdout.write(f"Datos conservados: usuarios '{prefijo}-*', actividades {actividades}")
+
+        if violaciones:
+            raise CommandError(f"{len(violaciones)} violación(es) de integridad de cupos")
+        if tasa_errores == 1:
+            # Ninguna petición llegó a la vista: las latencias no miden nada
+            raise CommandError("Todas las peticiones fallaron; revisa el destino y los errores más frecuentes.")
+
+    # ------------------------------------------------------------------
+    # Preparación
+    # ------------------------------------------------------------------
+
+    def _preparar(self, prefijo, options):
+        """Crea las actividades y los usuarios simulados. Retorna ``(cookies de sesión, pks)``."""
+        organizador = User.objects.create_user(
+            username=f"{prefijo}-organizador", email=f"{prefijo}-organizador@ejemplo.test",
+        )
+        fecha = timezone.localdate() + timedelta(days=7)
+        actividades = []
+        for i in range(options['actividades']):
+            actividad = Actividad.objects.create(
+                organizador=organizador,
+                titulo=f"Carga {prefijo} #{i + 1}",
+                deporte='futbol',
+                lugar='Estadio Nacional',
+                nivel='Intermedio',
+                fecha=fecha,
+                hora_inicio=hora(HORA_PRIMERA_ACTIVIDAD + i * HORAS_ENTRE_ACTIVIDADES),
+                hora_fin=hora(HORA_PRIMERA_ACTIVIDAD + i * HORAS_ENTRE_ACTIVIDADES + 1),
+                cupos=options['cupos'],
+            )
+            actividades.append(actividad.pk)
+
+        usuarios = []
+        for i in range(options['usuarios']):
+            usuario = User.objects.create_user(
+                username=f"{prefijo}-{i}", email=f"{prefijo}-{i}@ejemplo.test",
+            )
+            # Sesión creada directamente en el almacén (sin pasar por el login)
+            cliente = ClienteLocal()
+            cliente.force_login(usuario)
+            usuarios.append(cliente.cookies[settings.SESSION_COOKIE_NAME].value)
+        return usuarios, actividades
+
+    # ------------------------------------------------------------------
+    # Ejecución
+    # ------------------------------------------------------------------
+
+    def _ejecutar(self, sesiones, actividades, options):
+        hilos = options['hilos'] or min(len(sesiones), 64)
+        aleatorio = random.Random(options['semilla'])
+        semillas = [aleatorio.random() for _ in sesiones]
+        resultados = defaultdict(list)  # operación -> [(segundos, error o None)]
+        candado = threading.Lock()
+        largada = threading.Barrier(min(hilos, len(sesiones)))
+
+        def usuario_simulado(sesion, semilla):
+            enviar = self._emisor(sesion, options)
+            aleatorio = random.Random(semilla)
+            propios = []
+            try:
+                largada.wait(timeout=60)
+            except threading.BrokenBarrierError:
+                pass
+            try:
+                for operacion, pk in self._operaciones(options, aleatorio, actividades):
+                    url = self._url(operacion, pk)
+                    inicio = time.perf_counter()
+                    error = enviar(url)
+                    propios.append((operacion, time.perf_counter() - inicio, error))
+            finally:
+                # Cada hilo abre su propia conexión a la base (modo en proceso)
+                connection.close()
+            with candado:
+                for operacion, segundos, error in propios:
+                    resultados[operacion].append((segundos, error))
+
+        if options['verbosity'] > 0:
+            self.stdout.write(
+                f"Escenario '{options['escenario']}': {len(sesiones)} usuarios, {hilos} hilos, "
+                f"{len(actividades)} actividades x {options['cupos']} cupos, "
+                f"{options['iteraciones']} operaciones por usuario, "
+                f"destino {options['url'] or 'WSGI en proceso'}"
+            )
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            for futuro in [pool.submit(usuario_simulado, s, semilla) for s, semilla in zip(sesiones, semillas)]:
+                futuro.result()
+        return resultados, time.perf_counter() - inicio
+
+    def _operaciones(self, options, aleatorio, actividades):
+        """Secuencia de ``(operación, pk)`` de un usuario según el escenario."""
+        escenario, iteraciones = options['escenario'], options['iteraciones']
+        if escenario == 'rush':
+            # Primero todos se abalanzan sobre los cupos, luego navegan
+            objetivos = aleatorio.sample(actividades, len(actividades))
+            for i in range(iteraciones):
+                if i < len(objetivos):
+                    yield 'unirse', objetivos[i]
+                else:
+                    yield 'actividades', None
+        elif escenario == 'churn':
+            for i in range(iteraciones):
+                yield ('unirse' if i % 2 == 0 else 'salir'), aleatorio.choice(actividades)
+        else:
+            operaciones, pesos = zip(*PESOS_MIXTO)
+            for operacion in aleatorio.choices(operaciones, weights=pesos, k=iteraciones):
+                yield operacion, aleatorio.choice(actividades) if operacion != 'actividades' else None
+
+    def _url(self, operacion, pk):
+        if operacion == 'actividades':
+            return reverse('actividades')
+        return reverse(f'{operacion}_actividad', args=[pk])
+
+    def _emisor(self, sesion, options):
+        """Función ``enviar(url)`` de un usuario: retorna None si tuvo éxito o la descripción del error."""
+        if options['url'] is None:
+            cliente = ClienteLocal(raise_request_exception=False)
+            cliente.cookies[settings.SESSION_COOKIE_NAME] = sesion
+
+            def enviar(url):
+                try:
+                    respuesta = cliente.get(url)
+                except Exception as e:
+                    return f"{type(e).__name__}: {e}"
+                # Los mensajes no leídos se reenviarían en la siguiente petición
+                mensajes = cliente.cookies.pop(CookieStorage.cookie_name, None)
+                if respuesta.status_code >= 400:
+                    return f"HTTP {respuesta.status_code}"
+                return _error_en_mensajes(mensajes.value if mensajes else None)
+            return enviar
+
+        base = options['url'].rstrip('/')
+        abridor = urllib.request.build_opener(_SinRedireccion)
+        cookie = f"{settings.SESSION_COOKIE_NAME}={sesion}"
+
+        def enviar(url):
+            peticion = urllib.request.Request(base + url, headers={'Cookie': cookie})
+            try:
+                with abridor.open(peticion, timeout=options['timeout']) as respuesta:
+                    respuesta.read()
+                    cabeceras = respuesta.headers
+            except urllib.error.HTTPError as error:
+                if error.code >= 400:
+                    return f"HTTP {error.code}"
+                cabeceras = error.headers  # 302 sin seguir
+            except (urllib.error.URLError, OSError) as e:
+                return f"{type(e).__name__}: {e}"
+
+            galletas = SimpleCookie()
+            for linea in cabeceras.get_all('Set-Cookie') or []:
+                galletas.load(linea)
+            mensajes = galletas.get(CookieStorage.cookie_name)
+            return _error_en_mensajes(mensajes.value if mensajes else None)
+        return enviar
+
+    # ------------------------------------------------------------------
+    # Reporte
+    # ------------------------------------------------------------------
+
+    def _reportar(self, resultados, duracion, options):
+        """Escribe la tabla de latencias y errores. Retorna la tasa de errores (0 a 1)."""
+        todas = [medida for medidas in resultados.values() for medida in medidas]
+        self.stdout.write(
+            f"\n{'operación':<14}{'peticiones':>11}{'errores':>9}{'p50 ms':>9}"
+            f"{'p90 ms':>9}{'p99 ms':>9}{'máx ms':>9}"
+        )
+        for operacion in sorted(resultados) + ['total']:
+            medidas = todas if operacion == 'total' else resultados[operacion]
+            if not medidas:
+                continue
+            tiempos = sorted(segundos for segundos, _ in medidas)
+            errores = sum(1 for _, error in medidas if error)
+            self.stdout.write(
+                f"{operacion:<14}{len(medidas):>11}{errores:>9}"
+                f"{1000 * _percentil(tiempos, 50):>9.1f}{1000 * _percentil(tiempos, 90):>9.1f}"
+                f"{1000 * _percentil(tiempos, 99):>9.1f}{1000 * tiempos[-1]:>9.1f}"
+            )
+
+        frecuentes = Counter(error for _, error in todas if error)
+        self.stdout.write(
+            f"\n{len(todas)} peticiones en {duracion:.2f}s: {len(todas) / duracion:.1f} req/s, "
+            f"tasa de errores {100 * sum(frecuentes.values()) / max(len(todas), 1):.2f}%"
+        )
+        for error, cantidad in frecuentes.most_common(5):
+            self.stdout.write(self.style.WARNING(f"  {cantidad:>6} x {error}"))
+        self.stdout.write('')
+        return sum(frecuentes.values()) / max(len(todas), 1)
+
+    def _verificar_cupos(self, actividades, capacidad):
+        """Revisa que ningún cupo se haya perdido ni sobrevendido. Retorna las violaciones."""
+        violaciones = []
+        participacion = Actividad.participantes.through.objects
+        for actividad in Actividad.objects.filter(pk__in=actividades).order_by('pk'):
+            inscritos = participacion.filter(actividad_id=actividad.pk).count()
+            en_espera = ListaEspera.objects.filter(actividad_id=actividad.pk)
+            duplicados = en_espera.filter(
+                usuario_id__in=participacion.filter(actividad_id=actividad.pk).values('user_id')
+            ).count()
+
+            problemas = []
+            if actividad.cupos < 0:
+                problemas.append(f"cupos negativos ({actividad.cupos})")
+            if actividad.cupos + inscritos != capacidad:
+                problemas.append(f"cupos {actividad.cupos} + inscritos {inscritos} != capacidad {capacidad}")
+            if duplicados:
+                problemas.append(f"{duplicados} inscrito(s) siguen en la lista de espera")
+
+            linea = (
+                f"Actividad {actividad.pk}: {inscritos}/{capacidad} inscritos, "
+                f"{actividad.cupos} cupos libres, {en_espera.count()} en espera"
+            )
+            if problemas:
+                violaciones.append((actividad.pk, problemas))
+                self.stdout.write(self.style.ERROR(f"{linea} -> {'; '.join(problemas)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{linea} -> OK"))
+        return violaciones
+
+
+def _error_en_mensajes(valor_cookie):
+    """Texto del primer mensaje flash de nivel ERROR en la cookie ``messages``, o None."""
+    if not valor_cookie:
+        return None
+    for mensaje in CookieStorage(HttpRequest())._decode(valor_cookie) or []:
+        if mensaje.level >= messages.ERROR:
+            return f"mensaje: {mensaje.message}"
+    return None
+
+
+def _percentil(ordenados, p):
+    """Percentil ``p`` (0-100) por rango más cercano de una lista ya ordenada."""
+    return ordenados[max(math.ceil(p / 100 * len(ordenados)), 1) - 1]
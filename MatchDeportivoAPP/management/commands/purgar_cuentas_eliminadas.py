@@ -0,0 +1,48 @@
+"""
+Purga las cuentas eliminadas: pendientes, fallidas o abandonadas.
+
+La solicitud solo desactiva la cuenta; este comando borra sus datos fuera de
+los workers web y retoma las purgas interrumpidas:
+
+    */5 * * * * cd /ruta/al/proyecto && python manage.py purgar_cuentas_eliminadas
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from MatchDeportivoAPP.eliminacion import LOTE_DEFAULT, TIEMPO_ABANDONO, purgar_cuenta
+from MatchDeportivoAPP.models import EliminacionCuenta
+
+
+class Command(BaseCommand):
+    help = "Completa las eliminaciones de cuentas pendientes, mostrando el progreso."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote', type=int, default=LOTE_DEFAULT,
+            help=f'Filas borradas por transacción (default: {LOTE_DEFAULT})',
+        )
+
+    def handle(self, *args, **options):
+        abandonadas = Q(estado=EliminacionCuenta.EN_PROCESO, actualizada_en__lt=timezone.now() - TIEMPO_ABANDONO)
+        pendientes = EliminacionCuenta.objects.filter(
+            Q(estado__in=[EliminacionCuenta.PENDIENTE, EliminacionCuenta.ERROR]) | abandonadas
+        ).order_by('solicitada_en')
+
+        for eliminacion in pendientes:
+            if options['verbosity'] > 0:
+                self.stdout.write(
+                    f"Usuario {eliminacion.usuario_id}: {eliminacion.get_estado_display()}, "
+                    f"etapa '{eliminacion.etapa or '-'}', {eliminacion.filas_eliminadas} filas eliminadas"
+                )
+            try:
+                completada = purgar_cuenta(eliminacion, lote=options['lote'])
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f"Usuario {eliminacion.usuario_id}: {e}"))
+                continue
+
+            if completada and options['verbosity'] > 0:
+                eliminacion.refresh_from_db()
+                self.stdout.write(self.style.SUCCESS(
+                    f"Usuario {eliminacion.usuario_id}: completada ({eliminacion.filas_eliminadas} filas)"
+                ))
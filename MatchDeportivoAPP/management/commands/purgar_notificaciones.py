@@ -0,0 +1,60 @@
+"""
+Elimina por lotes las notificaciones leídas más antiguas que la retención.
+
+Cada lote es un DELETE por clave primaria de a lo más ``--lote`` filas, para
+no bloquear la tabla con un único DELETE masivo. Pensado para cron:
+
+    30 4 * * * cd /ruta/al/proyecto && python manage.py purgar_notificaciones
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from MatchDeportivoAPP.constants import NOTIFICACIONES_RETENCION_DIAS
+from MatchDeportivoAPP.models import Notificacion
+
+
+class Command(BaseCommand):
+    help = "Elimina en lotes las notificaciones leídas más antiguas que la retención."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias', type=int, default=NOTIFICACIONES_RETENCION_DIAS,
+            help=f'Días que se conservan las notificaciones leídas (default: {NOTIFICACIONES_RETENCION_DIAS})',
+        )
+        parser.add_argument(
+            '--lote', type=int, default=1000,
+            help='Cantidad máxima de notificaciones eliminadas por DELETE (default: 1000)',
+        )
+        parser.add_argument(
+            '--simular', action='store_true',
+            help='Solo cuenta las notificaciones que se eliminarían',
+        )
+
+    def handle(self, *args, **options):
+        if options['dias'] < 0 or options['lote'] < 1:
+            raise CommandError("--dias no puede ser negativo y --lote debe ser positivo")
+
+        limite = timezone.now() - timedelta(days=options['dias'])
+        # fecha_creacion (indexada) <= actualizada_en: acota el recorrido por el índice
+        vencidas = Notificacion.objects.filter(
+            leida=True, fecha_creacion__lt=limite, actualizada_en__lt=limite,
+        ).order_by()
+
+        if options['simular']:
+            self.stdout.write(f"{vencidas.count()} notificación(es) leída(s) anteriores a {limite:%Y-%m-%d}")
+            return
+
+        total = 0
+        while True:
+            ids = list(vencidas.values_list('pk', flat=True)[:options['lote']])
+            if not ids:
+                break
+            eliminadas, _ = Notificacion.objects.filter(pk__in=ids).delete()
+            total += eliminadas
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  {total} eliminadas...")
+
+        if options['verbosity'] > 0:
+            self.stdout.write(self.style.SUCCESS(f"{total} notificación(es) eliminada(s)"))
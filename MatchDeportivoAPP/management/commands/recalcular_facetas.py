@@ -0,0 +1,52 @@
+"""
+Reconstruye los conteos de actividades abiertas por deporte y nivel.
+
+Los contadores de ``ConteoFaceta`` se ajustan de forma incremental (ver
+facetas.py); este comando los recalcula desde cero por si algún cambio hecho
+fuera de la aplicación (SQL manual, restauraciones) los desincronizó:
+
+    python manage.py recalcular_facetas
+    python manage.py recalcular_facetas --verificar   # solo informa diferencias
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from MatchDeportivoAPP.facetas import conteos, recalcular
+from MatchDeportivoAPP.models import Actividad, ConteoFaceta
+
+
+class Command(BaseCommand):
+    help = "Recalcula los conteos de actividades abiertas por deporte y nivel."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar', action='store_true',
+            help='Compara los contadores con un conteo real sin modificarlos',
+        )
+
+    def handle(self, *args, **options):
+        if options['verificar']:
+            diferencias = self._diferencias()
+            for faceta, valor, guardado, real in diferencias:
+                self.stdout.write(self.style.WARNING(f"{faceta}={valor}: contador {guardado}, real {real}"))
+            if not diferencias:
+                self.stdout.write(self.style.SUCCESS("Los contadores están al día"))
+            return
+
+        filas = recalcular()
+        if options['verbosity'] > 0:
+            for fila in filas:
+                self.stdout.write(f"{fila.faceta}={fila.valor}: {fila.abiertas}")
+            self.stdout.write(self.style.SUCCESS(f"{len(filas)} contador(es) recalculado(s)"))
+
+    def _diferencias(self):
+        guardados = conteos()
+        abiertas = Actividad.objects.filter(cerrada=False).order_by()
+        diferencias = []
+        for faceta in (ConteoFaceta.DEPORTE, ConteoFaceta.NIVEL):
+            reales = dict(abiertas.values(faceta).annotate(cantidad=Count('pk')).values_list(faceta, 'cantidad'))
+            for valor in sorted(set(reales) | set(guardados.get(faceta, {}))):
+                guardado = guardados.get(faceta, {}).get(valor, 0)
+                if guardado != reales.get(valor, 0):
+                    diferencias.append((faceta, valor, guardado, reales.get(valor, 0)))
+        return diferencias
@@ -0,0 +1,112 @@
+"""
+Simula un ataque de credential stuffing contra el login y mide la CPU.
+
+Ejecuta la misma ráfaga de POST con contraseñas incorrectas dos veces, con la
+limitación desactivada y activada, y reporta el tiempo de CPU del proceso
+(lo que consumiría un worker) y cuántas contraseñas se verificaron realmente
+(llamadas a ``verify`` del hasher por defecto, medidas envolviéndolo):
+
+    python manage.py simular_ataque_login --intentos 60 --ips 3
+
+El usuario atacado se crea dentro de una transacción que se revierte al final.
+Cualquier respuesta distinta de 2xx, 302 o (con limitación) 429 detiene el
+comando: significaría que los intentos no llegan a la vista de login.
+"""
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import get_hasher
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from django.urls import reverse
+
+from MatchDeportivoAPP import throttling
+from MatchDeportivoAPP.management.cliente import ClienteLocal
+
+
+@contextmanager
+def contar_verificaciones():
+    """Cuenta las verificaciones de contraseña del hasher por defecto mientras dure el bloque."""
+    hasher = type(get_hasher())
+    original = hasher.verify
+    contador = [0]
+
+    def verify(self, password, encoded):
+        contador[0] += 1
+        return original(self, password, encoded)
+
+    hasher.verify = verify
+    try:
+        yield contador
+    finally:
+        hasher.verify = original
+
+
+class Command(BaseCommand):
+    help = "Mide la CPU consumida por una ráfaga de logins fallidos con y sin limitación."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--intentos', type=int, default=60,
+                            help='Cantidad de POST de login por escenario (default: 60)')
+        parser.add_argument('--ips', type=int, default=3,
+                            help='Cantidad de IPs atacantes distintas (default: 3)')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            sufijo = uuid.uuid4().hex[:8]
+            email = f"victima-{sufijo}@ejemplo.test"
+            User.objects.create_user(username=f"victima-{sufijo}", email=email, password='correcta-123')
+
+            for habilitado in (False, True):
+                resultado = self._atacar(email, options['intentos'], options['ips'], habilitado)
+                etiqueta = 'con limitación' if habilitado else 'sin limitación'
+                self.stdout.write(
+                    f"{etiqueta:>15}: {resultado['intentos']} intentos, "
+                    f"{resultado['rechazados']} rechazados (429), "
+                    f"{resultado['hashes']} contraseñas verificadas, "
+                    f"CPU {resultado['cpu']:.2f}s ({1000 * resultado['cpu'] / resultado['intentos']:.1f} ms/intento), "
+                    f"tiempo real {resultado['real']:.2f}s"
+                )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Hashes evitados acumulados en la caché: {throttling.hashes_evitados()}"
+        ))
+
+    def _atacar(self, email, intentos, ips, habilitado):
+        cliente = ClienteLocal()
+        url = reverse('inicioSesion')
+        # IPs de documentación (RFC 5737), distintas en cada corrida
+        base = uuid.uuid4().int % 250
+        direcciones = [f"198.51.100.{(base + i) % 250 + 1}" for i in range(ips)]
+
+        rechazados = 0
+        with override_settings(LOGIN_THROTTLE_HABILITADO=habilitado), contar_verificaciones() as hashes:
+            cpu_inicio, real_inicio = time.process_time(), time.perf_counter()
+            for i in range(intentos):
+                respuesta = cliente.post(
+                    url,
+                    {'email': email, 'password': f"incorrecta-{i}"},
+                    REMOTE_ADDR=direcciones[i % ips],
+                )
+                if respuesta.status_code == 429 and habilitado:
+                    rechazados += 1
+                elif not (200 <= respuesta.status_code < 300 or respuesta.status_code == 302):
+                    raise CommandError(
+                        f"El intento {i + 1} respondió {respuesta.status_code}; "
+                        "la simulación no está llegando a la vista de login"
+                    )
+            cpu = time.process_time() - cpu_inicio
+            real = time.perf_counter() - real_inicio
+
+        return {
+            'intentos': intentos,
+            'rechazados': rechazados,
+            'hashes': hashes[0],
+            'cpu': cpu,
+            'real': real,
+        }
@@ -0,0 +1,55 @@
+"""
+Copia la base principal SQLite sobre la réplica SQLite (solo desarrollo).
+
+Simula la replicación para probar en local el router de réplicas (ver
+replicas.py). Entre una ejecución y otra la réplica queda atrasada, igual que
+una réplica real con retraso:
+
+    python manage.py sincronizar_replica
+    python manage.py sincronizar_replica --cada 5   # cada 5 segundos hasta Ctrl+C
+"""
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from MatchDeportivoAPP.replicas import alias_replica
+
+SQLITE = 'django.db.backends.sqlite3'
+
+
+class Command(BaseCommand):
+    help = "Copia la base SQLite principal sobre la réplica SQLite (desarrollo)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cada', type=float, default=None,
+            help='Repite la copia cada N segundos hasta interrumpir',
+        )
+
+    def handle(self, *args, **options):
+        alias = alias_replica()
+        if alias is None:
+            raise CommandError("No hay réplica configurada (defina DB_REPLICA_NAME).")
+        origen = settings.DATABASES[DEFAULT_DB_ALIAS]
+        destino = settings.DATABASES[alias]
+        if origen['ENGINE'] != SQLITE or destino['ENGINE'] != SQLITE:
+            raise CommandError("Solo se puede sincronizar entre bases SQLite; en producción replica el motor.")
+
+        while True:
+            self._copiar(str(origen['NAME']), str(destino['NAME']))
+            if options['verbosity'] > 0:
+                self.stdout.write(self.style.SUCCESS(f"Réplica actualizada: {origen['NAME']} -> {destino['NAME']}"))
+            if not options['cada']:
+                break
+            try:
+                time.sleep(options['cada'])
+            except KeyboardInterrupt:
+                break
+
+    def _copiar(self, origen, destino):
+        # La API de backup copia de forma consistente aunque haya escrituras en curso
+        with sqlite3.connect(origen) as fuente, sqlite3.connect(destino) as copia:
+            fuente.backup(copia)
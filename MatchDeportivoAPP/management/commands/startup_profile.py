@@ -0,0 +1,150 @@
+"""
+Mide el arranque en frío de un worker: importaciones y tiempo a la primera respuesta.
+
+    python manage.py startup_profile --repeticiones 3 --ruta /actividades/
+
+Cada repetición es un proceso nuevo de Python con ``-X importtime`` que hace
+lo mismo que un worker WSGI recién reciclado: ``django.setup()``, cargar la
+aplicación WSGI y atender dos requests anónimos a ``--ruta`` (el primero en
+frío y el segundo con todo ya importado).
+
+Se reportan las medianas de cada fase, los módulos de vistas que quedaron
+cargados y las importaciones más costosas de la última repetición, por
+módulo y por paquete de primer nivel.
+"""
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Código del proceso hijo: imprime los tiempos de cada fase como JSON
+SCRIPT_HIJO = r"""
+import json, sys, time
+inicio = time.perf_counter()
+
+import django
+django.setup(set_prefix=False)
+setup = time.perf_counter()
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+wsgi = time.perf_counter()
+
+def pedir(ruta):
+    estado = []
+    host = next((h for h in settings.ALLOWED_HOSTS if h and '*' not in h and not h.startswith('.')), 'localhost')
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': ruta, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+        'SERVER_NAME': host, 'SERVER_PORT': '443', 'HTTP_HOST': host, 'REMOTE_ADDR': '127.0.0.1',
+        'SERVER_PROTOCOL': 'HTTP/1.1', 'wsgi.url_scheme': 'https', 'wsgi.input': sys.stdin.buffer,
+        'wsgi.errors': sys.stderr, 'wsgi.multithread': False, 'wsgi.multiprocess': True,
+        'wsgi.run_once': False, 'wsgi.version': (1, 0),
+    }
+    respuesta = application(environ, lambda status, headers, exc_info=None: estado.append(status))
+    try:
+        b''.join(respuesta)
+    finally:
+        getattr(respuesta, 'close', lambda: None)()
+    return estado[0]
+
+estado = pedir(sys.argv[1])
+primera = time.perf_counter()
+pedir(sys.argv[1])
+segunda = time.perf_counter()
+
+print(json.dumps({
+    'setup': setup - inicio,
+    'wsgi': wsgi - setup,
+    'primera': primera - wsgi,
+    'segunda': segunda - primera,
+    'total': primera - inicio,
+    'estado': estado,
+    'modulos': len(sys.modules),
+    'vistas': sorted(m for m in sys.modules if m.startswith('MatchDeportivoAPP.views.')),
+}))
+"""
+
+LINEA_IMPORTTIME = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+FASES = [
+    ('setup', 'django.setup()'),
+    ('wsgi', 'get_wsgi_application()'),
+    ('primera', 'primer request'),
+    ('total', 'total a la primera respuesta'),
+    ('segunda', 'segundo request (en caliente)'),
+]
+
+
+class Command(BaseCommand):
+    help = "Mide el costo de importación y el tiempo a la primera respuesta de un worker nuevo."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=3,
+                            help='Procesos nuevos medidos (default: 3)')
+        parser.add_argument('--ruta', default='/',
+                            help='Ruta del request de prueba (default: /)')
+        parser.add_argument('--top', type=int, default=20,
+                            help='Importaciones más costosas a listar (default: 20)')
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError("--repeticiones debe ser al menos 1")
+
+        entorno = dict(os.environ)
+        entorno['PYTHONPATH'] = os.pathsep.join(
+            filter(None, [str(settings.BASE_DIR), entorno.get('PYTHONPATH')])
+        )
+
+        medidas = []
+        for _ in range(options['repeticiones']):
+            proceso = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', SCRIPT_HIJO, options['ruta']],
+                capture_output=True, text=True, env=entorno, cwd=settings.BASE_DIR,
+            )
+            if proceso.returncode != 0:
+                raise CommandError(f"El proceso de prueba falló:\n{proceso.stderr[-3000:]}")
+            medidas.append(json.loads(proceso.stdout.strip().splitlines()[-1]))
+        importaciones = self._leer_importtime(proceso.stderr)
+
+        ultima = medidas[-1]
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Arranque ({len(medidas)} procesos, GET {options['ruta']} -> {ultima['estado']})"
+        ))
+        for clave, nombre in FASES:
+            mediana = statistics.median(medida[clave] for medida in medidas)
+            self.stdout.write(f"  {nombre:<32}{1000 * mediana:>9.1f} ms")
+        self.stdout.write(f"  {'módulos cargados':<32}{ultima['modulos']:>9}")
+        self.stdout.write(f"  vistas cargadas: {', '.join(ultima['vistas']) or '(ninguna)'}")
+
+        top = options['top']
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\nImportaciones más costosas (acumulado, top {top})"))
+        for modulo, propio, acumulado in sorted(importaciones, key=lambda i: i[2], reverse=True)[:top]:
+            self.stdout.write(f"  {acumulado / 1000:>9.1f} ms  {propio / 1000:>8.1f} ms propio  {modulo}")
+
+        por_paquete = defaultdict(int)
+        for modulo, propio, _ in importaciones:
+            por_paquete[modulo.split('.')[0]] += propio
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\nTiempo propio por paquete (top {top})"))
+        for paquete, propio in sorted(por_paquete.items(), key=lambda p: p[1], reverse=True)[:top]:
+            self.stdout.write(f"  {propio / 1000:>9.1f} ms  {paquete}")
+        total = sum(propio for _, propio, _ in importaciones)
+        self.stdout.write(self.style.SUCCESS(
+            f"\n{len(importaciones)} módulos importados en {total / 1000:.1f} ms (suma de tiempos propios)"
+        ))
+
+    def _leer_importtime(self, salida):
+        """``[(modulo, propio_us, acumulado_us)]`` de la salida de ``-X importtime``."""
+        importaciones = []
+        for linea in salida.splitlines():
+            coincidencia = LINEA_IMPORTTIME.match(linea)
+            if coincidencia:
+                propio, acumulado, _, modulo = coincidencia.groups()
+                importaciones.append((modulo, int(propio), int(acumulado)))
+        return importaciones
@@ -0,0 +1,20 @@
+# Generated by Django 5.1 on 2026-10-19 10:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MatchDeportivoAPP', '0006_actividad_latitud_actividad_longitud'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='actividad',
+            name='actualizada_en',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now, help_text='Última modificación (usada para ETags y respuestas condicionales)'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-19 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MatchDeportivoAPP', '0008_perfil_actualizada_en'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notificacion',
+            name='tipo',
+            field=models.CharField(choices=[('NUEVA_ACTIVIDAD', 'Nueva Actividad Cercana'), ('CONFIRMACION_UNION', 'Confirmación de Unión'), ('NUEVA_CALIFICACION', 'Nueva Calificación'), ('RECORDATORIO_VALORACION', 'Recordatorio de Valoración')], max_length=50),
+        ),
+    ]
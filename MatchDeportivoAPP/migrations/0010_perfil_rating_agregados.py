@@ -0,0 +1,38 @@
+# Generated by Django 5.1 on 2026-10-19 12:15
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def calcular_ratings(apps, schema_editor):
+    """Llena los agregados de rating a partir de las valoraciones existentes."""
+    Perfil = apps.get_model('MatchDeportivoAPP', 'Perfil')
+    Valoracion = apps.get_model('MatchDeportivoAPP', 'Valoracion')
+
+    recibidas = Valoracion.objects.filter(evaluado_id=OuterRef('usuario_id')).values('evaluado_id')
+    Perfil.objects.update(
+        rating_suma=Coalesce(Subquery(recibidas.annotate(total=Sum('puntuacion')).values('total')), 0),
+        rating_cantidad=Coalesce(Subquery(recibidas.annotate(total=Count('pk')).values('total')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MatchDeportivoAPP', '0009_alter_notificacion_tipo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='perfil',
+            name='rating_cantidad',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='perfil',
+            name='rating_suma',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(calcular_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.1 on 2026-10-19 12:48
+
+from django.db import migrations
+from django.db.models.functions import Lower, Trim
+
+INDICE_BUSQUEDA = 'auth_user_email_busqueda'
+INDICE_UNICO = 'auth_user_email_unico_ci'
+# Columna generada que respalda la unicidad en MariaDB y MySQL < 8.0.13
+COLUMNA_UNICA = 'email_unico_ci'
+
+
+def normalizar_emails(apps, schema_editor):
+    """Guarda todos los emails en minúsculas y sin espacios."""
+    User = apps.get_model('auth', 'User')
+    User.objects.update(email=Lower(Trim('email')))
+
+
+def _indice_funcional(connection):
+    """MySQL 8.0.13+ admite índices sobre expresiones; MariaDB y MySQL anteriores no."""
+    return not connection.mysql_is_mariadb and connection.mysql_version >= (8, 0, 13)
+
+
+def crear_indices(apps, schema_editor):
+    """
+    Índice para el login por email + unicidad sin distinguir mayúsculas.
+
+    Los emails vacíos (p. ej. superusuarios creados sin email) quedan fuera
+    de la restricción. Si existen emails duplicados la migración falla y hay
+    que resolverlos a mano antes de aplicarla.
+
+    En MariaDB (XAMPP) y MySQL < 8.0.13 la unicidad va sobre una columna
+    generada almacenada (``COLUMNA_UNICA``) que Django no conoce ni escribe.
+    """
+    User = apps.get_model('auth', 'User')
+    connection = schema_editor.connection
+    tabla = schema_editor.quote_name(User._meta.db_table)
+    columna = schema_editor.quote_name('email')
+
+    schema_editor.execute(f"CREATE INDEX {INDICE_BUSQUEDA} ON {tabla} ({columna})")
+    if connection.vendor != 'mysql':
+        schema_editor.execute(
+            f"CREATE UNIQUE INDEX {INDICE_UNICO} ON {tabla} (LOWER({columna})) WHERE {columna} <> ''"
+        )
+    elif _indice_funcional(connection):
+        # Índice funcional; NULL no participa de la unicidad
+        schema_editor.execute(
+            f"CREATE UNIQUE INDEX {INDICE_UNICO} ON {tabla} ((NULLIF(LOWER({columna}), '')))"
+        )
+    else:
+        unica = schema_editor.quote_name(COLUMNA_UNICA)
+        schema_editor.execute(
+            f"ALTER TABLE {tabla} ADD COLUMN {unica} VARCHAR(254) "
+            f"GENERATED ALWAYS AS (NULLIF(LOWER({columna}), '')) STORED"
+        )
+        schema_editor.execute(f"CREATE UNIQUE INDEX {INDICE_UNICO} ON {tabla} ({unica})")
+
+
+def eliminar_indices(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    connection = schema_editor.connection
+    tabla = schema_editor.quote_name(User._meta.db_table)
+    for indice in (INDICE_UNICO, INDICE_BUSQUEDA):
+        if connection.vendor == 'mysql':
+            schema_editor.execute(f"DROP INDEX {indice} ON {tabla}")
+        else:
+            schema_editor.execute(f"DROP INDEX {indice}")
+    if connection.vendor == 'mysql' and not _indice_funcional(connection):
+        schema_editor.execute(f"ALTER TABLE {tabla} DROP COLUMN {schema_editor.quote_name(COLUMNA_UNICA)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('MatchDeportivoAPP', '0010_perfil_rating_agregados'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalizar_emails, migrations.RunPython.noop),
+        migrations.RunPython(crear_indices, eliminar_indices),
+    ]
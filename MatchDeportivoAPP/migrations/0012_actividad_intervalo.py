@@ -0,0 +1,49 @@
+# Generated by Django 5.1 on 2026-10-19 14:05
+
+from datetime import datetime, timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+DURACION_DEFAULT = timedelta(minutes=120)
+
+
+def calcular_intervalos(apps, schema_editor):
+    """Llena inicio/fin de las actividades existentes por lotes."""
+    Actividad = apps.get_model('MatchDeportivoAPP', 'Actividad')
+
+    lote = []
+    for actividad in Actividad.objects.only('pk', 'fecha', 'hora_inicio', 'hora_fin').iterator(chunk_size=1000):
+        actividad.inicio = timezone.make_aware(datetime.combine(actividad.fecha, actividad.hora_inicio))
+        if actividad.hora_fin is None:
+            actividad.fin = actividad.inicio + DURACION_DEFAULT
+        else:
+            actividad.fin = timezone.make_aware(datetime.combine(actividad.fecha, actividad.hora_fin))
+            if actividad.fin <= actividad.inicio:
+                actividad.fin += timedelta(days=1)
+        lote.append(actividad)
+        if len(lote) == 1000:
+            Actividad.objects.bulk_update(lote, ['inicio', 'fin'])
+            lote = []
+    Actividad.objects.bulk_update(lote, ['inicio', 'fin'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MatchDeportivoAPP', '0011_email_unico_usuario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='actividad',
+            name='inicio',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='actividad',
+            name='fin',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(calcular_intervalos, migrations.RunPython.noop),
+    ]
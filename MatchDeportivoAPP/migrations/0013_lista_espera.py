@@ -0,0 +1,37 @@
+# Generated by Django 5.1 on 2026-10-19 14:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MatchDeportivoAPP', '0012_actividad_intervalo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notificacion',
+            name='tipo',
+            field=models.CharField(choices=[('NUEVA_ACTIVIDAD', 'Nueva Actividad Cercana'), ('CONFIRMACION_UNION', 'Confirmación de Unión'), ('NUEVA_CALIFICACION', 'Nueva Calificación'), ('RECORDATORIO_VALORACION', 'Recordatorio de Valoración'), ('PROMOCION_LISTA_ESPERA', 'Cupo desde Lista de Espera')], max_length=50),
+        ),
+        migrations.CreateModel(
+            name='ListaEspera',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creada_en', models.DateTimeField(auto_now_add=True)),
+                ('actividad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lista_espera', to='MatchDeportivoAPP.actividad')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='listas_espera', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Lista de espera',
+                'verbose_name_plural': 'Listas de espera',
+                'ordering': ['creada_en', 'pk'],
+                'indexes': [models.Index(fields=['actividad', 'creada_en'], name='lista_espera_cola_idx')],
+                'unique_together': {('actividad', 'usuario')},
+            },
+        ),
+    ]
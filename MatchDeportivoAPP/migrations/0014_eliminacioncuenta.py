@@ -0,0 +1,33 @@
+# Generated by Django 5.1 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MatchDeportivoAPP', '0013_lista_espera'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EliminacionCuenta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('usuario_id', models.IntegerField(help_text='ID del usuario eliminado', unique=True)),
+                ('username', models.CharField(help_text='Username original (para auditoría)', max_length=150)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('EN_PROCESO', 'En proceso'), ('COMPLETADA', 'Completada'), ('ERROR', 'Error')], db_index=True, default='PENDIENTE', max_length=20)),
+                ('etapa', models.CharField(blank=True, help_text='Última etapa procesada', max_length=50)),
+                ('filas_eliminadas', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('solicitada_en', models.DateTimeField(auto_now_add=True)),
+                ('actualizada_en', models.DateTimeField(auto_now=True)),
+                ('completada_en', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Eliminación de cuenta',
+                'verbose_name_plural': 'Eliminaciones de cuentas',
+                'ordering': ['-solicitada_en'],
+            },
+        ),
+    ]
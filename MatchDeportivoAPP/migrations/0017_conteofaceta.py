@@ -0,0 +1,42 @@
+# Generated by Django 5.1 on 2026-10-19 17:25
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def contar_abiertas(apps, schema_editor):
+    """Llena los contadores con las actividades abiertas existentes."""
+    Actividad = apps.get_model('MatchDeportivoAPP', 'Actividad')
+    ConteoFaceta = apps.get_model('MatchDeportivoAPP', 'ConteoFaceta')
+
+    abiertas = Actividad.objects.filter(cerrada=False).order_by()
+    for faceta in ('deporte', 'nivel'):
+        ConteoFaceta.objects.bulk_create(
+            ConteoFaceta(faceta=faceta, valor=valor, abiertas=cantidad)
+            for valor, cantidad in abiertas.values(faceta).annotate(cantidad=Count('pk')).values_list(faceta, 'cantidad')
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MatchDeportivoAPP', '0016_actividad_organizador_inicio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConteoFaceta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('faceta', models.CharField(choices=[('deporte', 'Deporte'), ('nivel', 'Nivel')], max_length=20)),
+                ('valor', models.CharField(max_length=50)),
+                ('abiertas', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Conteo de faceta',
+                'verbose_name_plural': 'Conteos de facetas',
+                'unique_together': {('faceta', 'valor')},
+            },
+        ),
+        migrations.RunPython(contar_abiertas, migrations.RunPython.noop),
+    ]
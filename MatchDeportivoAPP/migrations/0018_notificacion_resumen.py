@@ -0,0 +1,43 @@
+# Generated by Django 5.1 on 2026-10-19 17:30
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fechar_existentes(apps, schema_editor):
+    """Las notificaciones existentes se ordenan por su fecha de creación."""
+    Notificacion = apps.get_model('MatchDeportivoAPP', 'Notificacion')
+    Notificacion.objects.update(actualizada_en=F('fecha_creacion'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MatchDeportivoAPP', '0017_conteofaceta'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificacion',
+            name='actividades_ids',
+            field=models.JSONField(blank=True, default=list, help_text='IDs de las actividades agrupadas (las más recientes)'),
+        ),
+        migrations.AddField(
+            model_name='notificacion',
+            name='actualizada_en',
+            field=models.DateTimeField(default=django.utils.timezone.now, help_text='Último aviso agrupado (orden de la bandeja)'),
+        ),
+        migrations.AddField(
+            model_name='notificacion',
+            name='contador',
+            field=models.PositiveIntegerField(default=1, help_text='Cantidad de avisos agrupados en esta notificación'),
+        ),
+        migrations.RunPython(fechar_existentes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(fields=['usuario', '-actualizada_en'], name='notificacion_bandeja_idx'),
+        ),
+    ]
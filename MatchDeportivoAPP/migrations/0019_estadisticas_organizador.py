@@ -0,0 +1,48 @@
+# Generated by Django 5.1 on 2026-10-19 17:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MatchDeportivoAPP', '0018_notificacion_resumen'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MarcaAgregacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=50, unique=True)),
+                ('procesado_hasta', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Marca de agregación',
+                'verbose_name_plural': 'Marcas de agregación',
+            },
+        ),
+        migrations.CreateModel(
+            name='EstadisticaOrganizador',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(help_text='Día de las actividades')),
+                ('deporte', models.CharField(max_length=50)),
+                ('actividades', models.PositiveIntegerField(default=0)),
+                ('actividades_vacias', models.PositiveIntegerField(default=0, help_text='Actividades que terminaron sin participantes')),
+                ('cupos_ofrecidos', models.PositiveIntegerField(default=0)),
+                ('cupos_ocupados', models.PositiveIntegerField(default=0)),
+                ('valoraciones', models.PositiveIntegerField(default=0, help_text='Valoraciones recibidas por el organizador en esas actividades')),
+                ('suma_puntuaciones', models.PositiveIntegerField(default=0)),
+                ('organizador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas_diarias', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Estadística de organizador',
+                'verbose_name_plural': 'Estadísticas de organizadores',
+                'unique_together': {('organizador', 'fecha', 'deporte')},
+            },
+        ),
+    ]
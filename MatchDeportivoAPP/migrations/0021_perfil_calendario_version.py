@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-19 17:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MatchDeportivoAPP', '0020_notificacion_actividad_set_null'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='perfil',
+            name='calendario_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1 on 2026-10-19 17:55
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MatchDeportivoAPP', '0022_diaporagregar'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='eliminacioncuenta',
+            name='username',
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1 on 2026-10-19 18:00
+
+from django.db import migrations
+
+# Rutas de ICONOS_PERFIL al momento de esta migración
+ICONOS = [
+    'img/futbol.png', 'img/basketball.png', 'img/skate.png',
+    'img/voleibol.png', 'img/running.png', 'img/tenis.png',
+]
+
+
+def reemplazar_iconos_desconocidos(apps, schema_editor):
+    """Los iconos fuera del manifiesto de estáticos harían fallar {% static %}."""
+    Perfil = apps.get_model('MatchDeportivoAPP', 'Perfil')
+    desconocidos = Perfil.objects.filter(icono_perfil__isnull=False).exclude(icono_perfil__in=['', *ICONOS])
+    desconocidos.update(icono_perfil='img/futbol.png')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('MatchDeportivoAPP', '0023_remove_eliminacioncuenta_username'),
+    ]
+
+    operations = [
+        migrations.RunPython(reemplazar_iconos_desconocidos, migrations.RunPython.noop),
+    ]
@@ -2,9 +2,13 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
-from datetime import date, time
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from datetime import date, datetime, time, timedelta
 
-from .constants import NIVELES
+from .al_confirmar import acumular_al_confirmar
+from .constants import DURACION_ACTIVIDAD_DEFAULT_MINUTOS, NIVELES
 
 class Log(models.Model):
     """Registro de acciones del sistema para auditoría."""
@@ -20,7 +24,13 @@ class Log(models.Model):
     usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='logs')
     accion = models.CharField(max_length=50, choices=ACCION_CHOICES)
     descripcion = models.TextField()
-    fecha = models.DateTimeField(auto_now_add=True)
+    fecha = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Filtro por acción en el admin, ordenado por fecha
+            models.Index(fields=['accion', 'fecha'], name='log_accion_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"{self.usuario} - {self.accion} - {self.fecha.strftime('%Y-%m-%d %H:%M')}"
@@ -46,21 +56,59 @@ class Perfil(models.Model):
     horarios = models.CharField(max_length=200, null=True, blank=True)
     radio = models.IntegerField(null=True, blank=True, validators=[MinValueValidator(1)])  # Radio de búsqueda en km
 
+    # Agregados de valoraciones recibidas (mantenidos por recalcular_ratings)
+    rating_suma = models.PositiveIntegerField(default=0)
+    rating_cantidad = models.PositiveIntegerField(default=0)
+
+    # Versión del enlace al feed .ics: regenerarlo la incrementa y revoca el anterior
+    calendario_version = models.PositiveIntegerField(default=0)
+
+    actualizada_en = models.DateTimeField(
+        auto_now=True,
+        help_text='Última modificación (usada para ETags y respuestas condicionales)'
+    )
+
     def __str__(self):
         return self.usuario.username
     
     def rating_promedio(self):
-        """Calcula el rating promedio del usuario basado en sus valoraciones recibidas."""
-        valoraciones = self.usuario.valoraciones_recibidas.all()
-        if not valoraciones.exists():
+        """Rating promedio del usuario basado en sus valoraciones recibidas."""
+        if not self.rating_cantidad:
             return None
-        
-        total = sum(v.puntuacion for v in valoraciones)
-        return round(total / valoraciones.count(), 1)
+        return round(self.rating_suma / self.rating_cantidad, 1)
     
     def total_valoraciones(self):
         """Retorna el número total de valoraciones recibidas."""
-        return self.usuario.valoraciones_recibidas.count()
+        return self.rating_cantidad
+
+    @classmethod
+    def recalcular_ratings(cls, usuario_ids):
+        """
+        Recalcula los agregados de rating de varios usuarios en un solo UPDATE.
+
+        También actualiza ``actualizada_en`` para invalidar los ETags de las
+        páginas que muestran el rating.
+        """
+        recibidas = Valoracion.objects.filter(evaluado_id=OuterRef('usuario_id')).values('evaluado_id')
+        suma = recibidas.annotate(total=Sum('puntuacion')).values('total')
+        cantidad = recibidas.annotate(total=Count('pk')).values('total')
+
+        return cls.objects.filter(usuario_id__in=set(usuario_ids)).update(
+            rating_suma=Coalesce(Subquery(suma), 0),
+            rating_cantidad=Coalesce(Subquery(cantidad), 0),
+            actualizada_en=timezone.now(),
+        )
+
+    @classmethod
+    def recalcular_ratings_al_confirmar(cls, usuario_ids):
+        """
+        Como ``recalcular_ratings``, pero al confirmar la transacción en curso.
+
+        Los usuarios de todas las llamadas de una misma transacción se juntan
+        en un solo recálculo (p. ej. al borrar una actividad con decenas de
+        valoraciones). Fuera de una transacción recalcula en el acto.
+        """
+        acumular_al_confirmar(cls.recalcular_ratings, usuario_ids)
 
 class Actividad(models.Model):
     """Actividad deportiva organizada por un usuario."""
@@ -73,13 +121,20 @@ class Actividad(models.Model):
     deporte = models.CharField(max_length=50)
     descripcion = models.TextField(blank=True)
     
-    # Ubicación
+    # Ubicación (coordenadas resueltas desde ``lugar``, ver geocoding.py)
     lugar = models.CharField(max_length=255)
+    latitud = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitud = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
     
     # Horario
     fecha = models.DateField(default=date.today)
     hora_inicio = models.TimeField(default=time(18, 0))
     hora_fin = models.TimeField(blank=True, null=True)
+
+    # Intervalo con zona horaria, derivado de fecha y horas (ver calcular_intervalo).
+    # Indexado para detectar choques de horario y cerrar actividades terminadas.
+    inicio = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
+    fin = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
     
     # Nivel y cupos
     nivel = models.CharField(max_length=20, choices=NIVELES)
@@ -104,10 +159,68 @@ class Actividad(models.Model):
     )
     
     creada_en = models.DateTimeField(auto_now_add=True)
+    actualizada_en = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        help_text='Última modificación (usada para ETags y respuestas condicionales)'
+    )
+
+    class Meta:
+        indexes = [
+            # Próximas/historial de un organizador ordenados por inicio
+            models.Index(fields=['organizador', 'inicio'], name='actividad_organizador_inicio'),
+        ]
 
     def __str__(self):
         return f"{self.titulo} ({self.deporte} el {self.fecha})"
+
+    def faceta_abierta(self):
+        """``(deporte, nivel)`` si la actividad está abierta, None si está cerrada."""
+        return None if self.cerrada else (self.deporte, self.nivel)
+
+    def calcular_intervalo(self):
+        """
+        Calcula ``inicio`` y ``fin`` a partir de ``fecha``, ``hora_inicio`` y ``hora_fin``.
+
+        Sin ``hora_fin`` se asume ``DURACION_ACTIVIDAD_DEFAULT_MINUTOS``; si
+        ``hora_fin`` es anterior a ``hora_inicio`` la actividad termina al día
+        siguiente.
+        """
+        self.inicio = timezone.make_aware(datetime.combine(self.fecha, self.hora_inicio))
+        if self.hora_fin is None:
+            self.fin = self.inicio + timedelta(minutes=DURACION_ACTIVIDAD_DEFAULT_MINUTOS)
+        else:
+            self.fin = timezone.make_aware(datetime.combine(self.fecha, self.hora_fin))
+            if self.fin <= self.inicio:
+                self.fin += timedelta(days=1)
     
+class ListaEspera(models.Model):
+    """Cola FIFO de usuarios esperando un cupo en una actividad llena."""
+
+    actividad = models.ForeignKey(Actividad, on_delete=models.CASCADE, related_name='lista_espera')
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='listas_espera')
+    creada_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['creada_en', 'pk']
+        unique_together = ('actividad', 'usuario')
+        indexes = [
+            models.Index(fields=['actividad', 'creada_en'], name='lista_espera_cola_idx'),
+        ]
+        verbose_name = 'Lista de espera'
+        verbose_name_plural = 'Listas de espera'
+
+    def __str__(self):
+        return f'{self.usuario.username} espera en {self.actividad.titulo}'
+
+    def posicion(self):
+        """Posición (desde 1) en la cola de la actividad."""
+        return ListaEspera.objects.filter(
+            actividad_id=self.actividad_id,
+        ).filter(
+            models.Q(creada_en__lt=self.creada_en) | models.Q(creada_en=self.creada_en, pk__lt=self.pk)
+        ).count() + 1
+
 class Notificacion(models.Model):
     """Notificaciones para los usuarios sobre actividades y eventos."""
     
@@ -115,17 +228,40 @@ class Notificacion(models.Model):
         ('NUEVA_ACTIVIDAD', 'Nueva Actividad Cercana'),
         ('CONFIRMACION_UNION', 'Confirmación de Unión'),
         ('NUEVA_CALIFICACION', 'Nueva Calificación'),
+        ('RECORDATORIO_VALORACION', 'Recordatorio de Valoración'),
+        ('PROMOCION_LISTA_ESPERA', 'Cupo desde Lista de Espera'),
     )
 
     usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notificaciones')
-    actividad = models.ForeignKey('Actividad', on_delete=models.CASCADE, null=True, blank=True)
+    # SET_NULL: borrar una actividad no debe borrar el resumen que la agrupa
+    # junto a otras (sus ids siguen en ``actividades_ids``)
+    actividad = models.ForeignKey('Actividad', on_delete=models.SET_NULL, null=True, blank=True)
     tipo = models.CharField(max_length=50, choices=TIPO_NOTIFICACION)
     mensaje = models.CharField(max_length=255)
     leida = models.BooleanField(default=False)
-    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    # Resumen: avisos del mismo tipo agrupados en esta fila (ver resumen_notificaciones.py)
+    contador = models.PositiveIntegerField(
+        default=1,
+        help_text='Cantidad de avisos agrupados en esta notificación'
+    )
+    actividades_ids = models.JSONField(
+        default=list,
+        blank=True,
+        help_text='IDs de las actividades agrupadas (las más recientes)'
+    )
+    actualizada_en = models.DateTimeField(
+        default=timezone.now,
+        help_text='Último aviso agrupado (orden de la bandeja)'
+    )
 
     class Meta:
         ordering = ['-fecha_creacion']
+        indexes = [
+            # Bandeja del usuario: las más recientes primero
+            models.Index(fields=['usuario', '-actualizada_en'], name='notificacion_bandeja_idx'),
+        ]
 
     def __str__(self):
         return f'{self.tipo} para {self.usuario.username}'
@@ -176,4 +312,142 @@ class Valoracion(models.Model):
         verbose_name_plural = 'Valoraciones'
     
     def __str__(self):
-        return f'{self.evaluador.username} valoró a {self.evaluado.username} ({self.puntuacion}★)'
\ No newline at end of file
+        return f'{self.evaluador.username} valoró a {self.evaluado.username} ({self.puntuacion}★)'
+
+
+class EliminacionCuenta(models.Model):
+    """
+    Progreso de la eliminación de una cuenta (ver eliminacion.py).
+
+    No tiene FK al usuario porque sobrevive a su borrado como registro de
+    auditoría y para poder retomar una eliminación interrumpida. Solo guarda
+    su id: ningún dato personal queda después de la purga.
+    """
+
+    PENDIENTE = 'PENDIENTE'
+    EN_PROCESO = 'EN_PROCESO'
+    COMPLETADA = 'COMPLETADA'
+    ERROR = 'ERROR'
+    ESTADOS = (
+        (PENDIENTE, 'Pendiente'),
+        (EN_PROCESO, 'En proceso'),
+        (COMPLETADA, 'Completada'),
+        (ERROR, 'Error'),
+    )
+
+    usuario_id = models.IntegerField(unique=True, help_text='ID del usuario eliminado')
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE, db_index=True)
+    etapa = models.CharField(max_length=50, blank=True, help_text='Última etapa procesada')
+    filas_eliminadas = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    solicitada_en = models.DateTimeField(auto_now_add=True)
+    actualizada_en = models.DateTimeField(auto_now=True)
+    completada_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-solicitada_en']
+        verbose_name = 'Eliminación de cuenta'
+        verbose_name_plural = 'Eliminaciones de cuentas'
+
+    def __str__(self):
+        return f'Usuario {self.usuario_id} ({self.get_estado_display()})'
+
+
+class ConteoFaceta(models.Model):
+    """
+    Cantidad de actividades abiertas por deporte y por nivel (ver facetas.py).
+
+    Se mantiene de forma incremental al crear, editar, cerrar y eliminar
+    actividades, para mostrar los conteos del filtro sin agregar la tabla
+    de actividades en cada página.
+    """
+
+    DEPORTE = 'deporte'
+    NIVEL = 'nivel'
+    FACETAS = (
+        (DEPORTE, 'Deporte'),
+        (NIVEL, 'Nivel'),
+    )
+
+    faceta = models.CharField(max_length=20, choices=FACETAS)
+    valor = models.CharField(max_length=50)
+    abiertas = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('faceta', 'valor')
+        verbose_name = 'Conteo de faceta'
+        verbose_name_plural = 'Conteos de facetas'
+
+    def __str__(self):
+        return f'{self.faceta}={self.valor}: {self.abiertas}'
+
+
+class EstadisticaOrganizador(models.Model):
+    """
+    Resumen diario por organizador y deporte de sus actividades finalizadas.
+
+    Lo mantiene el comando ``agregar_estadisticas`` (ver estadisticas.py) para
+    que el panel del organizador lea unas pocas filas ya agregadas en vez de
+    recorrer actividades, participantes y valoraciones.
+    """
+
+    organizador = models.ForeignKey(User, on_delete=models.CASCADE, related_name='estadisticas_diarias')
+    fecha = models.DateField(help_text='Día de las actividades')
+    deporte = models.CharField(max_length=50)
+
+    actividades = models.PositiveIntegerField(default=0)
+    actividades_vacias = models.PositiveIntegerField(
+        default=0,
+        help_text='Actividades que terminaron sin participantes'
+    )
+    cupos_ofrecidos = models.PositiveIntegerField(default=0)
+    cupos_ocupados = models.PositiveIntegerField(default=0)
+    valoraciones = models.PositiveIntegerField(
+        default=0,
+        help_text='Valoraciones recibidas por el organizador en esas actividades'
+    )
+    suma_puntuaciones = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('organizador', 'fecha', 'deporte')
+        verbose_name = 'Estadística de organizador'
+        verbose_name_plural = 'Estadísticas de organizadores'
+
+    def __str__(self):
+        return f'{self.organizador_id} {self.fecha} {self.deporte}: {self.actividades} actividades'
+
+
+class DiaPorAgregar(models.Model):
+    """
+    Día de un organizador cuyas estadísticas cambiaron sin dejar otra marca.
+
+    Borrar una actividad finalizada o una valoración no deja fechas de
+    modificación que ``dias_modificados`` pueda encontrar: las señales de
+    borrado registran aquí el día y la siguiente corrida incremental lo
+    recalcula y elimina la fila (ver estadisticas.py).
+    """
+
+    organizador = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    fecha = models.DateField()
+
+    class Meta:
+        unique_together = ('organizador', 'fecha')
+        verbose_name = 'Día por agregar'
+        verbose_name_plural = 'Días por agregar'
+
+    def __str__(self):
+        return f'{self.organizador_id} {self.fecha}'
+
+
+class MarcaAgregacion(models.Model):
+    """Hasta cuándo procesó los cambios una agregación incremental (ver estadisticas.py)."""
+
+    nombre = models.CharField(max_length=50, unique=True)
+    procesado_hasta = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Marca de agregación'
+        verbose_name_plural = 'Marcas de agregación'
+
+    def __str__(self):
+        return f'{self.nombre}: {self.procesado_hasta}'
@@ -0,0 +1,27 @@
+"""Utilidades de paginación por cursor.
+
+Los cursores son opacos para el cliente: una lista JSON de valores
+codificada en base64 URL-safe. Quien los consume decide cómo interpretar
+cada posición (por ejemplo, el último ``pk`` entregado).
+"""
+import base64
+import binascii
+import json
+
+
+def codificar_cursor(*valores):
+    """Codifica los valores de la última fila entregada en un cursor opaco."""
+    crudo = json.dumps(list(valores), separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(crudo.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Decodifica un cursor. Retorna la lista de valores o None si es inválido."""
+    if not cursor:
+        return None
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        return None
+    return valores if isinstance(valores, list) else None
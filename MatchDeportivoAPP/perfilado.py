@@ -0,0 +1,166 @@
+"""
+Perfilado bajo demanda de un request, solo para usuarios staff.
+
+Un usuario staff pide el perfil de una página agregando ``?_perfilar=1`` a la
+URL o enviando la cabecera ``X-Perfilar: 1``. Con el valor ``memoria`` además
+se registran las asignaciones con ``tracemalloc``. La vista se ejecuta bajo
+``cProfile`` y en ``settings.PERFILADO_DIRECTORIO`` (dentro de ``logs/``)
+quedan dos archivos con el mismo nombre base:
+
+- ``.prof``: estadísticas de cProfile, para ``snakeviz`` o ``pstats``;
+- ``.txt``: resumen con las funciones más costosas, las consultas SQL
+  agrupadas y, si se pidió, las líneas que más memoria asignaron.
+
+La respuesta lleva el nombre base en la cabecera ``X-Perfil``.
+
+Los requests sin la marca solo pagan la búsqueda de la cabecera y del
+parámetro. Con ``PERFILADO_HABILITADO = False`` el middleware se desactiva
+al arrancar y no agrega nada.
+"""
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+from django.utils.text import slugify
+
+logger = logging.getLogger(__name__)
+
+PARAMETRO = '_perfilar'
+CABECERA = 'HTTP_X_PERFILAR'
+VALOR_MEMORIA = 'memoria'
+
+
+def _marca(request):
+    """Valor de la marca de perfilado del request, o None si no la trae."""
+    valor = request.META.get(CABECERA)
+    if valor is None and PARAMETRO in request.META.get('QUERY_STRING', ''):
+        valor = request.GET.get(PARAMETRO)
+    return valor
+
+
+def _normalizar_sql(sql):
+    """Agrupa consultas que solo difieren en sus literales."""
+    sql = re.sub(r"'[^']*'", '?', sql)
+    sql = re.sub(r'\b\d+\b', '?', sql)
+    return re.sub(r'\((?:\?, )+\?\)', '(...)', sql)
+
+
+class _RegistroSQL:
+    """``execute_wrapper`` que acumula tiempo y cantidad por consulta normalizada."""
+
+    def __init__(self):
+        self.por_consulta = defaultdict(lambda: [0, 0.0])
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            acumulado = self.por_consulta[(context['connection'].alias, _normalizar_sql(sql))]
+            acumulado[0] += 1
+            acumulado[1] += time.perf_counter() - inicio
+            self.total += 1
+
+
+class PerfilarRequestMiddleware:
+    """Ejecuta bajo cProfile los requests marcados de usuarios staff."""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PERFILADO_HABILITADO', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        marca = _marca(request)
+        if marca is None or not request.user.is_staff:
+            return self.get_response(request)
+        return self.perfilar(request, memoria=(marca == VALOR_MEMORIA))
+
+    def perfilar(self, request, memoria=False):
+        perfil = cProfile.Profile()
+        sql = _RegistroSQL()
+        memoria = memoria and not tracemalloc.is_tracing()
+
+        with ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(sql))
+            if memoria:
+                tracemalloc.start()
+            inicio = time.perf_counter()
+            try:
+                perfil.enable()
+            except ValueError:
+                # Otro request del mismo proceso ya se está perfilando
+                logger.warning("Perfilado omitido en %s: ya hay un perfil activo", request.path)
+                if memoria:
+                    tracemalloc.stop()
+                return self.get_response(request)
+            try:
+                response = self.get_response(request)
+            finally:
+                perfil.disable()
+                segundos = time.perf_counter() - inicio
+                instantanea = None
+                if memoria:
+                    instantanea = tracemalloc.take_snapshot()
+                    tracemalloc.stop()
+
+        try:
+            nombre = self.guardar(request, response, perfil, sql, segundos, instantanea)
+        except OSError:
+            logger.exception("No se pudo guardar el perfil de %s", request.path)
+        else:
+            response['X-Perfil'] = nombre
+            logger.info("Perfil de %s %s guardado en %s", request.method, request.path, nombre)
+        return response
+
+    def guardar(self, request, response, perfil, sql, segundos, instantanea):
+        """Escribe el ``.prof`` y el resumen ``.txt``. Retorna el nombre base."""
+        directorio = settings.PERFILADO_DIRECTORIO
+        os.makedirs(directorio, exist_ok=True)
+        ruta = slugify(request.path.strip('/').replace('/', '-')) or 'inicio'
+        nombre = f"{timezone.now():%Y%m%d-%H%M%S-%f}-{request.method.lower()}-{ruta}"
+        base = os.path.join(directorio, nombre)
+
+        perfil.dump_stats(f'{base}.prof')
+
+        funciones = io.StringIO()
+        estadisticas = pstats.Stats(perfil, stream=funciones)
+        estadisticas.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(settings.PERFILADO_FUNCIONES)
+
+        segundos_sql = sum(total for _, total in sql.por_consulta.values())
+        lineas = [
+            f"{request.method} {request.get_full_path()}",
+            f"Usuario: {request.user.get_username()} - respuesta {response.status_code}",
+            f"Tiempo total: {1000 * segundos:.1f} ms - SQL: {sql.total} consultas, {1000 * segundos_sql:.1f} ms",
+            '',
+            '=' * 70,
+            f"CONSULTAS SQL (por tiempo total, {len(sql.por_consulta)} distintas)",
+            '=' * 70,
+        ]
+        ordenadas = sorted(sql.por_consulta.items(), key=lambda item: item[1][1], reverse=True)
+        for (alias, consulta), (cantidad, total) in ordenadas[:settings.PERFILADO_FUNCIONES]:
+            lineas.append(f"{cantidad:>5}x {1000 * total:>9.2f} ms  [{alias}] {consulta}")
+
+        if instantanea is not None:
+            lineas += ['', '=' * 70, 'MEMORIA ASIGNADA (por línea)', '=' * 70]
+            for estadistica in instantanea.statistics('lineno')[:settings.PERFILADO_FUNCIONES]:
+                lineas.append(str(estadistica))
+
+        lineas += ['', '=' * 70, 'FUNCIONES (por tiempo acumulado)', '=' * 70, funciones.getvalue()]
+
+        with open(f'{base}.txt', 'w', encoding='utf-8') as archivo:
+            archivo.write('\n'.join(lineas))
+        return nombre
@@ -0,0 +1,111 @@
+"""
+Lecturas en una réplica de la base de datos, con lectura de las propias escrituras.
+
+Si ``DATABASES`` define el alias ``settings.REPLICA_DB_ALIAS``, las vistas
+marcadas con ``@lectura_en_replica`` (decorators.py) leen de la réplica; el
+resto del sitio, los comandos y todas las escrituras usan ``default``.
+
+Como la réplica va con algo de retraso, quien acaba de escribir no debe leer
+de ella o no vería su propio cambio. ``FijarPrimariaMiddleware`` detecta las
+escrituras de cada request (``db_for_write`` las anota) y responde con una
+cookie que fija al navegador a la primaria durante
+``REPLICA_FIJACION_SEGUNDOS``. Dentro del mismo request, después de escribir,
+las lecturas también vuelven a la primaria.
+
+Sin réplica configurada todo va a ``default`` y nada de esto tiene efecto.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+COOKIE_FIJACION = 'fijar_primaria'
+
+# Apps cuyas tablas se leen siempre de la primaria (la sesión se escribe y
+# se vuelve a leer en requests consecutivos)
+APPS_SOLO_PRIMARIA = {'sessions'}
+
+# Estado del request en curso: {'replica': bool, 'escritura': bool}
+_estado = ContextVar('estado_replica', default=None)
+
+
+def alias_replica():
+    """Alias de la réplica, o None si no hay una configurada."""
+    alias = getattr(settings, 'REPLICA_DB_ALIAS', None)
+    return alias if alias and alias in settings.DATABASES else None
+
+
+@contextmanager
+def leer_de_replica():
+    """Dirige a la réplica las lecturas hechas dentro del bloque (hasta la primera escritura)."""
+    estado = _estado.get()
+    if estado is None:
+        # Fuera de FijarPrimariaMiddleware (p. ej. en un test o un comando)
+        token = _estado.set({'replica': True, 'escritura': False})
+        try:
+            yield
+        finally:
+            _estado.reset(token)
+        return
+
+    anterior = estado['replica']
+    estado['replica'] = True
+    try:
+        yield
+    finally:
+        estado['replica'] = anterior
+
+
+def hubo_escritura():
+    estado = _estado.get()
+    return bool(estado and estado['escritura'])
+
+
+class ReplicaRouter:
+    """Envía a la réplica las lecturas de las vistas marcadas; todo lo demás a ``default``."""
+
+    def db_for_read(self, model, **hints):
+        estado = _estado.get()
+        if not estado or not estado['replica'] or estado['escritura']:
+            return DEFAULT_DB_ALIAS
+        if model._meta.app_label in APPS_SOLO_PRIMARIA:
+            return DEFAULT_DB_ALIAS
+        return alias_replica() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        estado = _estado.get()
+        if estado is not None:
+            estado['escritura'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # La réplica tiene los mismos datos: los objetos de ambas se relacionan
+        return True
+
+
+class FijarPrimariaMiddleware:
+    """Lleva el estado de réplica por request y fija a la primaria a quien acaba de escribir."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Con la cookie vigente el usuario escribió hace poco: nada de réplica
+        request.fijado_a_primaria = COOKIE_FIJACION in request.COOKIES
+        token = _estado.set({'replica': False, 'escritura': False})
+        try:
+            response = self.get_response(request)
+            escribio = hubo_escritura()
+        finally:
+            _estado.reset(token)
+
+        if escribio and alias_replica():
+            response.set_cookie(
+                COOKIE_FIJACION, '1',
+                max_age=settings.REPLICA_FIJACION_SEGUNDOS,
+                httponly=True,
+                samesite='Lax',
+                secure=request.is_secure(),
+            )
+        return response
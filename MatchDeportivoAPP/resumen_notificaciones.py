@@ -0,0 +1,102 @@
+"""
+Agrupación de notificaciones repetitivas en un resumen por usuario.
+
+Con las alertas de proximidad un usuario activo puede recibir decenas de
+``NUEVA_ACTIVIDAD`` al día. Para los tipos de ``NOTIFICACIONES_AGRUPABLES``,
+si el usuario ya tiene una notificación sin leer del mismo tipo creada
+dentro de la ventana (``NOTIFICACIONES_AGRUPACION_HORAS``), el aviso nuevo
+se suma a esa fila: aumenta ``contador``, se agrega la actividad a
+``actividades_ids`` y el mensaje pasa a ser el del resumen. Así la tabla
+crece con los usuarios y no con la cantidad de actividades.
+
+Al marcar el resumen como leído, el próximo aviso abre una fila nueva.
+Borrar una actividad solo deja en NULL ``actividad`` (el enlace a la más
+reciente); el resumen y su ``actividades_ids`` se conservan.
+"""
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from .constants import (
+    NOTIFICACIONES_AGRUPABLES, NOTIFICACIONES_AGRUPACION_HORAS, NOTIFICACIONES_AGRUPACION_MAX_IDS,
+)
+from .models import Notificacion
+
+LOTE = 500
+
+# Un aviso para un usuario; ``mensaje`` se usa si queda como notificación individual
+Aviso = namedtuple('Aviso', 'usuario_id actividad_id titulo mensaje')
+
+
+def _sumar(notificacion, avisos, plantilla, ahora):
+    """Agrega ``avisos`` (del mismo usuario) a la notificación y ajusta su mensaje."""
+    ids = list(notificacion.actividades_ids or ([notificacion.actividad_id] if notificacion.actividad_id else []))
+    for aviso in avisos:
+        ids.append(aviso.actividad_id)
+    ultimo = avisos[-1]
+
+    notificacion.contador += len(avisos)
+    notificacion.actividades_ids = ids[-NOTIFICACIONES_AGRUPACION_MAX_IDS:]
+    notificacion.actividad_id = ultimo.actividad_id
+    notificacion.actualizada_en = ahora
+    if notificacion.contador == 1:
+        mensaje = ultimo.mensaje
+    else:
+        mensaje = plantilla.format(contador=notificacion.contador, titulo=ultimo.titulo)
+    notificacion.mensaje = Truncator(mensaje).chars(Notificacion._meta.get_field('mensaje').max_length)
+
+
+@transaction.atomic
+def notificar_agrupado(tipo, avisos):
+    """
+    Entrega ``avisos`` (iterable de ``Aviso``) de ``tipo``, agrupándolos si corresponde.
+
+    Retorna ``(creadas, agrupadas)``: filas nuevas y filas existentes actualizadas.
+    """
+    plantilla = NOTIFICACIONES_AGRUPABLES.get(tipo)
+    por_usuario = defaultdict(list)
+    for aviso in avisos:
+        por_usuario[aviso.usuario_id].append(aviso)
+
+    if plantilla is None:
+        Notificacion.objects.bulk_create([
+            Notificacion(usuario_id=a.usuario_id, actividad_id=a.actividad_id, tipo=tipo, mensaje=a.mensaje)
+            for lista in por_usuario.values() for a in lista
+        ], batch_size=LOTE)
+        return sum(map(len, por_usuario.values())), 0
+
+    ahora = timezone.now()
+    desde = ahora - timedelta(hours=NOTIFICACIONES_AGRUPACION_HORAS)
+    usuarios = list(por_usuario)
+    creadas = agrupadas = 0
+
+    for inicio in range(0, len(usuarios), LOTE):
+        lote = usuarios[inicio:inicio + LOTE]
+        # La más reciente de cada usuario; bloqueada para no perder avisos
+        # concurrentes sobre el mismo resumen
+        abiertas = {}
+        for notificacion in Notificacion.objects.select_for_update().filter(
+            usuario_id__in=lote, tipo=tipo, leida=False, fecha_creacion__gte=desde,
+        ).order_by('fecha_creacion', 'pk'):
+            abiertas[notificacion.usuario_id] = notificacion
+
+        nuevas = []
+        for usuario_id in lote:
+            notificacion = abiertas.get(usuario_id)
+            if notificacion is None:
+                notificacion = Notificacion(usuario_id=usuario_id, tipo=tipo, contador=0, actividades_ids=[])
+                nuevas.append(notificacion)
+            _sumar(notificacion, por_usuario[usuario_id], plantilla, ahora)
+
+        Notificacion.objects.bulk_create(nuevas, batch_size=LOTE)
+        Notificacion.objects.bulk_update(
+            abiertas.values(),
+            ['contador', 'actividades_ids', 'actividad', 'mensaje', 'actualizada_en'],
+            batch_size=LOTE,
+        )
+        creadas += len(nuevas)
+        agrupadas += len(abiertas)
+    return creadas, agrupadas
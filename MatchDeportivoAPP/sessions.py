@@ -0,0 +1,64 @@
+"""
+Motor de sesiones: caché con persistencia en base de datos.
+
+Extiende ``cached_db`` (lecturas desde la caché, escrituras en caché y BD)
+con dos cambios:
+
+- ``save()`` se omite si el contenido de la sesión no cambió desde que se
+  cargó, aunque algo la haya marcado como modificada (p. ej. reasignar el
+  mismo valor o leer y volver a guardar los mensajes).
+- ``clear_expired()`` borra las sesiones vencidas por lotes, para no bloquear
+  ``django_session`` con un único DELETE enorme.
+
+Con varios workers la caché debe ser compartida (ver ``CACHES``): con
+LocMemCache un logout en un proceso no invalida la copia en caché de otro.
+"""
+import hashlib
+import logging
+
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore(CachedDBStore):
+
+    def load(self):
+        datos = super().load()
+        self._huella_cargada = (self.session_key, self._huella(datos))
+        return datos
+
+    def _huella(self, datos):
+        return hashlib.sha1(self.serializer().dumps(datos)).hexdigest()
+
+    def _sin_cambios(self):
+        datos = getattr(self, '_session_cache', None)
+        if datos is None or self.session_key is None:
+            return False
+        return getattr(self, '_huella_cargada', None) == (self.session_key, self._huella(datos))
+
+    def save(self, must_create=False):
+        if not must_create and self._sin_cambios():
+            return
+        super().save(must_create=must_create)
+        self._huella_cargada = (self.session_key, self._huella(self._get_session(no_load=must_create)))
+
+    @classmethod
+    def clear_expired(cls, lote=1000):
+        """Elimina las sesiones vencidas en lotes de ``lote`` filas. Retorna el total."""
+        modelo = cls.get_model_class()
+        vencidas = modelo.objects.filter(expire_date__lt=timezone.now())
+        total = 0
+        while True:
+            claves = list(vencidas.values_list('session_key', flat=True)[:lote])
+            if not claves:
+                break
+            with transaction.atomic():
+                borradas, _ = modelo.objects.filter(session_key__in=claves).delete()
+            total += borradas
+            if len(claves) < lote:
+                break
+        logger.info(f"{total} sesión(es) vencida(s) eliminada(s)")
+        return total
@@ -1,7 +1,77 @@
-from django.db.models.signals import post_save
+from decimal import Decimal
+
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import Perfil
+from .backends import normalizar_email
+from .al_confirmar import acumular_al_confirmar
+from .estadisticas import marcar_actividades, marcar_dias
+from .geocoding import geocodificar
+from .models import Actividad, Perfil, Valoracion
+
+PRECISION_COORDENADA = Decimal('0.000001')
+
+
+@receiver(pre_save, sender=User)
+def normalizar_email_usuario(sender, instance, **kwargs):
+    """Guarda el email en minúsculas (la búsqueda del login es exacta)."""
+    instance.email = normalizar_email(instance.email)
+
+
+def _valores_guardados(instance, *campos):
+    """Valores de ``campos`` en la base para ``instance``, o None si aún no existe."""
+    if instance._state.adding or instance.pk is None:
+        return None
+    return type(instance)._default_manager.filter(pk=instance.pk).values(*campos).first()
+
+
+def _coordenada(valor):
+    """Coordenada con la precisión de la columna (el formulario las asigna como float)."""
+    return None if valor is None else Decimal(str(valor)).quantize(PRECISION_COORDENADA)
+
+
+@receiver(pre_save, sender=Actividad)
+def geocodificar_actividad(sender, instance, update_fields=None, **kwargs):
+    """Resuelve las coordenadas de la actividad cuando cambia ``lugar``."""
+    if update_fields is not None and 'lugar' not in update_fields:
+        return
+    guardado = _valores_guardados(instance, 'lugar')
+    if guardado is None or guardado['lugar'] != instance.lugar or instance.latitud is None:
+        instance.latitud, instance.longitud = geocodificar(instance.lugar)
+
+
+@receiver(pre_save, sender=Actividad)
+def calcular_intervalo_actividad(sender, instance, update_fields=None, **kwargs):
+    """Mantiene ``inicio``/``fin`` sincronizados con la fecha y las horas."""
+    if update_fields is not None and not {'fecha', 'hora_inicio', 'hora_fin'} & set(update_fields):
+        return
+    instance.calcular_intervalo()
+
+
+@receiver(pre_save, sender=Perfil)
+def geocodificar_perfil(sender, instance, update_fields=None, **kwargs):
+    """
+    Resuelve las coordenadas del perfil cuando cambia ``ubicacion``.
+
+    Si en el mismo guardado también cambiaron las coordenadas, vienen del
+    mapa y se respetan.
+    """
+    if update_fields is not None and 'ubicacion' not in update_fields:
+        return
+    if not instance.ubicacion:
+        return
+    sin_coordenadas = instance.latitud is None or instance.longitud is None
+    guardado = _valores_guardados(instance, 'ubicacion', 'latitud', 'longitud')
+    if guardado is None:
+        cambio = sin_coordenadas
+    else:
+        coordenadas_nuevas = (
+            (_coordenada(instance.latitud), _coordenada(instance.longitud))
+            != (_coordenada(guardado['latitud']), _coordenada(guardado['longitud']))
+        )
+        cambio = sin_coordenadas or (guardado['ubicacion'] != instance.ubicacion and not coordenadas_nuevas)
+    if cambio:
+        instance.latitud, instance.longitud = geocodificar(instance.ubicacion)
 
 
 @receiver(post_save, sender=User)
@@ -12,7 +82,42 @@ def crear_perfil(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=User)
-def guardar_perfil(sender, instance, **kwargs):
+def guardar_perfil(sender, instance, update_fields=None, **kwargs):
     """Guarda el perfil cuando se actualiza el usuario."""
+    # El login solo actualiza last_login: no hace falta reescribir el perfil
+    # (y así no se invalidan sus ETags en cada inicio de sesión).
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
     if hasattr(instance, 'perfil'):
         instance.perfil.save()
+
+
+@receiver(post_save, sender=Valoracion)
+def actualizar_rating_valorado(sender, instance, **kwargs):
+    """Recalcula el rating (y la marca de modificación) del perfil valorado."""
+    Perfil.recalcular_ratings([instance.evaluado_id])
+
+
+@receiver(post_delete, sender=Valoracion)
+def descontar_rating_valorado(sender, instance, **kwargs):
+    """
+    Recalcula el rating del perfil valorado al confirmar el borrado.
+
+    Cubre los borrados en cascada (actividades, cuentas); los que no emiten
+    señales (``_raw_delete``, SQL directo) deben llamar a
+    ``Perfil.recalcular_ratings_al_confirmar`` explícitamente.
+    """
+    Perfil.recalcular_ratings_al_confirmar([instance.evaluado_id])
+
+
+@receiver(post_delete, sender=Valoracion)
+def marcar_estadistica_valoracion(sender, instance, **kwargs):
+    """La valoración borrada pudo contar en las estadísticas del organizador de su actividad."""
+    acumular_al_confirmar(marcar_actividades, [instance.actividad_id])
+
+
+@receiver(post_delete, sender=Actividad)
+def marcar_estadistica_actividad(sender, instance, **kwargs):
+    """Una actividad finalizada borrada deja de contar en las estadísticas de su día."""
+    if instance.cerrada:
+        acumular_al_confirmar(marcar_dias, [(instance.organizador_id, instance.fecha)])
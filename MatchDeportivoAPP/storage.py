@@ -0,0 +1,240 @@
+"""
+Almacenamiento de archivos estáticos para producción.
+
+Extiende ``ManifestStaticFilesStorage`` (nombres con hash de contenido, aptos
+para caché de larga duración) con pasos extra durante ``collectstatic``:
+
+1. Minifica cada archivo de ``static/js``.
+2. Recomprime los PNG y redimensiona los iconos de ``ICONOS_PERFIL``
+   (requiere Pillow; si no está instalado se omite este paso).
+3. Escribe hermanos ``.gz`` (y ``.br`` si está instalado ``brotli``) de cada
+   archivo de texto con hash, para que el servidor web los entregue tal cual.
+
+Al final se registra el ahorro en bytes por archivo.
+"""
+import gzip
+import io
+import logging
+import os
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from .constants import ICONOS_PERFIL
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Lado máximo (px) de los iconos de perfil. Se muestran a 70px; 192px cubre
+# pantallas de alta densidad.
+TAMANO_MAXIMO_ICONO = 192
+
+EXTENSIONES_COMPRIMIBLES = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.map')
+
+# Caracteres tras los cuales una "/" inicia una expresión regular y no una división.
+_ANTES_DE_REGEX = set('(,=:[!&|?{};+-*%<>~^')
+
+
+def minificar_js(codigo):
+    """
+    Minificador conservador de JavaScript.
+
+    Elimina comentarios, indentación, espacios repetidos y líneas vacías sin
+    tocar strings, template literals ni expresiones regulares. Conserva los
+    saltos de línea para no depender de la inserción automática de ``;``.
+    """
+    segmentos = []  # (es_codigo, texto)
+    codigo_actual = []
+    ultimo = ''  # último carácter significativo de código
+    i, n = 0, len(codigo)
+
+    def cerrar_codigo():
+        if codigo_actual:
+            segmentos.append((True, ''.join(codigo_actual)))
+            codigo_actual.clear()
+
+    while i < n:
+        c = codigo[i]
+        siguiente = codigo[i + 1] if i + 1 < n else ''
+
+        if c in '"\'`':
+            j = i + 1
+            while j < n and codigo[j] != c:
+                j += 2 if codigo[j] == '\\' else 1
+            cerrar_codigo()
+            segmentos.append((False, codigo[i:j + 1]))
+            ultimo, i = c, j + 1
+            continue
+
+        if c == '/' and siguiente == '/':
+            fin = codigo.find('\n', i)
+            i = n if fin == -1 else fin
+            continue
+
+        if c == '/' and siguiente == '*':
+            fin = codigo.find('*/', i + 2)
+            fin = n if fin == -1 else fin + 2
+            codigo_actual.append('\n' if '\n' in codigo[i:fin] else ' ')
+            i = fin
+            continue
+
+        if c == '/' and (not ultimo or ultimo in _ANTES_DE_REGEX):
+            j, en_clase = i + 1, False
+            while j < n and codigo[j] != '\n':
+                if codigo[j] == '\\':
+                    j += 2
+                    continue
+                if codigo[j] == '[':
+                    en_clase = True
+                elif codigo[j] == ']':
+                    en_clase = False
+                elif codigo[j] == '/' and not en_clase:
+                    break
+                j += 1
+            cerrar_codigo()
+            segmentos.append((False, codigo[i:j + 1]))
+            ultimo, i = '/', j + 1
+            continue
+
+        codigo_actual.append(c)
+        if not c.isspace():
+            ultimo = c
+        i += 1
+
+    cerrar_codigo()
+
+    partes = []
+    for es_codigo, texto in segmentos:
+        if es_codigo:
+            texto = re.sub(r'[ \t]+', ' ', texto)
+            texto = re.sub(r'\s*\n\s*', '\n', texto)
+        partes.append(texto)
+
+    return ''.join(partes).strip() + '\n'
+
+
+class MatchDeportivoStaticStorage(ManifestStaticFilesStorage):
+    """Manifest con hash + minificación, optimización de imágenes y precompresión."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run=dry_run, **options)
+            return
+
+        self._ahorro = {}
+        self._preprocesar_js(paths)
+        self._optimizar_imagenes(paths)
+
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+        yield from self._precomprimir()
+        self._reportar_ahorro()
+
+    # ============================================
+    # PASOS PREVIOS AL HASH
+    # ============================================
+
+    def _reemplazar(self, paths, nombre, contenido, original=None):
+        """Escribe ``contenido`` en STATIC_ROOT y hace que el manifiesto lo lea desde aquí."""
+        if self.exists(nombre):
+            self.delete(nombre)
+        self._save(nombre, ContentFile(contenido))
+        paths[nombre] = (self, nombre)
+        self._ahorro[nombre] = [original if original is not None else len(contenido), len(contenido)]
+
+    def _leer_fuente(self, paths, nombre):
+        storage, ruta = paths[nombre]
+        with storage.open(ruta) as archivo:
+            return archivo.read()
+
+    def _preprocesar_js(self, paths):
+        """Minifica los .js de static/js."""
+        for nombre in sorted(paths):
+            if nombre.startswith('js/') and nombre.endswith('.js') and not nombre.endswith('.min.js'):
+                original = self._leer_fuente(paths, nombre)
+                minificado = minificar_js(original.decode('utf-8')).encode('utf-8')
+                if len(minificado) < len(original):
+                    self._reemplazar(paths, nombre, minificado, original=len(original))
+
+    def _optimizar_imagenes(self, paths):
+        """Redimensiona los iconos de perfil y recomprime todos los PNG."""
+        if Image is None:
+            logger.warning("Pillow no está instalado: se omite la optimización de imágenes")
+            return
+
+        iconos = {icono['path'] for icono in ICONOS_PERFIL}
+        for nombre in sorted(paths):
+            if not nombre.lower().endswith('.png'):
+                continue
+
+            original = self._leer_fuente(paths, nombre)
+            imagen = Image.open(io.BytesIO(original))
+            if nombre in iconos:
+                imagen.thumbnail((TAMANO_MAXIMO_ICONO, TAMANO_MAXIMO_ICONO), Image.LANCZOS)
+
+            candidatos = [imagen]
+            if nombre in iconos and imagen.mode in ('RGB', 'RGBA'):
+                # Los iconos son planos: una paleta de 256 colores no se nota.
+                candidatos.append(imagen.quantize(256, method=Image.Quantize.FASTOCTREE))
+
+            mejor = original
+            for candidato in candidatos:
+                buffer = io.BytesIO()
+                candidato.save(buffer, format='PNG', optimize=True)
+                if len(buffer.getvalue()) < len(mejor):
+                    mejor = buffer.getvalue()
+
+            if mejor is not original:
+                self._reemplazar(paths, nombre, mejor, original=len(original))
+
+    # ============================================
+    # PRECOMPRESIÓN
+    # ============================================
+
+    def _precomprimir(self):
+        """Escribe .gz/.br junto a cada archivo de texto con hash."""
+        for nombre_hash in sorted(set(self.hashed_files.values())):
+            if not nombre_hash.endswith(EXTENSIONES_COMPRIMIBLES):
+                continue
+
+            with self.open(nombre_hash) as archivo:
+                contenido = archivo.read()
+
+            variantes = {'.gz': gzip.compress(contenido, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variantes['.br'] = brotli.compress(contenido, quality=11)
+
+            for extension, comprimido in variantes.items():
+                if len(comprimido) >= len(contenido):
+                    continue
+                destino = nombre_hash + extension
+                if self.exists(destino):
+                    self.delete(destino)
+                self._save(destino, ContentFile(comprimido))
+                self._ahorro[destino] = [len(contenido), len(comprimido)]
+                yield nombre_hash, destino, True
+
+    def _reportar_ahorro(self):
+        total_original = total_final = 0
+        for nombre, (original, final) in sorted(self._ahorro.items()):
+            if os.path.splitext(nombre)[1] in ('.gz', '.br'):
+                logger.info(f"{nombre}: {original} -> {final} bytes en transferencia")
+                continue
+            total_original += original
+            total_final += final
+            porcentaje = 100 * (original - final) / original if original else 0
+            logger.info(f"{nombre}: {original} -> {final} bytes (-{porcentaje:.1f}%)")
+        logger.info(
+            f"Archivos estáticos optimizados: {total_original} -> {total_final} bytes "
+            f"(ahorro de {total_original - total_final} bytes)"
+        )
@@ -1,3 +1,1403 @@
-from django.test import TestCase
+"""
+Pruebas de MatchDeportivoAPP.
 
-# Create your tests here.
+    python manage.py test MatchDeportivoAPP
+
+``RendimientoVistasTests``: para cada URL con nombre de
+``MatchDeportivo/urls.py`` se mide la cantidad de consultas SQL con datos de
+dos tamaños (``TAMANO_PEQUENO`` y ``TAMANO_GRANDE`` unidades alrededor del
+usuario principal). Si la cantidad cambia con el volumen la vista tiene un
+N+1, y la prueba falla mostrando la diferencia entre las consultas
+capturadas en ambos tamaños.
+
+También se acota el tiempo de cada vista con los datos grandes respecto de
+una corrida de calibración (una página estática), para que el límite se
+adapte a la velocidad de la máquina.
+
+El resto de las clases prueba el comportamiento de cada funcionalidad.
+"""
+import difflib
+import importlib
+import io
+import logging
+import os
+import re
+import runpy
+import statistics
+import tempfile
+import time
+from datetime import datetime, time as hora, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core import signing
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.cache import cache
+from django.db import IntegrityError, connection, router, transaction
+from django.http import Http404, HttpResponse
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, get_resolver, path, reverse
+from django.utils import timezone
+
+from .al_confirmar import acumular_al_confirmar
+from .admin import UMBRAL_CONTEO_ESTIMADO, ConteoEstimadoPaginator, conteo_estimado
+from .calendario import SALT_TOKEN, token_calendario
+from .checks import sesiones_en_cache_compartida
+from .decorators import lectura_en_replica
+from . import estadisticas, facetas
+from .constants import NOTIFICACIONES_AGRUPACION_HORAS
+from .eliminacion import iniciar_eliminacion, purgar_cuenta
+from .geocoding import geocodificar
+from .lista_espera import buscar_conflicto_horario
+from .logs_en_cola import LOGGER_DESTINOS, ManejadorEnCola
+from .models import (
+    Actividad, ConteoFaceta, DiaPorAgregar, EliminacionCuenta, EstadisticaOrganizador, ListaEspera, Log,
+    Notificacion, Perfil, Valoracion,
+)
+from .replicas import COOKIE_FIJACION, FijarPrimariaMiddleware
+from .resumen_notificaciones import Aviso, notificar_agrupado
+from .storage import MatchDeportivoStaticStorage
+from .throttling import TokenBucket, hashes_evitados
+from .views import VistaDiferida, calendario as vistas_calendario
+from .views.actividades import marcar_conflictos
+
+TAMANO_PEQUENO = 2
+TAMANO_GRANDE = 12
+
+# Una vista puede tardar a lo más este múltiplo de la calibración (con un
+# piso en segundos para que el ruido de una máquina muy rápida no falle)
+FACTOR_TIEMPO_MAXIMO = 60
+PISO_TIEMPO_MAXIMO = 0.25
+
+# Página estática usada como calibración
+URL_CALIBRACION = 'sobre_nosotros'
+
+
+def _normalizar_sql(sql):
+    """Reemplaza los literales numéricos y de texto para comparar consultas entre tamaños."""
+    sql = re.sub(r'"s\d+_x\d+"', '"savepoint"', sql)
+    sql = re.sub(r"'[^']*'", "'?'", sql)
+    sql = re.sub(r'\b\d+\b', 'N', sql)
+    # IN (N, N, N) -> IN (...)
+    return re.sub(r'\((?:N|\'\?\')(?:, (?:N|\'\?\'))*\)', '(...)', sql)
+
+
+def _urls_con_nombre():
+    """Nombres de las URLs del proyecto (sin las del admin de Django)."""
+    nombres = []
+    for patron in get_resolver().url_patterns:
+        if isinstance(patron, URLPattern) and patron.name and patron.name not in nombres:
+            nombres.append(patron.name)
+    return nombres
+
+
+@override_settings(
+    # Las consultas de sesión deben contarse igual en ambos tamaños
+    SESSION_ENGINE='django.contrib.sessions.backends.db',
+    LOGIN_THROTTLE_HABILITADO=False,
+    ELIMINACION_CUENTA_EN_HILO=False,
+    SECURE_SSL_REDIRECT=False,
+)
+class RendimientoVistasTests(TestCase):
+    """Cantidad de consultas constante y tiempo acotado para cada vista."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.principal = User.objects.create_user(
+            'principal', 'principal@ejemplo.test', 'x', is_staff=True, is_superuser=True,
+        )
+        cls.principal.perfil.nombre_completo = 'Usuario Principal'
+        cls.principal.perfil.save()
+        cls.participante = User.objects.create_user('participante', 'participante@ejemplo.test', 'x')
+        cls.participante.perfil.nombre_completo = 'Participante'
+        cls.participante.perfil.save()
+
+        manana = timezone.localdate() + timedelta(days=1)
+        ayer = timezone.localdate() - timedelta(days=1)
+        # Actividad abierta y actividad cerrada organizadas por el principal
+        cls.abierta = Actividad.objects.create(
+            organizador=cls.principal, titulo='Abierta', deporte='futbol', lugar='Estadio Nacional',
+            nivel='Intermedio', fecha=manana, hora_inicio=hora(9), hora_fin=hora(10), cupos=500,
+        )
+        cls.cerrada = Actividad.objects.create(
+            organizador=cls.principal, titulo='Cerrada', deporte='tenis', lugar='Parque Bicentenario',
+            nivel='Avanzado', fecha=ayer, hora_inicio=hora(9), hora_fin=hora(10), cupos=500,
+            cerrada=True, fecha_cierre=timezone.now(),
+        )
+        # Actividad llena (con lista de espera)
+        cls.llena = Actividad.objects.create(
+            organizador=cls.principal, titulo='Llena', deporte='futbol', lugar='Estadio Nacional',
+            nivel='Intermedio', fecha=manana, hora_inicio=hora(12), hora_fin=hora(13), cupos=0,
+        )
+        cls.abierta.participantes.add(cls.participante)
+        cls.cerrada.participantes.add(cls.participante)
+        cls.llena.participantes.add(cls.participante)
+        cls.unidades = 0
+
+    @classmethod
+    def sembrar(cls, cantidad):
+        """Agrega ``cantidad`` unidades de datos que afectan a todas las vistas."""
+        deportes = ['futbol', 'basketball', 'tenis', 'running']
+        for _ in range(cantidad):
+            i = cls.unidades
+            cls.unidades += 1
+            jugador = User.objects.create_user(f'jugador{i}', f'jugador{i}@ejemplo.test', 'x')
+            jugador.perfil.nombre_completo = f'Jugador {i}'
+            jugador.perfil.save()
+
+            # Participa (o espera) en las actividades del principal
+            cls.abierta.participantes.add(jugador)
+            cls.cerrada.participantes.add(jugador)
+            ListaEspera.objects.create(actividad=cls.llena, usuario=jugador)
+
+            # Organiza actividades propias, futuras y pasadas, con el principal inscrito
+            for dias, cerrada in ((2 + i, False), (-2 - i, True)):
+                actividad = Actividad.objects.create(
+                    organizador=jugador, titulo=f'Actividad {i}', deporte=deportes[i % len(deportes)],
+                    lugar='Parque OHiggins', nivel='Principiante',
+                    fecha=timezone.localdate() + timedelta(days=dias),
+                    hora_inicio=hora(18), hora_fin=hora(19), cupos=10, cerrada=cerrada,
+                )
+                actividad.participantes.add(cls.principal, cls.participante)
+
+            # Valoraciones dadas y recibidas
+            Valoracion.objects.create(evaluador=jugador, evaluado=cls.principal, actividad=cls.cerrada, puntuacion=4)
+            Valoracion.objects.create(evaluador=jugador, evaluado=cls.participante, actividad=cls.cerrada, puntuacion=5)
+            Valoracion.objects.create(evaluador=cls.principal, evaluado=jugador, actividad=cls.cerrada, puntuacion=3)
+
+            Notificacion.objects.create(
+                usuario=cls.principal, actividad=cls.abierta, tipo='CONFIRMACION_UNION', mensaje=f'Aviso {i}',
+            )
+            Log.objects.create(usuario=jugador, accion='join_activity', descripcion=f'Log {i}')
+
+    def argumentos(self, nombre):
+        """Argumentos de cada URL con nombre (una URL nueva sin entrada aquí hace fallar la prueba)."""
+        return {
+            'detalle_actividad': {'pk': self.abierta.pk},
+            'editar_actividad': {'pk': self.abierta.pk},
+            'cancelar_actividad': {'pk': self.abierta.pk},
+            'cerrar_actividad': {'pk': self.abierta.pk},
+            'valorar_participantes': {'pk': self.cerrada.pk},
+            'valorar_usuario': {'actividad_pk': self.cerrada.pk, 'usuario_pk': self.participante.pk},
+            'unirse_actividad': {'pk': self.abierta.pk},
+            'salir_actividad': {'pk': self.abierta.pk},
+            'gestionar_participantes': {'pk': self.abierta.pk},
+            'quitar_participante': {'actividad_pk': self.abierta.pk, 'user_id': self.participante.pk},
+            'perfil_participante': {'user_id': self.participante.pk},
+            'api_actividad': {'pk': self.abierta.pk},
+            'calendario_ics': {'token': token_calendario(self.principal.pk, 0)},
+            'exportar_datos': {'recurso': 'valoraciones'},
+        }.get(nombre, {})
+
+    def medir(self, nombre):
+        """``(status, [sql], segundos)`` de un GET a la URL, revirtiendo sus efectos."""
+        cache.clear()
+        cliente = Client(raise_request_exception=False)
+        cliente.force_login(self.principal)
+        url = reverse(nombre, kwargs=self.argumentos(nombre))
+
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as consultas:
+                inicio = time.perf_counter()
+                respuesta = cliente.get(url)
+                if respuesta.streaming:
+                    b''.join(respuesta.streaming_content)
+                segundos = time.perf_counter() - inicio
+            transaction.set_rollback(True)
+        return respuesta.status_code, [consulta['sql'] for consulta in consultas], segundos
+
+    def medir_todas(self, nombres):
+        return {nombre: self.medir(nombre) for nombre in nombres}
+
+    def calibrar(self):
+        """Mediana del tiempo de la página estática de calibración."""
+        return statistics.median(self.medir(URL_CALIBRACION)[2] for _ in range(5))
+
+    def test_consultas_constantes_y_tiempo_acotado(self):
+        nombres = _urls_con_nombre()
+        self.assertIn(URL_CALIBRACION, nombres)
+
+        self.sembrar(TAMANO_PEQUENO)
+        # Calentamiento: cachés de ContentType, plantillas, etc.
+        self.medir_todas(nombres)
+        pequeno = self.medir_todas(nombres)
+
+        self.sembrar(TAMANO_GRANDE - TAMANO_PEQUENO)
+        grande = self.medir_todas(nombres)
+        limite = max(FACTOR_TIEMPO_MAXIMO * self.calibrar(), PISO_TIEMPO_MAXIMO)
+
+        for nombre in nombres:
+            with self.subTest(url=nombre):
+                status_p, sql_p, _ = pequeno[nombre]
+                status_g, sql_g, segundos = grande[nombre]
+                self.assertLess(status_p, 500, f"{nombre} respondió {status_p}")
+                self.assertLess(status_g, 500, f"{nombre} respondió {status_g}")
+
+                if len(sql_p) != len(sql_g):
+                    diferencia = '\n'.join(difflib.unified_diff(
+                        [_normalizar_sql(sql) for sql in sql_p],
+                        [_normalizar_sql(sql) for sql in sql_g],
+                        fromfile=f'{nombre} ({TAMANO_PEQUENO} unidades): {len(sql_p)} consultas',
+                        tofile=f'{nombre} ({TAMANO_GRANDE} unidades): {len(sql_g)} consultas',
+                        lineterm='',
+                    ))
+                    self.fail(f"La cantidad de consultas de '{nombre}' crece con los datos:\n{diferencia}")
+
+                self.assertLessEqual(
+                    segundos, limite,
+                    f"'{nombre}' tardó {1000 * segundos:.0f} ms con {TAMANO_GRANDE} unidades "
+                    f"(límite {1000 * limite:.0f} ms = {FACTOR_TIEMPO_MAXIMO}x calibración)",
+                )
+
+
+@mock.patch('MatchDeportivoAPP.replicas.alias_replica', return_value='replica')
+class ReplicasTests(SimpleTestCase):
+    """Las vistas marcadas leen de la réplica; quien escribe queda fijado a la primaria."""
+
+    def atender(self, escribe=False, cookies=None):
+        """Pasa un GET por el middleware hasta una vista marcada que anota dónde leyó."""
+        @lectura_en_replica
+        def vista(request):
+            lecturas = [router.db_for_read(Actividad)]
+            if escribe:
+                lecturas.append(router.db_for_write(Actividad))
+                lecturas.append(router.db_for_read(Actividad))
+            lecturas.append(router.db_for_read(Session))
+            return HttpResponse(','.join(lecturas))
+
+        request = RequestFactory().get('/')
+        request.COOKIES.update(cookies or {})
+        return FijarPrimariaMiddleware(vista)(request)
+
+    def test_lecturas_a_la_replica_y_escrituras_a_la_primaria(self, _):
+        respuesta = self.atender()
+        # Las sesiones se leen siempre de la primaria
+        self.assertEqual(respuesta.content, b'replica,default')
+        self.assertNotIn(COOKIE_FIJACION, respuesta.cookies)
+
+        # Después de escribir, el mismo request vuelve a la primaria y el navegador queda fijado
+        respuesta = self.atender(escribe=True)
+        self.assertEqual(respuesta.content, b'replica,default,default,default')
+        self.assertEqual(respuesta.cookies[COOKIE_FIJACION]['max-age'], settings.REPLICA_FIJACION_SEGUNDOS)
+
+        respuesta = self.atender(cookies={COOKIE_FIJACION: '1'})
+        self.assertEqual(respuesta.content, b'default,default')
+
+    def test_fuera_de_las_vistas_marcadas_todo_va_a_la_primaria(self, _):
+        self.assertEqual(router.db_for_read(Actividad), 'default')
+        self.assertEqual(router.db_for_write(Actividad), 'default')
+
+
+class SesionesEnCacheTests(TestCase):
+    """El motor de sesiones en caché exige una caché compartida entre workers."""
+
+    @override_settings(
+        SESSION_ENGINE='MatchDeportivoAPP.sessions',
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    )
+    def test_rechaza_cache_por_proceso(self):
+        errores = sesiones_en_cache_compartida(None)
+        self.assertEqual([error.id for error in errores], ['sesiones.E001'])
+
+    @override_settings(
+        SESSION_ENGINE='MatchDeportivoAPP.sessions',
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache'}},
+    )
+    def test_acepta_cache_compartida(self):
+        self.assertEqual(sesiones_en_cache_compartida(None), [])
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+    def test_sesiones_en_bd_no_requieren_cache(self):
+        self.assertEqual(sesiones_en_cache_compartida(None), [])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class RatingsTests(TestCase):
+    """Los agregados de rating del perfil siguen a las valoraciones."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = User.objects.create_user('organizador', 'organizador@ejemplo.test', 'x')
+        cls.jugadores = [User.objects.create_user(f'jugador{i}', f'jugador{i}@ejemplo.test', 'x') for i in range(3)]
+        cls.actividad = Actividad.objects.create(
+            organizador=cls.organizador, titulo='Partido', deporte='futbol', lugar='Estadio Nacional',
+            fecha=timezone.localdate() - timedelta(days=1), hora_inicio=hora(9), hora_fin=hora(10),
+            cupos=5, cerrada=True, fecha_cierre=timezone.now(),
+        )
+        cls.actividad.participantes.add(*cls.jugadores)
+
+    def rating(self, usuario):
+        perfil = Perfil.objects.get(usuario=usuario)
+        return perfil.rating_suma, perfil.rating_cantidad
+
+    def test_valoracion_en_lote_actualiza_agregados(self):
+        self.client.force_login(self.organizador)
+        url = reverse('valorar_participantes', kwargs={'pk': self.actividad.pk})
+        datos = {f'puntuacion_{j.pk}': p for j, p in zip(self.jugadores, (5, 3))}
+        self.client.post(url, datos)
+        self.assertEqual(self.rating(self.jugadores[0]), (5, 1))
+        self.assertEqual(self.rating(self.jugadores[1]), (3, 1))
+        self.assertEqual(self.rating(self.jugadores[2]), (0, 0))
+
+        # Reenviar actualiza la valoración existente en lugar de sumar otra
+        self.client.post(url, {f'puntuacion_{self.jugadores[0].pk}': 2})
+        self.assertEqual(self.rating(self.jugadores[0]), (2, 1))
+
+    def test_borrar_valoraciones_recalcula_una_vez_por_transaccion(self):
+        for evaluador in (self.organizador, *self.jugadores[1:]):
+            Valoracion.objects.create(
+                evaluador=evaluador, evaluado=self.jugadores[0], actividad=self.actividad, puntuacion=4,
+            )
+        self.assertEqual(self.rating(self.jugadores[0]), (12, 3))
+
+        recalcular = mock.patch.object(Perfil, 'recalcular_ratings', wraps=Perfil.recalcular_ratings)
+        with recalcular as recalculo, self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Valoracion.objects.filter(evaluador=self.organizador).delete()
+                Valoracion.objects.filter(evaluador=self.jugadores[1]).delete()
+            recalculo.assert_not_called()
+        recalculo.assert_called_once_with({self.jugadores[0].pk})
+        self.assertEqual(self.rating(self.jugadores[0]), (4, 1))
+
+    def test_borrar_actividad_recalcula_en_cascada(self):
+        Valoracion.objects.create(
+            evaluador=self.organizador, evaluado=self.jugadores[0], actividad=self.actividad, puntuacion=5,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.actividad.delete()
+        self.assertEqual(self.rating(self.jugadores[0]), (0, 0))
+
+    def test_savepoint_revertido_no_pierde_el_recalculo(self):
+        Valoracion.objects.create(
+            evaluador=self.organizador, evaluado=self.jugadores[0], actividad=self.actividad, puntuacion=5,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        Valoracion.objects.all().delete()
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                Valoracion.objects.all().delete()
+        self.assertEqual(self.rating(self.jugadores[0]), (0, 0))
+
+
+class AlConfirmarTests(TestCase):
+    """``acumular_al_confirmar`` ejecuta cada función una vez por transacción confirmada."""
+
+    def test_un_callback_por_transaccion(self):
+        funcion = mock.Mock()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                for i in range(50):
+                    acumular_al_confirmar(funcion, [i % 10])
+                funcion.assert_not_called()
+        self.assertEqual(len(callbacks), 1)
+        funcion.assert_called_once_with(set(range(10)))
+
+    def test_savepoint_revertido_no_pierde_el_vaciado(self):
+        funcion, otra = mock.Mock(), mock.Mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                try:
+                    with transaction.atomic():
+                        acumular_al_confirmar(funcion, [1])
+                        raise ValueError
+                except ValueError:
+                    pass
+                acumular_al_confirmar(funcion, [2])
+                acumular_al_confirmar(otra, ['a'])
+        funcion.assert_called_once_with({1, 2})
+        otra.assert_called_once_with({'a'})
+
+    def test_transaccion_revertida_no_ejecuta(self):
+        funcion = mock.Mock()
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    acumular_al_confirmar(funcion, [1])
+                    raise ValueError
+            except ValueError:
+                pass
+        funcion.assert_not_called()
+
+
+class LoadtestTests(TransactionTestCase):
+    """El escenario de carga llena los cupos sin sobrevenderlos y limpia sus datos."""
+
+    def test_rush_llena_los_cupos_y_verifica_integridad(self):
+        salida = io.StringIO()
+        call_command(
+            'loadtest', escenario='rush', usuarios=5, hilos=1, actividades=2, cupos=3,
+            iteraciones=3, semilla=7, stdout=salida,
+        )
+        reporte = salida.getvalue()
+        # 5 usuarios x 2 actividades: se unen 10 veces y navegan la lista 5 veces
+        self.assertRegex(reporte, r'unirse\s+10\s+0\s')
+        self.assertRegex(reporte, r'actividades\s+5\s+0\s')
+        self.assertEqual(reporte.count('3/3 inscritos, 0 cupos libres, 2 en espera -> OK'), 2)
+        self.assertFalse(Actividad.objects.exists())
+        self.assertFalse(User.objects.exists())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ListaEsperaTests(TestCase):
+    """Los cupos liberados pasan a la lista de espera en orden de llegada."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = User.objects.create_user('organizador', 'organizador@ejemplo.test', 'x')
+        cls.jugadores = [User.objects.create_user(f'jugador{i}', f'jugador{i}@ejemplo.test', 'x') for i in range(4)]
+        cls.actividad = Actividad.objects.create(
+            organizador=cls.organizador, titulo='Partido', deporte='futbol', lugar='Estadio Nacional',
+            fecha=timezone.localdate() + timedelta(days=1), hora_inicio=hora(9), hora_fin=hora(10), cupos=1,
+        )
+
+    def como(self, usuario):
+        cliente = Client()
+        cliente.force_login(usuario)
+        return cliente
+
+    def unirse(self, usuario):
+        self.como(usuario).post(reverse('unirse_actividad', kwargs={'pk': self.actividad.pk}))
+
+    def estado(self):
+        self.actividad.refresh_from_db()
+        return (
+            self.actividad.cupos,
+            set(self.actividad.participantes.values_list('username', flat=True)),
+            list(self.actividad.lista_espera.values_list('usuario__username', flat=True)),
+        )
+
+    def test_llena_y_salir_promueve_en_orden_de_llegada(self):
+        for jugador in self.jugadores[:3]:
+            self.unirse(jugador)
+        self.assertEqual(self.estado(), (0, {'jugador0'}, ['jugador1', 'jugador2']))
+
+        self.como(self.jugadores[0]).post(reverse('salir_actividad', kwargs={'pk': self.actividad.pk}))
+        self.assertEqual(self.estado(), (0, {'jugador1'}, ['jugador2']))
+        self.assertTrue(Notificacion.objects.filter(
+            usuario=self.jugadores[1], tipo='PROMOCION_LISTA_ESPERA',
+        ).exists())
+
+        self.como(self.organizador).post(reverse(
+            'quitar_participante', kwargs={'actividad_pk': self.actividad.pk, 'user_id': self.jugadores[1].pk},
+        ))
+        self.assertEqual(self.estado(), (0, {'jugador2'}, []))
+
+        # Sin nadie esperando, el cupo queda libre
+        self.como(self.jugadores[2]).post(reverse('salir_actividad', kwargs={'pk': self.actividad.pk}))
+        self.assertEqual(self.estado(), (1, set(), []))
+
+    def test_promocion_salta_a_quien_tiene_conflicto(self):
+        for jugador in self.jugadores[:3]:
+            self.unirse(jugador)
+        # jugador1 ya tiene otra actividad a la misma hora
+        Actividad.objects.create(
+            organizador=self.jugadores[1], titulo='Otro partido', deporte='tenis', lugar='Parque',
+            fecha=self.actividad.fecha, hora_inicio=hora(9, 30), hora_fin=hora(11), cupos=4,
+        )
+        self.como(self.jugadores[0]).post(reverse('salir_actividad', kwargs={'pk': self.actividad.pk}))
+        self.assertEqual(self.estado(), (0, {'jugador2'}, ['jugador1']))
+
+    def test_quitar_a_quien_no_participa_no_libera_cupo(self):
+        self.unirse(self.jugadores[0])
+        self.unirse(self.jugadores[1])
+        self.como(self.organizador).post(reverse(
+            'quitar_participante', kwargs={'actividad_pk': self.actividad.pk, 'user_id': self.jugadores[3].pk},
+        ))
+        self.assertEqual(self.estado(), (0, {'jugador0'}, ['jugador1']))
+
+        # Tampoco a quien solo está en la lista de espera
+        self.como(self.organizador).post(reverse(
+            'quitar_participante', kwargs={'actividad_pk': self.actividad.pk, 'user_id': self.jugadores[1].pk},
+        ))
+        self.assertEqual(self.estado(), (0, {'jugador0'}, ['jugador1']))
+
+    def test_actividad_cerrada_no_admite_ni_promueve(self):
+        self.unirse(self.jugadores[0])
+        self.unirse(self.jugadores[1])
+        Actividad.objects.filter(pk=self.actividad.pk).update(cerrada=True, fecha_cierre=timezone.now())
+
+        self.unirse(self.jugadores[2])
+        self.assertEqual(self.estado(), (0, {'jugador0'}, ['jugador1']))
+
+        # El cupo liberado no pasa a la lista de espera
+        self.como(self.jugadores[0]).post(reverse('salir_actividad', kwargs={'pk': self.actividad.pk}))
+        self.assertEqual(self.estado(), (1, set(), ['jugador1']))
+        self.assertFalse(Notificacion.objects.filter(tipo='PROMOCION_LISTA_ESPERA').exists())
+
+
+class ResumenNotificacionesTests(TestCase):
+    """Los avisos agrupables se suman a la notificación abierta del usuario."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('vecino', 'vecino@ejemplo.test', 'x')
+        organizador = User.objects.create_user('organizador', 'organizador@ejemplo.test', 'x')
+        cls.actividades = [
+            Actividad.objects.create(
+                organizador=organizador, titulo=f'Partido {i}', deporte='futbol', lugar='Estadio Nacional',
+                fecha=timezone.localdate() + timedelta(days=1), hora_inicio=hora(9 + i), cupos=5,
+            )
+            for i in range(3)
+        ]
+
+    def avisar(self, actividad):
+        return notificar_agrupado('NUEVA_ACTIVIDAD', [
+            Aviso(self.usuario.pk, actividad.pk, actividad.titulo, f'Nueva actividad: {actividad.titulo}'),
+        ])
+
+    def bandeja(self):
+        return list(Notificacion.objects.filter(usuario=self.usuario).order_by('pk'))
+
+    def test_agrupa_en_la_notificacion_abierta(self):
+        self.assertEqual(self.avisar(self.actividades[0]), (1, 0))
+        self.assertEqual(self.bandeja()[0].mensaje, 'Nueva actividad: Partido 0')
+
+        self.assertEqual(self.avisar(self.actividades[1]), (0, 1))
+        self.assertEqual(self.avisar(self.actividades[2]), (0, 1))
+        [resumen] = self.bandeja()
+        self.assertEqual(resumen.contador, 3)
+        self.assertEqual(resumen.actividades_ids, [a.pk for a in self.actividades])
+        self.assertEqual(resumen.actividad_id, self.actividades[2].pk)
+        self.assertIn('3 nuevas actividades', resumen.mensaje)
+
+    def test_fuera_de_la_ventana_abre_otra(self):
+        self.avisar(self.actividades[0])
+        ventana = timedelta(hours=NOTIFICACIONES_AGRUPACION_HORAS)
+
+        Notificacion.objects.update(fecha_creacion=timezone.now() - ventana + timedelta(minutes=1))
+        self.assertEqual(self.avisar(self.actividades[1]), (0, 1))
+
+        Notificacion.objects.update(fecha_creacion=timezone.now() - ventana - timedelta(minutes=1))
+        self.assertEqual(self.avisar(self.actividades[2]), (1, 0))
+        self.assertEqual([n.contador for n in self.bandeja()], [2, 1])
+
+    def test_leida_abre_otra(self):
+        self.avisar(self.actividades[0])
+        self.avisar(self.actividades[1])
+        Notificacion.objects.update(leida=True)
+
+        self.assertEqual(self.avisar(self.actividades[2]), (1, 0))
+        leida, nueva = self.bandeja()
+        self.assertEqual((leida.contador, leida.leida), (2, True))
+        self.assertEqual((nueva.contador, nueva.leida), (1, False))
+        self.assertEqual(nueva.mensaje, 'Nueva actividad: Partido 2')
+
+    def test_borrar_actividad_conserva_el_resumen(self):
+        for actividad in self.actividades:
+            self.avisar(actividad)
+        self.actividades[2].delete()
+
+        [resumen] = self.bandeja()
+        self.assertIsNone(resumen.actividad_id)
+        self.assertEqual(resumen.contador, 3)
+        self.assertEqual(len(resumen.actividades_ids), 3)
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    LOGIN_THROTTLE_HABILITADO=True,
+    LOGIN_THROTTLE={'IP': {'capacidad': 20, 'por_minuto': 10}, 'EMAIL': {'capacidad': 3, 'por_minuto': 1}},
+)
+class LimitacionLoginTests(TestCase):
+    """Los baldes de fichas cortan los intentos antes de verificar la contraseña."""
+
+    def setUp(self):
+        cache.clear()
+
+    @mock.patch('MatchDeportivoAPP.throttling.time.time')
+    def test_balde_se_vacia_y_se_recarga(self, reloj):
+        balde = TokenBucket('prueba', capacidad=3, por_minuto=6)  # una ficha cada 10 s
+        reloj.return_value = 1000.0
+        self.assertEqual([balde.consumir('x') for _ in range(4)], [True, True, True, False])
+
+        reloj.return_value = 1009.0
+        self.assertFalse(balde.consumir('x'))
+        # El intento rechazado no reinicia la recarga
+        reloj.return_value = 1010.0
+        self.assertTrue(balde.consumir('x'))
+        self.assertFalse(balde.consumir('x'))
+
+        # La recarga no supera la capacidad
+        reloj.return_value = 2000.0
+        self.assertEqual([balde.consumir('x') for _ in range(4)], [True, True, True, False])
+        # Cada identificador tiene su propio balde
+        self.assertTrue(balde.consumir('y'))
+
+    def test_bloqueo_por_email_sin_verificar_contrasena(self):
+        User.objects.create_user('victima', 'victima@ejemplo.test', 'correcta-123')
+        url = reverse('inicioSesion')
+        estados = [
+            self.client.post(
+                url, {'email': 'victima@ejemplo.test', 'password': f'incorrecta-{i}'}, REMOTE_ADDR=f'198.51.100.{i + 1}',
+            ).status_code
+            for i in range(5)
+        ]
+        self.assertEqual(estados, [200, 200, 200, 429, 429])
+        self.assertEqual(hashes_evitados(), 2)
+
+        # Bloqueado incluso con la contraseña correcta
+        respuesta = self.client.post(url, {'email': 'victima@ejemplo.test', 'password': 'correcta-123'})
+        self.assertEqual(respuesta.status_code, 429)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class RegistroEmailTests(TestCase):
+    """El email identifica a un único usuario sin distinguir mayúsculas."""
+
+    CLAVE = 'Clave-Segura-9'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('ana', 'ana@ejemplo.test', cls.CLAVE)
+
+    def registrar(self, username, email):
+        return self.client.post(
+            reverse('registroSesion'), {'username': username, 'email': email, 'password': self.CLAVE},
+        )
+
+    def test_login_por_email_sin_distinguir_mayusculas(self):
+        self.assertEqual(authenticate(email='  ANA@Ejemplo.TEST ', password=self.CLAVE), self.usuario)
+        self.assertIsNone(authenticate(email='ana@ejemplo.test', password='otra-Clave-1'))
+        self.assertIsNone(authenticate(email='nadie@ejemplo.test', password=self.CLAVE))
+
+    def test_indice_unico_ignora_mayusculas_y_emails_vacios(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create(username='copia', email='ANA@ejemplo.test')
+        User.objects.create(username='sin-email-1', email='')
+        User.objects.create(username='sin-email-2', email='')
+
+    def test_registro_rechaza_email_duplicado(self):
+        self.assertContains(self.registrar('otra', ' Ana@Ejemplo.TEST'), 'El correo ya está registrado')
+        self.assertFalse(User.objects.filter(username='otra').exists())
+
+    def test_carrera_informa_la_restriccion_que_choco(self):
+        # Un registro concurrente entra entre las validaciones y el INSERT
+        casos = (
+            ('nuevo', 'otro@ejemplo.test', 'El nombre de usuario ya está en uso'),
+            ('otro', 'NUEVO@ejemplo.test', 'El correo ya está registrado'),
+        )
+        for username, email, error in casos:
+            with self.subTest(error=error), mock.patch(
+                'MatchDeportivoAPP.views.auth.validate_password',
+                side_effect=lambda *a, u=username, e=email: User.objects.create(username=u, email=e),
+            ):
+                self.assertContains(self.registrar('nuevo', 'nuevo@ejemplo.test'), error)
+                User.objects.filter(username=username).delete()
+            self.assertFalse(User.objects.filter(email='nuevo@ejemplo.test').exists())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class EstaticosTests(TestCase):
+    """Las referencias a estáticos fuera del manifiesto fallan en vez de ocultarse."""
+
+    def test_referencia_fuera_del_manifiesto_falla(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            storage = MatchDeportivoStaticStorage(location=directorio)
+            with self.assertRaises(ValueError):
+                storage.stored_name('img/no-existe.png')
+
+    def test_perfil_solo_guarda_iconos_conocidos(self):
+        usuario = User.objects.create_user('iconico', 'iconico@ejemplo.test', 'x')
+        perfil = Perfil.objects.get(usuario=usuario)
+        self.client.force_login(usuario)
+
+        for icono, esperado in (('tenis', 'img/tenis.png'), ('img/skate.png', 'img/skate.png'),
+                                ('../../etc/passwd', 'img/skate.png')):
+            self.client.post(reverse('editar_perfil'), {'nombre': 'Icónico', 'icono_perfil': icono})
+            perfil.refresh_from_db()
+            self.assertEqual(perfil.icono_perfil, esperado)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class GeocodificacionTests(TestCase):
+    """Las coordenadas salen del nomenclátor y se recalculan solo cuando cambia el lugar."""
+
+    SANTIAGO = (Decimal('-33.448900'), Decimal('-70.669300'))
+    PROVIDENCIA = (Decimal('-33.431400'), Decimal('-70.609300'))
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('vecino', 'vecino@ejemplo.test', 'x')
+
+    def coordenadas(self, objeto):
+        objeto.refresh_from_db()
+        return objeto.latitud, objeto.longitud
+
+    def test_nomenclator(self):
+        parque = (Decimal('-33.464000'), Decimal('-70.660000'))
+        self.assertEqual(geocodificar("Cancha 3, Parque O'Higgins, Santiago"), parque)
+        self.assertEqual(geocodificar('  PROVIDENSIA '), self.PROVIDENCIA)
+        self.assertEqual(geocodificar('Un lugar que no existe'), (None, None))
+
+    def test_actividad_solo_se_geocodifica_si_cambia_el_lugar(self):
+        actividad = Actividad.objects.create(
+            organizador=self.usuario, titulo='Partido', deporte='futbol', lugar='Santiago', nivel='Intermedio',
+            fecha=timezone.localdate() + timedelta(days=1), hora_inicio=hora(9), hora_fin=hora(10), cupos=5,
+        )
+        self.assertEqual(self.coordenadas(actividad), self.SANTIAGO)
+
+        with mock.patch('MatchDeportivoAPP.signals.geocodificar', wraps=geocodificar) as geocodificador:
+            actividad.titulo = 'Partido amistoso'
+            actividad.save()
+            geocodificador.assert_not_called()
+
+            actividad.lugar = 'Providencia'
+            actividad.save()
+            geocodificador.assert_called_once_with('Providencia')
+        self.assertEqual(self.coordenadas(actividad), self.PROVIDENCIA)
+
+    def test_editar_ubicacion_del_perfil(self):
+        perfil = self.usuario.perfil
+        perfil.ubicacion = 'Santiago'
+        perfil.save()
+        self.assertEqual(self.coordenadas(perfil), self.SANTIAGO)
+
+        # El formulario reenvía las coordenadas guardadas en los campos ocultos
+        self.client.force_login(self.usuario)
+        anteriores = {'latitud': str(self.SANTIAGO[0]), 'longitud': str(self.SANTIAGO[1])}
+        self.client.post(reverse('editar_perfil'), {'ubicacion': 'Providencia', **anteriores})
+        self.assertEqual(self.coordenadas(perfil), self.PROVIDENCIA)
+
+        # Coordenadas elegidas en el mapa junto con la ubicación: se respetan
+        self.client.post(reverse('editar_perfil'), {'ubicacion': 'Santiago', 'latitud': '-33.5', 'longitud': '-70.7'})
+        self.assertEqual(self.coordenadas(perfil), (Decimal('-33.500000'), Decimal('-70.700000')))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class AdminTablasGrandesTests(TestCase):
+    """Conteo estimado y jerarquía de fechas acotada en los changelists de tablas grandes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('raiz', 'raiz@ejemplo.test', 'x')
+        for fecha, accion in (('2023-11-05', 'login'), ('2025-02-10', 'login'), ('2025-03-20', 'error')):
+            log = Log.objects.create(accion=accion, descripcion='prueba')
+            Log.objects.filter(pk=log.pk).update(
+                fecha=timezone.make_aware(datetime.fromisoformat(f'{fecha} 12:00')),
+            )
+
+    def conteo(self, queryset, estimado):
+        with mock.patch('MatchDeportivoAPP.admin.conteo_estimado', return_value=estimado) as estimador:
+            return ConteoEstimadoPaginator(queryset.order_by('-fecha'), 100).count, estimador
+
+    def test_sin_filtros_usa_el_estimado_del_motor(self):
+        conteo, _ = self.conteo(Log.objects.all(), UMBRAL_CONTEO_ESTIMADO * 3)
+        self.assertEqual(conteo, UMBRAL_CONTEO_ESTIMADO * 3)
+
+    def test_conteo_exacto_con_tabla_chica_sin_estimado_o_con_filtros(self):
+        self.assertEqual(self.conteo(Log.objects.all(), 50)[0], 3)
+        self.assertEqual(self.conteo(Log.objects.all(), None)[0], 3)
+        conteo, estimador = self.conteo(Log.objects.filter(accion='login'), UMBRAL_CONTEO_ESTIMADO * 3)
+        self.assertEqual(conteo, 2)
+        estimador.assert_not_called()
+        # SQLite no tiene estimación
+        self.assertIsNone(conteo_estimado(Log.objects.all()))
+
+    def test_jerarquia_de_fechas_sin_recorrer_la_tabla(self):
+        self.client.force_login(self.admin)
+        url = reverse('admin:MatchDeportivoAPP_log_changelist')
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        for anio in (2023, 2024, 2025):
+            self.assertContains(respuesta, f'?fecha__year={anio}"')
+        self.assertFalse([c['sql'] for c in consultas if 'DISTINCT' in c['sql'].upper()])
+
+        respuesta = self.client.get(url, {'fecha__year': 2025})
+        self.assertContains(respuesta, 'fecha__month=2')
+        self.assertContains(respuesta, 'fecha__month=3')
+        self.assertNotContains(respuesta, 'fecha__month=4')
+        self.assertEqual(len(respuesta.context['cl'].result_list), 2)
+
+        respuesta = self.client.get(url, {'fecha__year': 2025, 'fecha__month': 3})
+        self.assertContains(respuesta, 'fecha__day=20')
+        self.assertNotContains(respuesta, 'fecha__day=21')
+        respuesta = self.client.get(url, {'fecha__year': 2025, 'fecha__month': 3, 'fecha__day': 20})
+        self.assertEqual(len(respuesta.context['cl'].result_list), 1)
+
+
+class LogsEnColaTests(SimpleTestCase):
+    """Los registros llegan a los archivos a través de la cola y su hilo de fondo."""
+
+    def test_registro_llega_al_archivo_por_la_cola(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            archivo = logging.FileHandler(Path(directorio) / 'prueba.log', encoding='utf-8')
+            archivo.set_name('archivo')
+            archivo.setLevel(logging.INFO)
+            en_cola = ManejadorEnCola(['archivo'])
+            en_cola.iniciar([logging.NullHandler(), archivo])
+
+            logger = logging.getLogger('MatchDeportivoAPP.pruebas.logs_en_cola')
+            logger.propagate = False
+            logger.addHandler(en_cola)
+            try:
+                logger.debug('bajo el nivel del destino')
+                logger.info('registro %s', 'encolado')
+            finally:
+                logger.removeHandler(en_cola)
+                en_cola.close()  # espera al listener
+                archivo.close()
+            self.assertEqual((Path(directorio) / 'prueba.log').read_text(encoding='utf-8'), 'registro encolado\n')
+
+    def test_destino_desconocido(self):
+        en_cola = ManejadorEnCola(['no_existe'])
+        try:
+            with self.assertRaises(ImproperlyConfigured):
+                en_cola.iniciar([])
+        finally:
+            en_cola.close()
+
+    def test_configuracion_conecta_la_cola_con_los_archivos(self):
+        destinos = logging.getLogger(LOGGER_DESTINOS).handlers
+        colas = [m for m in logging.getLogger('MatchDeportivoAPP').handlers if isinstance(m, ManejadorEnCola)]
+        self.assertEqual(len(colas), 1)
+        self.assertIsNotNone(colas[0].listener)
+        self.assertEqual([m.name for m in colas[0].listener.handlers], ['file', 'error_file'])
+        self.assertEqual(list(colas[0].listener.handlers), destinos)
+        # Ningún logger escribe archivos en el hilo que registra
+        self.assertFalse([m for m in logging.getLogger('MatchDeportivoAPP').handlers if m in destinos])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FacetasTests(TestCase):
+    """Cada camino de escritura mantiene ConteoFaceta igual a un recálculo desde cero."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = User.objects.create_user('organizador', 'organizador@ejemplo.test', 'x')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.organizador)
+
+    def datos(self, **cambios):
+        return {
+            'titulo': 'Partido', 'deporte': 'futbol', 'descripcion': '', 'lugar': 'Estadio Nacional',
+            'fecha': (timezone.localdate() + timedelta(days=3)).isoformat(),
+            'hora_inicio': '09:00', 'hora_fin': '10:00', 'nivel': 'Intermedio', 'cupos': 5, **cambios,
+        }
+
+    def contadores(self):
+        return {
+            (faceta, valor): abiertas
+            for faceta, valor, abiertas in ConteoFaceta.objects.values_list('faceta', 'valor', 'abiertas')
+            if abiertas
+        }
+
+    def assertCoincideConRecalculo(self):
+        guardados = self.contadores()
+        facetas.recalcular()
+        self.assertEqual(guardados, self.contadores())
+
+    def test_crear_editar_cerrar_y_eliminar(self):
+        self.client.post(reverse('crear_actividad'), self.datos())
+        self.client.post(reverse('crear_actividad'), self.datos(titulo='Otro', hora_inicio='11:00', hora_fin='12:00'))
+        primera, segunda = Actividad.objects.order_by('pk')
+        self.assertEqual(self.contadores()[(ConteoFaceta.DEPORTE, 'futbol')], 2)
+        self.assertCoincideConRecalculo()
+
+        self.client.post(
+            reverse('editar_actividad', kwargs={'pk': primera.pk}), self.datos(deporte='tenis', nivel='Avanzado'),
+        )
+        self.assertEqual(self.contadores()[(ConteoFaceta.DEPORTE, 'tenis')], 1)
+        self.assertCoincideConRecalculo()
+
+        # Cerrar dos veces descuenta una sola
+        for _ in range(2):
+            self.client.post(reverse('cerrar_actividad', kwargs={'pk': primera.pk}))
+        self.assertNotIn((ConteoFaceta.DEPORTE, 'tenis'), self.contadores())
+        self.assertCoincideConRecalculo()
+
+        self.client.post(reverse('cancelar_actividad', kwargs={'pk': segunda.pk}))
+        self.client.post(reverse('cancelar_actividad', kwargs={'pk': primera.pk}))
+        self.assertEqual(self.contadores(), {})
+        self.assertCoincideConRecalculo()
+
+    def test_conteos_en_cache_se_invalidan_al_confirmar(self):
+        self.assertEqual(facetas.conteos()[ConteoFaceta.DEPORTE], {})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('crear_actividad'), self.datos())
+        self.assertEqual(facetas.conteos()[ConteoFaceta.DEPORTE], {'futbol': 1})
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class PerfiladoTests(TestCase):
+    """El perfilado por request solo existe cuando se habilita (por defecto, con DEBUG)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('staff', 'staff@ejemplo.test', 'x', is_staff=True)
+
+    def habilitado_por_defecto(self, debug):
+        entorno = {clave: valor for clave, valor in os.environ.items() if clave != 'PERFILADO_HABILITADO'}
+        with mock.patch.dict(os.environ, entorno | {'DEBUG': debug}, clear=True):
+            return runpy.run_path(Path(__file__).resolve().parent.parent / 'MatchDeportivo' / 'settings.py')[
+                'PERFILADO_HABILITADO'
+            ]
+
+    def test_por_defecto_sigue_a_debug(self):
+        self.assertIs(self.habilitado_por_defecto('False'), False)
+        self.assertIs(self.habilitado_por_defecto('True'), True)
+
+    def test_sin_habilitar_no_se_perfila(self):
+        self.client.force_login(self.staff)
+        with tempfile.TemporaryDirectory() as directorio, self.settings(PERFILADO_DIRECTORIO=directorio):
+            with self.settings(PERFILADO_HABILITADO=False):
+                respuesta = self.client.get(reverse('actividades'), {'_perfilar': '1'})
+                self.assertNotIn('X-Perfil', respuesta)
+                self.assertEqual(os.listdir(directorio), [])
+
+            with self.settings(PERFILADO_HABILITADO=True):
+                respuesta = Client().get(reverse('actividades'), {'_perfilar': '1'})
+                self.assertNotIn('X-Perfil', respuesta)  # Solo para staff
+                cliente = Client()
+                cliente.force_login(self.staff)
+                respuesta = cliente.get(reverse('actividades'), {'_perfilar': '1'})
+                self.assertIn('X-Perfil', respuesta)
+                self.assertEqual(
+                    sorted(os.listdir(directorio)), [respuesta['X-Perfil'] + '.prof', respuesta['X-Perfil'] + '.txt'],
+                )
+
+
+class CerrarActividadesTests(TestCase):
+    """``cerrar_actividades_finalizadas`` cierra cada actividad una sola vez."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = User.objects.create_user('organizador', 'organizador@ejemplo.test', 'x')
+        cls.participante = User.objects.create_user('participante', 'participante@ejemplo.test', 'x')
+        cls.ahora = timezone.now().replace(microsecond=0)
+        cls.terminada, cls.en_el_limite, cls.en_curso = [
+            Actividad.objects.create(
+                organizador=cls.organizador, titulo=titulo, deporte='futbol', lugar='Estadio Nacional',
+                nivel='Intermedio', fecha=timezone.localdate(), hora_inicio=hora(9), hora_fin=hora(10), cupos=5,
+            )
+            for titulo in ('Terminada', 'En el límite', 'En curso')
+        ]
+        for actividad, fin in (
+            (cls.terminada, cls.ahora - timedelta(hours=1)),
+            (cls.en_el_limite, cls.ahora),
+            (cls.en_curso, cls.ahora + timedelta(seconds=1)),
+        ):
+            Actividad.objects.filter(pk=actividad.pk).update(fin=fin)
+        cls.terminada.participantes.add(cls.participante)
+        facetas.recalcular()
+
+    def cerrar(self):
+        with mock.patch(
+            'MatchDeportivoAPP.management.commands.cerrar_actividades_finalizadas.timezone.now',
+            return_value=self.ahora,
+        ), self.captureOnCommitCallbacks(execute=True):
+            call_command('cerrar_actividades_finalizadas', lote=1, stdout=io.StringIO())
+
+    def abiertas_futbol(self):
+        return ConteoFaceta.objects.get(faceta=ConteoFaceta.DEPORTE, valor='futbol').abiertas
+
+    def test_cierra_hasta_fin_inclusive_y_descuenta_facetas(self):
+        self.assertEqual(self.abiertas_futbol(), 3)
+        self.cerrar()
+        self.assertEqual(
+            set(Actividad.objects.filter(cerrada=True).values_list('titulo', flat=True)),
+            {'Terminada', 'En el límite'},
+        )
+        self.assertEqual(self.abiertas_futbol(), 1)
+        self.assertEqual(
+            Notificacion.objects.filter(tipo='RECORDATORIO_VALORACION', usuario=self.participante).count(), 1,
+        )
+
+    def test_segunda_ejecucion_no_repite_nada(self):
+        self.cerrar()
+        cierres = dict(Actividad.objects.values_list('pk', 'fecha_cierre'))
+        recordatorios = list(Notificacion.objects.values_list('pk', 'contador'))
+
+        self.cerrar()
+        self.assertEqual(dict(Actividad.objects.values_list('pk', 'fecha_cierre')), cierres)
+        self.assertEqual(list(Notificacion.objects.values_list('pk', 'contador')), recordatorios)
+        self.assertEqual(self.abiertas_futbol(), 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CalendarioTests(TestCase):
+    """El enlace del feed .ics se puede revocar regenerándolo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('suscrito', 'suscrito@ejemplo.test', 'x')
+
+    def setUp(self):
+        cache.clear()
+
+    def feed(self, token):
+        return self.client.get(reverse('calendario_ics', kwargs={'token': token})).status_code
+
+    def test_regenerar_revoca_el_enlace_anterior(self):
+        anterior = token_calendario(self.usuario.pk, 0)
+        self.assertEqual(self.feed(anterior), 200)  # queda en caché con la versión 0
+
+        self.client.force_login(self.usuario)
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post(reverse('regenerar_calendario'))
+        self.assertRedirects(respuesta, reverse('mis_actividades'))
+
+        self.assertEqual(self.feed(anterior), 404)
+        self.assertEqual(self.feed(token_calendario(self.usuario.pk, 1)), 200)
+        self.assertContains(self.client.get(reverse('mis_actividades')), token_calendario(self.usuario.pk, 1))
+
+    def test_token_sin_version_es_la_version_inicial(self):
+        self.assertEqual(self.feed(signing.dumps(self.usuario.pk, salt=SALT_TOKEN)), 200)
+        self.assertEqual(self.feed(token_calendario(self.usuario.pk + 1, 0)), 404)
+        self.assertEqual(self.feed('no-es-un-token'), 404)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ApiEtagTests(TestCase):
+    """El ETag de la API cambia con todo lo que publica, incluido el organizador."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = User.objects.create_user('organizador', 'organizador@ejemplo.test', 'x')
+        cls.actividad = Actividad.objects.create(
+            organizador=cls.organizador, titulo='Partido', deporte='futbol', lugar='Estadio Nacional',
+            nivel='Intermedio', fecha=timezone.localdate() + timedelta(days=1),
+            hora_inicio=hora(9), hora_fin=hora(10), cupos=5,
+        )
+
+    def setUp(self):
+        self.client.force_login(self.organizador)
+
+    def test_renombrar_organizador_invalida_lista_y_detalle(self):
+        for url in (reverse('api_actividades'), reverse('api_actividad', kwargs={'pk': self.actividad.pk})):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+                User.objects.filter(pk=self.organizador.pk).update(username=f'renombrado-{len(url)}')
+                respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertIn('renombrado', respuesta.content.decode())
+
+
+class VistaDiferidaTests(SimpleTestCase):
+    """Las URLs nombran las vistas por ruta y su módulo se importa en el primer request."""
+
+    def test_importa_el_modulo_al_usarse(self):
+        with mock.patch('importlib.import_module', wraps=importlib.import_module) as importar:
+            vista = VistaDiferida('calendario.calendario_ics')
+            patron = path('calendario/<str:token>.ics', vista)
+            self.assertEqual(patron.lookup_str, 'MatchDeportivoAPP.views.calendario.calendario_ics')
+            importar.assert_not_called()
+
+            with self.assertRaises(Http404):
+                vista(RequestFactory().get('/'), token='no-es-un-token')
+        importar.assert_called_once_with('MatchDeportivoAPP.views.calendario')
+        self.assertIs(vista._cargada(), vistas_calendario.calendario_ics)
+
+    def test_modulo_inexistente_falla_al_declarar_la_url(self):
+        with self.assertRaisesMessage(ImportError, 'MatchDeportivoAPP.views.calendarios'):
+            VistaDiferida('calendarios.calendario_ics')
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class RespuestaCondicionalTests(TestCase):
+    """``respuesta_condicional`` responde 304 solo si nada de lo que muestra la página cambió."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = User.objects.create_user('organizador', 'organizador@ejemplo.test', 'x')
+        cls.visitante = User.objects.create_user('visitante', 'visitante@ejemplo.test', 'x')
+        cls.actividad = Actividad.objects.create(
+            organizador=cls.organizador, titulo='Partido', deporte='futbol', lugar='Estadio Nacional',
+            nivel='Intermedio', fecha=timezone.localdate() + timedelta(days=1),
+            hora_inicio=hora(9), hora_fin=hora(10), cupos=5,
+        )
+
+    def setUp(self):
+        self.url = reverse('detalle_actividad', kwargs={'pk': self.actividad.pk})
+        self.client.force_login(self.visitante)
+
+    def etag(self):
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('private', respuesta['Cache-Control'])
+        return respuesta['ETag']
+
+    def revalidar(self, etag):
+        return self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_304_si_nada_cambio(self):
+        etag = self.etag()
+        respuesta = self.revalidar(etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta.content, b'')
+
+    def test_200_si_cambia_la_actividad(self):
+        etag = self.etag()
+        Actividad.objects.filter(pk=self.actividad.pk).update(
+            titulo='Partido amistoso', actualizada_en=timezone.now() + timedelta(seconds=1),
+        )
+        self.assertContains(self.revalidar(etag), 'Partido amistoso')
+
+    def test_200_si_se_renombra_el_organizador(self):
+        etag = self.etag()
+        User.objects.filter(pk=self.organizador.pk).update(username='organizadora')
+        self.assertContains(self.revalidar(etag), 'organizadora')
+
+    def test_etag_distinto_por_usuario(self):
+        etag_visitante = self.etag()
+        self.client.force_login(self.organizador)
+        etag_organizador = self.etag()
+        self.assertNotEqual(etag_visitante, etag_organizador)
+        self.assertEqual(self.revalidar(etag_visitante).status_code, 200)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class MisActividadesTests(TestCase):
+    """Organizadas y participaciones salen de una sola UNION, sin duplicados y paginadas por cursor."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('agenda', 'agenda@ejemplo.test', 'x')
+        cls.otro = User.objects.create_user('organizador', 'organizador@ejemplo.test', 'x')
+
+    def actividad(self, titulo, dias, organizador):
+        return Actividad.objects.create(
+            organizador=organizador, titulo=titulo, deporte='futbol', lugar='Estadio Nacional',
+            fecha=timezone.localdate() + timedelta(days=dias), hora_inicio=hora(9), hora_fin=hora(10), cupos=5,
+        )
+
+    def test_union_de_organizadas_y_participaciones(self):
+        propia = self.actividad('Propia', 2, self.usuario)
+        propia.participantes.add(self.usuario, self.otro)
+        ajena = self.actividad('Ajena', 1, self.otro)
+        ajena.participantes.add(self.usuario)
+        self.actividad('Sin inscribirse', 1, self.otro)
+        for i in range(11):
+            self.actividad(f'Pasada {i}', -i - 1, self.usuario)
+
+        self.client.force_login(self.usuario)
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(reverse('mis_actividades'))
+        # Una consulta para las próximas y otra para el historial
+        self.assertEqual(sum('UNION ALL' in c['sql'] for c in consultas.captured_queries), 2)
+        proximas = respuesta.context['proximas']
+        # La propia aparece una sola vez, como organizador, aunque también participe
+        self.assertEqual([(a.titulo, a.rol, a.inscritos) for a in proximas],
+                         [('Ajena', 'participante', 1), ('Propia', 'organizador', 2)])
+
+        historial = [a.titulo for a in respuesta.context['historial']]
+        self.assertEqual(historial, [f'Pasada {i}' for i in range(10)])
+        cursor = respuesta.context['siguiente_historial']
+        respuesta = self.client.get(reverse('mis_actividades'), {'historial': cursor})
+        self.assertEqual([a.titulo for a in respuesta.context['historial']], ['Pasada 10'])
+        self.assertIsNone(respuesta.context['siguiente_historial'])
+
+
+class ConflictosHorarioTests(TestCase):
+    """Dos actividades chocan si sus intervalos se solapan; las que se tocan no."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('agenda', 'agenda@ejemplo.test', 'x')
+        cls.organizador = User.objects.create_user('organizador', 'organizador@ejemplo.test', 'x')
+        cls.dia = timezone.localdate() + timedelta(days=2)
+
+    def actividad(self, inicio, fin, organizador=None, **campos):
+        return Actividad.objects.create(
+            organizador=organizador or self.organizador, titulo=f'{inicio}-{fin}', deporte='futbol',
+            lugar='Estadio Nacional', fecha=campos.pop('fecha', self.dia),
+            hora_inicio=hora(*inicio), hora_fin=hora(*fin), cupos=5, **campos,
+        )
+
+    def conflictos(self, *actividades):
+        actividades = list(actividades)
+        marcar_conflictos(actividades)
+        return [a.en_conflicto for a in actividades]
+
+    def test_barrido_contiguas_solapadas_y_anidadas(self):
+        # Contiguas: una termina justo cuando empieza la otra
+        self.assertEqual(self.conflictos(self.actividad((9,), (10,)), self.actividad((10,), (11,))), [False, False])
+        # Solapadas por un minuto
+        self.assertEqual(self.conflictos(self.actividad((9,), (10, 1)), self.actividad((10,), (11,))), [True, True])
+        # La larga contiene a dos que no se tocan entre sí (el orden de entrada no importa)
+        self.assertEqual(
+            self.conflictos(self.actividad((12,), (13,)), self.actividad((8,), (14,)), self.actividad((13,), (13, 30))),
+            [True, True, True],
+        )
+        # Las cerradas no cuentan
+        self.assertEqual(
+            self.conflictos(self.actividad((15,), (17,)), self.actividad((16,), (18,), cerrada=True)),
+            [False, False],
+        )
+
+    def test_actividad_que_cruza_la_medianoche(self):
+        nocturna = self.actividad((23,), (1,))
+        temprano = self.actividad((0, 30), (2,), fecha=self.dia + timedelta(days=1))
+        despues = self.actividad((1,), (2,), fecha=self.dia + timedelta(days=1))
+        self.assertEqual(self.conflictos(nocturna, temprano, despues), [True, True, True])
+        self.assertEqual(self.conflictos(nocturna, despues), [False, False])
+
+    def test_busqueda_al_unirse(self):
+        inscrita = self.actividad((9,), (10,))
+        inscrita.participantes.add(self.usuario)
+        organizada = self.actividad((18,), (19,), organizador=self.usuario)
+
+        self.assertIsNone(buscar_conflicto_horario(self.usuario, self.actividad((10,), (11,))))
+        self.assertIsNone(buscar_conflicto_horario(self.usuario, self.actividad((8,), (9,))))
+        self.assertEqual(buscar_conflicto_horario(self.usuario, self.actividad((9, 59), (11,))), inscrita)
+        self.assertEqual(buscar_conflicto_horario(self.usuario, self.actividad((17,), (20,))), organizada)
+        # Ni consigo misma ni con las cerradas
+        self.assertIsNone(buscar_conflicto_horario(self.usuario, inscrita))
+        Actividad.objects.filter(pk=organizada.pk).update(cerrada=True)
+        self.assertIsNone(buscar_conflicto_horario(self.usuario, self.actividad((17,), (20,))))
+
+
+class EliminacionCuentaTests(TestCase):
+    """La purga por lotes deja ratings, cupos y facetas consistentes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.eliminado, cls.valorado, cls.otro, cls.organizador, cls.esperando = (
+            User.objects.create_user(nombre, f'{nombre}@ejemplo.test', 'x')
+            for nombre in ('eliminado', 'valorado', 'otro', 'organizador', 'esperando')
+        )
+        manana = timezone.localdate() + timedelta(days=1)
+        ayer = timezone.localdate() - timedelta(days=1)
+        cls.llena = Actividad.objects.create(
+            organizador=cls.organizador, titulo='Llena', deporte='futbol', lugar='Estadio Nacional',
+            fecha=manana, hora_inicio=hora(9), hora_fin=hora(10), cupos=0,
+        )
+        cls.llena.participantes.add(cls.eliminado, cls.otro)
+        ListaEspera.objects.create(actividad=cls.llena, usuario=cls.esperando)
+
+        pasada = Actividad.objects.create(
+            organizador=cls.organizador, titulo='Pasada', deporte='tenis', lugar='Estadio Nacional',
+            fecha=ayer, hora_inicio=hora(9), hora_fin=hora(10), cupos=5, cerrada=True,
+        )
+        for evaluador, puntuacion in ((cls.eliminado, 5), (cls.otro, 2)):
+            Valoracion.objects.create(
+                evaluador=evaluador, evaluado=cls.valorado, actividad=pasada, puntuacion=puntuacion,
+            )
+        Valoracion.objects.create(evaluador=cls.valorado, evaluado=cls.eliminado, actividad=pasada, puntuacion=3)
+
+        for i in range(3):
+            Actividad.objects.create(
+                organizador=cls.eliminado, titulo=f'Propia {i}', deporte='basketball', lugar='Parque',
+                fecha=manana + timedelta(days=i + 1), hora_inicio=hora(18), cupos=5,
+            )
+        facetas.recalcular()
+
+    def test_purga_en_lotes_recalcula_ratings_y_libera_cupos(self):
+        self.assertEqual(Perfil.objects.get(usuario=self.valorado).rating_cantidad, 2)
+
+        eliminacion = iniciar_eliminacion(self.eliminado)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(purgar_cuenta(eliminacion, lote=1))
+
+        eliminacion.refresh_from_db()
+        self.assertEqual(eliminacion.estado, EliminacionCuenta.COMPLETADA)
+        self.assertFalse(User.objects.filter(pk=self.eliminado.pk).exists())
+
+        perfil = Perfil.objects.get(usuario=self.valorado)
+        self.assertEqual((perfil.rating_suma, perfil.rating_cantidad), (2, 1))
+
+        # Su cupo pasó al primero de la lista de espera
+        self.llena.refresh_from_db()
+        self.assertEqual(self.llena.cupos, 0)
+        self.assertEqual(set(self.llena.participantes.all()), {self.otro, self.esperando})
+        self.assertFalse(ListaEspera.objects.exists())
+
+        # Sus actividades abiertas se descontaron de los filtros
+        guardados = list(ConteoFaceta.objects.filter(abiertas__gt=0).values_list('faceta', 'valor', 'abiertas'))
+        facetas.recalcular()
+        self.assertCountEqual(guardados, ConteoFaceta.objects.values_list('faceta', 'valor', 'abiertas'))
+        self.assertNotIn((ConteoFaceta.DEPORTE, 'basketball'), [(f, v) for f, v, _ in guardados])
+
+    def test_la_solicitud_no_purga_ni_guarda_el_username(self):
+        with mock.patch('MatchDeportivoAPP.eliminacion._lanzar_hilo') as lanzar_hilo:
+            with self.captureOnCommitCallbacks(execute=True):
+                eliminacion = iniciar_eliminacion(self.eliminado)
+
+        # Por defecto no hay hilo en el worker web: la purga queda para el comando
+        lanzar_hilo.assert_not_called()
+        eliminacion.refresh_from_db()
+        self.assertEqual(eliminacion.estado, EliminacionCuenta.PENDIENTE)
+        self.assertEqual(eliminacion.usuario_id, self.eliminado.pk)
+        self.assertNotIn('username', [campo.name for campo in EliminacionCuenta._meta.get_fields()])
+        self.assertFalse(User.objects.filter(username='eliminado').exists())
+
+        salida = io.StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('purgar_cuentas_eliminadas', stdout=salida)
+        eliminacion.refresh_from_db()
+        self.assertEqual(eliminacion.estado, EliminacionCuenta.COMPLETADA)
+        self.assertNotIn('eliminado@', salida.getvalue())
+        self.assertFalse(User.objects.filter(pk=self.eliminado.pk).exists())
+
+
+class EstadisticasOrganizadorTests(TestCase):
+    """La agregación incremental llega al mismo resultado que la reconstrucción completa."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organizador = User.objects.create_user('organizador', 'organizador@ejemplo.test', 'x')
+        cls.jugadores = [User.objects.create_user(f'jugador{i}', f'jugador{i}@ejemplo.test', 'x') for i in range(3)]
+
+    def actividad(self, dias_atras, deporte='futbol', cerrada=True):
+        actividad = Actividad.objects.create(
+            organizador=self.organizador, titulo=f'Hace {dias_atras}', deporte=deporte, lugar='Estadio Nacional',
+            fecha=timezone.localdate() - timedelta(days=dias_atras), hora_inicio=hora(9), cupos=3, cerrada=cerrada,
+        )
+        actividad.participantes.add(*self.jugadores[:2])
+        return actividad
+
+    def valorar(self, actividad, jugador, puntuacion):
+        return Valoracion.objects.create(
+            evaluador=jugador, evaluado=self.organizador, actividad=actividad, puntuacion=puntuacion,
+        )
+
+    def filas(self):
+        campos = ('organizador_id', 'fecha', 'deporte', *estadisticas.CAMPOS)
+        return sorted(EstadisticaOrganizador.objects.values_list(*campos))
+
+    def test_incremental_igual_a_completo(self):
+        lunes, martes = self.actividad(10), self.actividad(9, deporte='tenis')
+        borrada = self.actividad(8)
+        self.valorar(lunes, self.jugadores[0], 5)
+        quitada = self.valorar(lunes, self.jugadores[1], 1)
+        self.valorar(borrada, self.jugadores[0], 4)
+        pendiente = self.actividad(7, cerrada=False)
+        estadisticas.actualizar(completo=True)
+        self.assertEqual(len(self.filas()), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            # Cambios con fecha de modificación...
+            self.valorar(martes, self.jugadores[2], 3)
+            pendiente.cerrada = True
+            pendiente.save()
+            # ...y borrados, que solo dejan rastro por las señales
+            quitada.delete()
+            borrada.delete()
+        self.assertEqual(DiaPorAgregar.objects.count(), 2)
+
+        estadisticas.actualizar()
+        incremental = self.filas()
+        self.assertFalse(DiaPorAgregar.objects.exists())
+
+        estadisticas.actualizar(completo=True)
+        self.assertEqual(incremental, self.filas())
+        resumen = estadisticas.resumen_organizador(self.organizador.pk, timezone.localdate() - timedelta(days=30))
+        self.assertEqual(resumen['totales']['valoraciones'], 2)
@@ -0,0 +1,102 @@
+"""
+Limitación de intentos de login con token buckets sobre la caché de Django.
+
+Cada IP y cada email tienen un "balde" de fichas que se recarga a ritmo
+constante; cada intento consume una ficha. Cuando el balde está vacío el
+intento se rechaza *antes* de calcular el hash PBKDF2, que es lo que consume
+CPU en un ataque de credential stuffing.
+
+El estado vive en la caché configurada (LocMem/archivo en desarrollo, una
+caché compartida en producción para que todos los workers vean el mismo
+balde). La lectura y escritura no son atómicas: bajo mucha concurrencia
+pueden colarse algunos intentos extra, lo que es aceptable para este uso.
+"""
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CLAVE_HASHES_EVITADOS = 'throttle:login:hashes_evitados'
+
+
+class TokenBucket:
+    """Balde de fichas identificado por un prefijo (p. ej. ``login-ip``)."""
+
+    def __init__(self, prefijo, capacidad, por_minuto):
+        self.prefijo = prefijo
+        self.capacidad = capacidad
+        self.recarga_por_segundo = por_minuto / 60
+        # Tras este tiempo sin uso el balde está lleno: la clave puede expirar
+        self.expiracion = int(capacidad / self.recarga_por_segundo) + 1
+
+    def _clave(self, identificador):
+        return f"throttle:{self.prefijo}:{identificador}"
+
+    def consumir(self, identificador, fichas=1):
+        """Consume fichas del balde. Retorna False si no alcanzan."""
+        clave = self._clave(identificador)
+        ahora = time.time()
+
+        estado = cache.get(clave)
+        if estado is None:
+            disponibles = self.capacidad
+        else:
+            guardadas, ultimo = estado
+            disponibles = min(self.capacidad, guardadas + (ahora - ultimo) * self.recarga_por_segundo)
+
+        permitido = disponibles >= fichas
+        if permitido:
+            disponibles -= fichas
+        cache.set(clave, (disponibles, ahora), self.expiracion)
+        return permitido
+
+
+def _bucket(nombre):
+    configuracion = settings.LOGIN_THROTTLE[nombre]
+    return TokenBucket(f"login-{nombre.lower()}", configuracion['capacidad'], configuracion['por_minuto'])
+
+
+def ip_cliente(request):
+    """IP del cliente según ``LOGIN_THROTTLE_IP_HEADER`` (p. ej. detrás de un proxy)."""
+    valor = request.META.get(settings.LOGIN_THROTTLE_IP_HEADER) or request.META.get('REMOTE_ADDR', '')
+    return valor.split(',')[0].strip()
+
+
+def permitir_intento_login(request, email):
+    """
+    Decide si un intento de login puede continuar hasta la verificación de contraseña.
+
+    Primero se consulta el balde de la IP y, solo si hay fichas, el del email
+    (hasheado para no guardar emails en las claves de caché).
+    """
+    if not settings.LOGIN_THROTTLE_HABILITADO:
+        return True
+
+    ip = ip_cliente(request)
+    permitido = _bucket('IP').consumir(ip)
+    if permitido and email:
+        email_hash = hashlib.sha256(email.strip().lower().encode()).hexdigest()[:32]
+        permitido = _bucket('EMAIL').consumir(email_hash)
+
+    if not permitido:
+        registrar_hash_evitado()
+        logger.warning(f"Intento de login limitado desde {ip}")
+    return permitido
+
+
+def registrar_hash_evitado():
+    """Incrementa el contador de cálculos de hash evitados."""
+    if not cache.add(CLAVE_HASHES_EVITADOS, 1, timeout=None):
+        try:
+            cache.incr(CLAVE_HASHES_EVITADOS)
+        except ValueError:
+            cache.set(CLAVE_HASHES_EVITADOS, 1, timeout=None)
+
+
+def hashes_evitados():
+    """Total de verificaciones PBKDF2 evitadas desde que se inició la caché."""
+    return cache.get(CLAVE_HASHES_EVITADOS, 0)
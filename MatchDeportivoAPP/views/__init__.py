@@ -7,93 +7,53 @@ Este paquete organiza las vistas por funcionalidad:
 - perfiles: Gestión de perfiles de usuario
 - notificaciones: Sistema de notificaciones
 - admin: Vistas de administración
-"""
-
-from .auth import (
-    inicioSesion,
-    registroSesion,
-    # olvidoContraseña,  # DESHABILITADO - Inseguro sin tokens
-    cerrarSesion,
-)
-
-from .perfiles import (
-    completar_perfil,
-    ver_perfil,
-    editar_perfil,
-    valoraciones_detalladas,
-    perfil,  # DEPRECATED: usar ver_perfil
-    perfil_participante,
-    eliminar_cuenta,
-)
-
-from .actividades import (
-    actividades,
-    detalle_actividad,
-    crear_actividad,
-    editar_actividad,
-    eliminar_actividad,
-    mis_actividades,
-    unirse_actividad,
-    salir_actividad,
-    gestionar_participantes,
-    quitar_participante,
-    reseña_actividad,
-    cerrar_actividad,
-    valorar_participantes,
-    valorar_usuario,
-)
-
-from .notificaciones import (
-    notificaciones,
-    lista_notificaciones,
-    marcar_todas_leidas,
-)
+- api: API JSON de solo lectura (v1)
+- calendario: Feed iCalendar (.ics) por usuario
+- estadisticas: Panel de estadísticas del organizador
 
-from .sobre_nosotros import (
-    sobre_nosotros,
-)
-
-from .admin import (
-    ver_logs,
-    gestionar_usuarios,
-)
-
-from .general import inicio
-
-__all__ = [
-    'inicioSesion',
-    'registroSesion',
-    # 'olvidoContraseña',  # DESHABILITADO - Inseguro sin tokens
-    'cerrarSesion',
-    # Perfiles
-    'completar_perfil',
-    'ver_perfil',
-    'editar_perfil',
-    'valoraciones_detalladas',
-    'perfil',  # DEPRECATED
-    'perfil_participante',
-    'eliminar_cuenta',
-    # Actividades
-    'actividades',
-    'detalle_actividad',
-    'crear_actividad',
-    'editar_actividad',
-    'eliminar_actividad',
-    'mis_actividades',
-    'unirse_actividad',
-    'salir_actividad',
-    'gestionar_participantes',
-    'quitar_participante',
-    'reseña_actividad',
-    'cerrar_actividad',
-    'valorar_participantes',
-    'valorar_usuario',
-    'notificaciones',
-    'lista_notificaciones',
-    'marcar_todas_leidas',
-    'sobre_nosotros',
-    # Administración
-    'ver_logs',
-    'gestionar_usuarios',
-    'inicio',
-]
+Los módulos se importan recién cuando se usa una de sus vistas: las URLs
+apuntan a ``VistaDiferida('modulo.vista')``. Así un worker nuevo no carga (ni
+compila) las vistas que todavía no atendió ningún request.
+"""
+import importlib
+import importlib.util
+
+
+class VistaDiferida:
+    """
+    Vista ``'modulo.vista'`` del paquete que importa su módulo en el primer request.
+
+    El resolver de URLs solo lee ``__module__`` y ``__qualname__`` al armar
+    sus índices, así que no dispara la importación. Cualquier otro atributo
+    (p. ej. ``csrf_exempt``) se lee de la vista real.
+    """
+
+    # Atributos de vistas basadas en clases: el resolver los consulta en
+    # todas las URLs y ninguna vista de este paquete los tiene
+    _SIN_CARGAR = frozenset({'view_class', 'view_initkwargs'})
+
+    def __init__(self, ruta):
+        modulo, _, nombre = ruta.rpartition('.')
+        self.__module__ = f'{__name__}.{modulo}'
+        # Un módulo mal escrito falla al cargar urls.py, sin importarlo
+        if not modulo or importlib.util.find_spec(self.__module__) is None:
+            raise ImportError(f"No existe el módulo de vistas {self.__module__!r} (de {ruta!r})")
+        self._nombre = nombre
+        self._vista = None
+        self.__name__ = self.__qualname__ = nombre
+
+    def _cargada(self):
+        if self._vista is None:
+            self._vista = getattr(importlib.import_module(self.__module__), self._nombre)
+        return self._vista
+
+    def __call__(self, request, *args, **kwargs):
+        return self._cargada()(request, *args, **kwargs)
+
+    def __getattr__(self, atributo):
+        if atributo.startswith('_') or atributo in self._SIN_CARGAR:
+            raise AttributeError(atributo)
+        return getattr(self._cargada(), atributo)
+
+    def __repr__(self):
+        return f'<VistaDiferida {self.__module__}.{self._nombre}>'
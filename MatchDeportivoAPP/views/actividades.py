@@ -1,19 +1,36 @@
 """Vistas de gestión de actividades deportivas."""
+import logging
+
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db import transaction
-from django.db.models import Q
+from django.db import connection, transaction
+from django.db.models import Q, Count, Exists, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from math import radians, cos, sin, asin, sqrt
 
-from ..models import Actividad, Perfil, Notificacion
-from ..constants import RADIO_BUSQUEDA_DEFAULT, RADIO_TIERRA_KM, DEPORTES
+from ..models import Actividad, ConteoFaceta, ListaEspera, Perfil, Valoracion
+from ..constants import (
+    RADIO_BUSQUEDA_DEFAULT, RADIO_TIERRA_KM, DEPORTES, NIVELES,
+    MIS_ACTIVIDADES_PROXIMAS_LIMITE, MIS_ACTIVIDADES_HISTORIAL_POR_PAGINA,
+)
+from ..paginacion import codificar_cursor, decodificar_cursor
+from ..facetas import mover_faceta, opciones_con_conteo
+from ..resumen_notificaciones import Aviso, notificar_agrupado
+from ..calendario import invalidar_calendarios, token_calendario, usuarios_de_actividades
 from ..forms import ActividadForm
+from ..lista_espera import buscar_conflicto_horario, liberar_cupo, promover_lista_espera
+from ..decorators import lectura_en_replica, respuesta_condicional
 from .notificaciones import crear_notificacion_simple
 
+logger = logging.getLogger(__name__)
+
 
 def calcular_distancia_haversine(lat1, lon1, lat2, lon2):
     """Calcula distancia entre dos puntos usando Haversine. Retorna km."""
@@ -26,17 +43,26 @@ def calcular_distancia_haversine(lat1, lon1, lat2, lon2):
 
 
 @login_required
+@lectura_en_replica
 def actividades(request):
-    """Muestra actividades de otros usuarios filtradas por deporte con paginación."""
+    """
+    Muestra actividades de otros usuarios filtradas por deporte y nivel con paginación.
+
+    Los conteos del filtro salen de ConteoFaceta (ver facetas.py), no de un
+    GROUP BY por visita.
+    """
     user = request.user
     
     filtro_deporte = request.GET.get('deporte')
+    filtro_nivel = request.GET.get('nivel')
     
     # Solo mostrar actividades de otros usuarios (no las propias)
     actividades_query = Actividad.objects.exclude(organizador=user).select_related('organizador').prefetch_related('participantes')
     
     if filtro_deporte and filtro_deporte != '':
         actividades_query = actividades_query.filter(deporte=filtro_deporte)
+    if filtro_nivel:
+        actividades_query = actividades_query.filter(nivel=filtro_nivel)
     
     # Ordenar por fecha de creación (más recientes primero)
     actividades_query = actividades_query.order_by('-creada_en')
@@ -56,16 +82,41 @@ def actividades(request):
         'actividades': actividades_paginadas,
         'active_page': 'actividades',
         'deporte_seleccionado': filtro_deporte, 
+        'nivel_seleccionado': filtro_nivel,
+        'facetas_deporte': opciones_con_conteo(DEPORTES, ConteoFaceta.DEPORTE),
+        'facetas_nivel': opciones_con_conteo(NIVELES, ConteoFaceta.NIVEL),
     }
     return render(request, 'actividades/actividades.html', context)
 
 
+def _estado_detalle_actividad(request, pk):
+    """
+    Última modificación de la actividad, su organizador y el estado del usuario
+    en ella, en una consulta. El nombre del organizador se muestra en la página
+    y puede cambiar sin tocar la actividad.
+    """
+    es_participante = Actividad.participantes.through.objects.filter(
+        actividad_id=OuterRef('pk'),
+        user_id=request.user.pk,
+    )
+    en_lista_espera = ListaEspera.objects.filter(actividad_id=OuterRef('pk'), usuario_id=request.user.pk)
+    return (
+        Actividad.objects.filter(pk=pk)
+        .annotate(es_participante=Exists(es_participante), en_lista_espera=Exists(en_lista_espera))
+        .values_list('actualizada_en', 'organizador__username', 'es_participante', 'en_lista_espera')
+        .first()
+    )
+
+
 @login_required
+@lectura_en_replica
+@respuesta_condicional(_estado_detalle_actividad)
 def detalle_actividad(request, pk):
     """Muestra el detalle de una actividad."""
     actividad = get_object_or_404(Actividad, pk=pk)
     context = {
         'actividad': actividad,
+        'en_lista_espera': actividad.lista_espera.filter(usuario=request.user).exists(),
         'active_page': 'actividades',
     }
     return render(request, 'actividades/detalle_actividad.html', context)
@@ -74,26 +125,25 @@ def detalle_actividad(request, pk):
 @login_required
 def crear_actividad(request):
     """Crea una nueva actividad y notifica a usuarios cercanos."""
-    import logging
-    logger = logging.getLogger(__name__)
-    
     if request.method == "POST":
         form = ActividadForm(request.POST)
         if form.is_valid():
             try:
                 actividad = form.save(commit=False)
                 actividad.organizador = request.user
-                actividad.save()
+                with transaction.atomic():
+                    actividad.save()
+                    mover_faceta(None, actividad.faceta_abierta())
+                invalidar_calendarios([request.user.pk])
                 
                 logger.info(f"Actividad creada: {actividad.titulo} por {request.user.username}")
                 messages.success(request, f"✅ ¡La actividad '{actividad.titulo}' se ha creado con éxito!")
                 
-                # Notificación de actividad cercana deshabilitada temporalmente
-                # (requiere coordenadas geográficas)
-                # try:
-                #     crear_notificacion_actividad_cercana(actividad)
-                # except Exception as e:
-                #     logger.warning(f"Error al notificar usuarios cercanos: {e}")
+                # Notificar a usuarios cercanos (coordenadas resueltas desde "lugar")
+                try:
+                    crear_notificacion_actividad_cercana(actividad)
+                except Exception as e:
+                    logger.warning(f"Error al notificar usuarios cercanos: {e}")
                     
                 return redirect('actividades')
                 
@@ -118,63 +168,44 @@ def crear_actividad(request):
 
 
 def crear_notificacion_actividad_cercana(actividad):
-    """Notifica a usuarios cercanos sobre una nueva actividad."""
-    try:
-        act_lat = float(actividad.latitud)
-        act_lng = float(actividad.longitud)
-    except (TypeError, ValueError):
-        return
-
-    perfiles_a_notificar = Perfil.objects.filter(
-        disciplina_preferida__iexact=actividad.deporte
-    ).exclude(usuario=actividad.organizador)
-
-    usuarios_cercanos = []
-    
-    for perfil in perfiles_a_notificar:
-        if perfil.latitud is not None and perfil.longitud is not None and perfil.radio is not None:
-            try:
-                user_lat = float(perfil.latitud)
-                user_lng = float(perfil.longitud)
-                radio = perfil.radio
-                
-                distancia = calcular_distancia_haversine(user_lat, user_lng, act_lat, act_lng)
-                
-                if distancia <= radio:
-                    usuarios_cercanos.append({
-                        'usuario': perfil.usuario,
-                        'distancia': round(distancia, 1)
-                    })
-                    
-            except Exception as e:
-                pass
-        else:
-            pass
-
-    if usuarios_cercanos:
-        deporte_formateado = actividad.deporte.capitalize()
-        
-        for item in usuarios_cercanos:
-            usuario = item['usuario']
-            distancia = item['distancia']
-            
-            try:
-                Notificacion.objects.create(
-                    usuario=usuario,
-                    actividad=actividad,
-                    tipo='NUEVA_ACTIVIDAD',
-                    mensaje=f"¡Nueva actividad de {deporte_formateado} cerca de ti! {actividad.titulo} a {distancia} km."
-                )
-            except Exception as e:
-                pass
+    """
+    Notifica a usuarios cercanos sobre una nueva actividad.
+
+    Las coordenadas de la actividad salen de ``lugar`` (ver geocoding.py).
+    Solo se leen las columnas necesarias de los perfiles candidatos. Quien ya
+    tiene un aviso de este tipo sin leer lo recibe agrupado en ese resumen.
+    """
+    if actividad.latitud is None or actividad.longitud is None:
+        return 0
+    act_lat = float(actividad.latitud)
+    act_lng = float(actividad.longitud)
+
+    candidatos = Perfil.objects.filter(
+        disciplina_preferida__iexact=actividad.deporte,
+        latitud__isnull=False,
+        longitud__isnull=False,
+        radio__isnull=False,
+    ).exclude(usuario=actividad.organizador).values_list('usuario_id', 'latitud', 'longitud', 'radio')
+
+    deporte_formateado = actividad.deporte.capitalize()
+    avisos = []
+    for usuario_id, user_lat, user_lng, radio in candidatos:
+        distancia = calcular_distancia_haversine(float(user_lat), float(user_lng), act_lat, act_lng)
+        if distancia <= radio:
+            avisos.append(Aviso(
+                usuario_id=usuario_id,
+                actividad_id=actividad.pk,
+                titulo=actividad.titulo,
+                mensaje=f"¡Nueva actividad de {deporte_formateado} cerca de ti! {actividad.titulo} a {round(distancia, 1)} km."
+            ))
+
+    notificar_agrupado('NUEVA_ACTIVIDAD', avisos)
+    return len(avisos)
 
 
 @login_required
 def editar_actividad(request, pk):
     """Edita una actividad existente. Solo el organizador puede editar."""
-    import logging
-    logger = logging.getLogger(__name__)
-    
     actividad = get_object_or_404(Actividad, pk=pk)
     
     if actividad.organizador != request.user:
@@ -185,15 +216,28 @@ def editar_actividad(request, pk):
         form = ActividadForm(request.POST, instance=actividad)
         if form.is_valid():
             try:
-                # Validación adicional: cupos no pueden ser menores a participantes actuales
-                participantes_actuales = actividad.participantes.count()
-                cupos_nuevos = form.cleaned_data['cupos']
-                
-                if cupos_nuevos < participantes_actuales:
-                    messages.error(request, f"❌ Los cupos no pueden ser menores a los participantes actuales ({participantes_actuales})")
-                    return redirect('editar_actividad', pk=pk)
-                
-                actividad = form.save()
+                with transaction.atomic():
+                    # Releer la fila bloqueada: una unión o salida concurrente no
+                    # debe cambiar cupos ni participantes entre la validación y
+                    # el guardado (la promoción también exige el bloqueo)
+                    actividad = Actividad.objects.select_for_update().get(pk=pk)
+                    faceta_anterior = actividad.faceta_abierta()
+                    form = ActividadForm(request.POST, instance=actividad)
+                    form.full_clean()
+
+                    # Validación adicional: cupos no pueden ser menores a participantes actuales
+                    participantes_actuales = actividad.participantes.count()
+                    cupos_nuevos = form.cleaned_data['cupos']
+
+                    if cupos_nuevos < participantes_actuales:
+                        messages.error(request, f"❌ Los cupos no pueden ser menores a los participantes actuales ({participantes_actuales})")
+                        return redirect('editar_actividad', pk=pk)
+
+                    actividad = form.save()
+                    mover_faceta(faceta_anterior, actividad.faceta_abierta())
+                    # Si se agregaron cupos, ocuparlos con la lista de espera
+                    promover_lista_espera(actividad)
+                    invalidar_calendarios(usuarios_de_actividades([actividad.pk]))
                 logger.info(f"Actividad editada: {actividad.titulo} por {request.user.username}")
                 messages.success(request, f"✅ Actividad '{actividad.titulo}' actualizada con éxito")
                 return redirect('mis_actividades')
@@ -221,8 +265,6 @@ def editar_actividad(request, pk):
 @login_required
 def cerrar_actividad(request, pk):
     """Cierra una actividad. Solo el organizador puede cerrar."""
-    from django.utils import timezone
-    
     actividad = get_object_or_404(Actividad, pk=pk)
     
     # Verificar permisos
@@ -236,9 +278,15 @@ def cerrar_actividad(request, pk):
         return redirect('detalle_actividad', pk=pk)
     
     if request.method == "POST":
-        actividad.cerrada = True
-        actividad.fecha_cierre = timezone.now()
-        actividad.save()
+        with transaction.atomic():
+            actividad = Actividad.objects.select_for_update().get(pk=pk)
+            # Un cierre concurrente (o el de cron) no debe descontarla dos veces
+            if not actividad.cerrada:
+                mover_faceta(actividad.faceta_abierta(), None)
+                actividad.cerrada = True
+                actividad.fecha_cierre = timezone.now()
+                actividad.save()
+                invalidar_calendarios(usuarios_de_actividades([actividad.pk]))
         
         messages.success(request, "✅ Actividad cerrada. Ahora los participantes pueden valorarse mutuamente")
         return redirect('detalle_actividad', pk=pk)
@@ -253,7 +301,14 @@ def cerrar_actividad(request, pk):
 
 @login_required
 def valorar_participantes(request, pk):
-    """Muestra lista de participantes de una actividad cerrada para valorar."""
+    """
+    Lista los participantes de una actividad cerrada y permite valorarlos a todos.
+
+    Por POST recibe ``puntuacion_<id>`` y ``comentario_<id>`` por cada
+    participante (los que vengan sin puntuación se omiten). La pertenencia se
+    valida una sola vez contra el conjunto de ids de la actividad y todas las
+    valoraciones se insertan/actualizan en una sola consulta.
+    """
     actividad = get_object_or_404(Actividad, pk=pk)
     
     # Verificar que la actividad esté cerrada
@@ -261,47 +316,76 @@ def valorar_participantes(request, pk):
         messages.error(request, "❌ Solo puedes valorar participantes de actividades cerradas")
         return redirect('detalle_actividad', pk=pk)
     
-    # Verificar que el usuario participó o es el organizador
-    es_organizador = request.user == actividad.organizador
-    es_participante = request.user in actividad.participantes.all()
+    # Miembros = participantes + organizador (una sola consulta)
+    miembros = set(actividad.participantes.values_list('pk', flat=True))
+    miembros.add(actividad.organizador_id)
     
-    if not es_organizador and not es_participante:
+    # Verificar que el usuario participó o es el organizador
+    if request.user.pk not in miembros:
         messages.error(request, "❌ Solo los participantes pueden valorar")
         return redirect('detalle_actividad', pk=pk)
     
-    # Obtener todos los usuarios a valorar (participantes + organizador, excluyendo al usuario actual)
-    from django.db.models import Q
-    usuarios_a_valorar = []
-    
-    # Si el usuario es participante (no organizador), puede valorar al organizador
-    if es_participante and not es_organizador:
-        usuarios_a_valorar.append(actividad.organizador)
-    
-    # Agregar participantes (excluyendo al usuario actual)
-    for participante in actividad.participantes.exclude(pk=request.user.pk):
-        usuarios_a_valorar.append(participante)
+    ids_a_valorar = miembros - {request.user.pk}
     
-    # Marcar quiénes ya fueron valorados
-    from ..models import Valoracion
-    participantes_data = []
-    for usuario in usuarios_a_valorar:
-        ya_valorado = Valoracion.objects.filter(
-            evaluador=request.user,
-            evaluado=usuario,
-            actividad=actividad
-        ).exists()
-        
-        valoracion_existente = None
-        if ya_valorado:
-            valoracion_existente = Valoracion.objects.get(
+    if request.method == 'POST':
+        valoraciones = []
+        for usuario_id in sorted(ids_a_valorar):
+            puntuacion = request.POST.get(f'puntuacion_{usuario_id}', '').strip()
+            if not puntuacion:
+                continue
+            try:
+                puntuacion = int(puntuacion)
+                if puntuacion < 1 or puntuacion > 5:
+                    raise ValueError
+            except ValueError:
+                messages.error(request, "La puntuación debe ser un número entre 1 y 5.")
+                return redirect('valorar_participantes', pk=pk)
+            
+            valoraciones.append(Valoracion(
                 evaluador=request.user,
-                evaluado=usuario,
-                actividad=actividad
+                evaluado_id=usuario_id,
+                actividad=actividad,
+                puntuacion=puntuacion,
+                comentario=request.POST.get(f'comentario_{usuario_id}', '').strip()[:500],
+            ))
+        
+        if not valoraciones:
+            messages.warning(request, "No seleccionaste ninguna puntuación.")
+            return redirect('valorar_participantes', pk=pk)
+        
+        # MySQL no admite indicar las columnas del conflicto (usa cualquier UNIQUE)
+        unique_fields = None
+        if connection.features.supports_update_conflicts_with_target:
+            unique_fields = ['evaluador', 'evaluado', 'actividad']
+        
+        with transaction.atomic():
+            Valoracion.objects.bulk_create(
+                valoraciones,
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=['puntuacion', 'comentario'],
             )
+            Perfil.recalcular_ratings(v.evaluado_id for v in valoraciones)
         
+        messages.success(request, f"✅ Se guardaron {len(valoraciones)} valoración(es).")
+        return redirect('detalle_actividad', pk=pk)
+    
+    # GET: usuarios a valorar y valoraciones previas (dos consultas en total)
+    valoraciones_previas = {
+        v.evaluado_id: v
+        for v in Valoracion.objects.filter(
+            evaluador=request.user,
+            actividad=actividad,
+            evaluado_id__in=ids_a_valorar,
+        )
+    }
+    
+    participantes_data = []
+    for usuario in User.objects.filter(pk__in=ids_a_valorar).order_by('username'):
+        valoracion_existente = valoraciones_previas.get(usuario.pk)
         participantes_data.append({
             'usuario': usuario,
-            'ya_valorado': ya_valorado,
+            'ya_valorado': valoracion_existente is not None,
             'valoracion': valoracion_existente
         })
     
@@ -322,7 +406,11 @@ def eliminar_actividad(request, pk):
         return redirect('detalle_actividad', pk=pk)
 
     try:
-        actividad.delete()
+        # Los afectados se calculan antes de borrar las participaciones
+        invalidar_calendarios(usuarios_de_actividades([actividad.pk]))
+        with transaction.atomic():
+            mover_faceta(actividad.faceta_abierta(), None)
+            actividad.delete()
         messages.success(request, f"La actividad '{actividad.titulo}' ha sido eliminada permanentemente.")
         return redirect('actividades')
     except Exception as e:
@@ -330,24 +418,118 @@ def eliminar_actividad(request, pk):
         return redirect('detalle_actividad', pk=pk)
 
 
+def marcar_conflictos(actividades):
+    """
+    Marca ``en_conflicto`` en las actividades que se solapan entre sí.
+
+    Ordena por inicio y recorre una sola vez llevando la actividad que
+    termina más tarde hasta ahora: si la siguiente empieza antes de ese fin,
+    ambas chocan. O(n log n) en lugar de comparar todos los pares.
+    """
+    for actividad in actividades:
+        actividad.en_conflicto = False
+
+    abiertas = sorted(
+        (a for a in actividades if not a.cerrada and a.inicio is not None),
+        key=lambda a: a.inicio,
+    )
+    mas_tardia = None
+    for actividad in abiertas:
+        if mas_tardia is not None and actividad.inicio < mas_tardia.fin:
+            actividad.en_conflicto = mas_tardia.en_conflicto = True
+        if mas_tardia is None or actividad.fin > mas_tardia.fin:
+            mas_tardia = actividad
+
+
+def _mis_actividades_union(usuario, *condiciones, **filtros):
+    """
+    UNION ALL de las actividades que el usuario organiza y en las que participa.
+
+    Cada rama anota ``rol`` y la cantidad de inscritos; las condiciones y
+    ``filtros`` se aplican a ambas ramas (después de una unión Django no permite filtrar).
+    """
+    participaciones = Actividad.participantes.through.objects.filter(user_id=usuario.pk)
+    inscritos = Coalesce(Subquery(
+        Actividad.participantes.through.objects.filter(actividad_id=OuterRef('pk'))
+        .order_by().values('actividad_id').annotate(total=Count('pk')).values('total')
+    ), 0)
+
+    organizadas = (
+        Actividad.objects.filter(*condiciones, organizador_id=usuario.pk, **filtros)
+        .select_related('organizador')
+        .annotate(rol=Value('organizador'), inscritos=inscritos)
+    )
+    participando = (
+        Actividad.objects.filter(*condiciones, pk__in=participaciones.values('actividad_id'), **filtros)
+        .exclude(organizador_id=usuario.pk)
+        .select_related('organizador')
+        .annotate(rol=Value('participante'), inscritos=inscritos)
+    )
+    return organizadas.union(participando, all=True)
+
+
+def _filtro_cursor_historial(cursor):
+    """Filtro ``(inicio, pk) < cursor`` para el historial, o None si el cursor es inválido."""
+    valores = decodificar_cursor(cursor)
+    if not valores or len(valores) != 2:
+        return None
+    inicio, pk = parse_datetime(str(valores[0])), valores[1]
+    if inicio is None or not isinstance(pk, int):
+        return None
+    return Q(inicio__lt=inicio) | Q(inicio=inicio, pk__lt=pk)
+
+
 @login_required
 def mis_actividades(request):
-    """Muestra actividades organizadas y en las que participa el usuario."""
+    """
+    Muestra las actividades que el usuario organiza o en las que participa.
+
+    Se divide en próximas (las que aún no terminan, hasta
+    ``MIS_ACTIVIDADES_PROXIMAS_LIMITE``) e historial paginado por cursor
+    (``?historial=<cursor>``), cada una con una sola consulta UNION ALL sobre
+    el índice de ``inicio``. El costo de la página no crece con la
+    antigüedad de la cuenta.
+    """
     usuario = request.user
-    
-    actividades_organizadas = Actividad.objects.filter(
-        organizador=usuario
-    ).order_by('fecha', 'hora_inicio')
-    
-    actividades_participando = (
-        usuario.actividades_participando.all()
-        .exclude(organizador=usuario)
-        .order_by('fecha', 'hora_inicio')
+    ahora = timezone.now()
+
+    # Próximas: limit + 1 para saber si hay más
+    proximas = list(
+        _mis_actividades_union(usuario, fin__gt=ahora)
+        .order_by('inicio', 'pk')[:MIS_ACTIVIDADES_PROXIMAS_LIMITE + 1]
     )
+    hay_mas_proximas = len(proximas) > MIS_ACTIVIDADES_PROXIMAS_LIMITE
+    proximas = proximas[:MIS_ACTIVIDADES_PROXIMAS_LIMITE]
+
+    # Resaltar choques de horario entre las próximas
+    marcar_conflictos(proximas)
+
+    # Historial: página actual según el cursor
+    filtro_historial = Q()
+    cursor = request.GET.get('historial')
+    if cursor:
+        filtro_historial = _filtro_cursor_historial(cursor)
+        if filtro_historial is None:
+            return redirect('mis_actividades')
+
+    historial = list(
+        _mis_actividades_union(usuario, filtro_historial, fin__lte=ahora)
+        .order_by('-inicio', '-pk')[:MIS_ACTIVIDADES_HISTORIAL_POR_PAGINA + 1]
+    )
+    siguiente_historial = None
+    if len(historial) > MIS_ACTIVIDADES_HISTORIAL_POR_PAGINA:
+        historial = historial[:MIS_ACTIVIDADES_HISTORIAL_POR_PAGINA]
+        siguiente_historial = codificar_cursor(historial[-1].inicio.isoformat(), historial[-1].pk)
     
     context = {
-        'organizadas': actividades_organizadas,
-        'participando': actividades_participando, 
+        'proximas': proximas,
+        'hay_mas_proximas': hay_mas_proximas,
+        'historial': historial,
+        'siguiente_historial': siguiente_historial,
+        'historial_paginado': bool(cursor),
+        'calendario_url': request.build_absolute_uri(
+            reverse('calendario_ics', args=[token_calendario(usuario.pk, usuario.perfil.calendario_version)])
+        ),
         'active_page': 'mis_actividades',
     }
     
@@ -356,20 +538,43 @@ def mis_actividades(request):
 
 @login_required
 def unirse_actividad(request, pk):
-    """Permite unirse a una actividad si hay cupos disponibles."""
-    actividad = get_object_or_404(Actividad, pk=pk)
+    """
+    Permite unirse a una actividad si hay cupos disponibles.
+
+    Si no hay cupos, el usuario queda en la lista de espera y se le inscribe
+    automáticamente cuando alguien libere un cupo.
+    """
+    get_object_or_404(Actividad, pk=pk)
     usuario = request.user
     
     try:
         with transaction.atomic():
+            # Bloquear la fila: los cupos y la cola se modifican de a uno
+            actividad = Actividad.objects.select_for_update().get(pk=pk)
+
+            if actividad.cerrada:
+                messages.error(request, "Esta actividad ya finalizó y no admite participantes.")
+                return redirect('detalle_actividad', pk=pk)
+
             if actividad.participantes.filter(id=usuario.id).exists():
                 messages.warning(request, "Ya estás inscrito en esta actividad.")
                 return redirect('detalle_actividad', pk=pk)
-            
+
+            conflicto = buscar_conflicto_horario(usuario, actividad)
+            if conflicto is not None:
+                messages.error(
+                    request,
+                    f"El horario choca con {conflicto.titulo} "
+                    f"({conflicto.fecha:%d-%m} a las {conflicto.hora_inicio:%H:%M})."
+                )
+                return redirect('detalle_actividad', pk=pk)
+
             if actividad.cupos > 0:
                 actividad.participantes.add(usuario)
                 actividad.cupos -= 1
                 actividad.save()
+                ListaEspera.objects.filter(actividad=actividad, usuario=usuario).delete()
+                invalidar_calendarios([usuario.pk])
                 
                 messages.success(request, f"¡Te has unido a {actividad.titulo} con éxito!")
                 
@@ -380,7 +585,12 @@ def unirse_actividad(request, pk):
                     f"¡Confirmado! Estás inscrito en {actividad.titulo} el {actividad.fecha}."
                 )
             else:
-                messages.error(request, "No hay cupos disponibles.")
+                entrada, _ = ListaEspera.objects.get_or_create(actividad=actividad, usuario=usuario)
+                messages.info(
+                    request,
+                    f"No hay cupos disponibles. Estás en la lista de espera (posición {entrada.posicion()}); "
+                    "te inscribiremos automáticamente si se libera un cupo."
+                )
 
     except Exception as e:
         messages.error(request, f"Ocurrió un error al unirse: {e}")
@@ -390,17 +600,18 @@ def unirse_actividad(request, pk):
 
 @login_required
 def salir_actividad(request, pk):
-    """Permite salir de una actividad y libera un cupo."""
-    actividad = get_object_or_404(Actividad, pk=pk)
+    """Permite salir de una actividad (o de su lista de espera) y libera un cupo."""
+    get_object_or_404(Actividad, pk=pk)
     usuario = request.user
 
     try:
         with transaction.atomic():
-            if actividad.participantes.filter(id=usuario.id).exists():
-                actividad.participantes.remove(usuario)
-                actividad.cupos += 1
-                actividad.save()
+            actividad = Actividad.objects.select_for_update().get(pk=pk)
+
+            if liberar_cupo(actividad, usuario.pk):
                 messages.success(request, f"Has cancelado tu asistencia a {actividad.titulo}. ¡Cupo liberado!")
+            elif ListaEspera.objects.filter(actividad=actividad, usuario=usuario).delete()[0]:
+                messages.success(request, f"Saliste de la lista de espera de {actividad.titulo}.")
             else:
                 messages.warning(request, "No estabas unido a esta actividad.")
 
@@ -420,7 +631,7 @@ def gestionar_participantes(request, pk):
         return redirect('detalle_actividad', pk=pk)
 
     participantes = []
-    for usuario in actividad.participantes.all():
+    for usuario in actividad.participantes.select_related('perfil'):
         participantes.append({
             'user': usuario,
             'perfil': getattr(usuario, 'perfil', None),
@@ -445,10 +656,11 @@ def quitar_participante(request, actividad_pk, user_id):
 
     try:
         with transaction.atomic():
-            actividad.participantes.remove(usuario_a_quitar)
-            actividad.cupos += 1
-            actividad.save()
-            messages.success(request, f"Se ha quitado a {usuario_a_quitar.username} de la actividad y se liberó un cupo.")
+            actividad = Actividad.objects.select_for_update().get(pk=actividad_pk)
+            if liberar_cupo(actividad, usuario_a_quitar.pk):
+                messages.success(request, f"Se ha quitado a {usuario_a_quitar.username} de la actividad y se liberó un cupo.")
+            else:
+                messages.warning(request, f"{usuario_a_quitar.username} no participa en esta actividad.")
     except Exception as e:
         messages.error(request, f"Error al quitar participante: {e}")
 
@@ -463,8 +675,6 @@ def reseña_actividad(request):
 @login_required
 def valorar_usuario(request, actividad_pk, usuario_pk):
     """Permite valorar a un usuario después de participar juntos en una actividad."""
-    from ..models import Valoracion
-    
     actividad = get_object_or_404(Actividad, pk=actividad_pk)
     usuario_a_valorar = get_object_or_404(User, pk=usuario_pk)
     evaluador = request.user
@@ -480,8 +690,9 @@ def valorar_usuario(request, actividad_pk, usuario_pk):
         return redirect('detalle_actividad', pk=actividad_pk)
     
     # Validación 2: Ambos deben haber participado en la actividad
-    participantes = list(actividad.participantes.all()) + [actividad.organizador]
-    if evaluador not in participantes or usuario_a_valorar not in participantes:
+    miembros = set(actividad.participantes.values_list('pk', flat=True))
+    miembros.add(actividad.organizador_id)
+    if evaluador.pk not in miembros or usuario_a_valorar.pk not in miembros:
         messages.error(request, "Solo los participantes de la actividad pueden valorarse entre sí.")
         return redirect('detalle_actividad', pk=actividad_pk)
     
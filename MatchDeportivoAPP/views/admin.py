@@ -2,19 +2,24 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_safe
 
+from ..exportacion import EXPORTACIONES, FORMATOS, exportar
 from ..models import Log
 
 
 @login_required
 def ver_logs(request):
     """Muestra los logs del sistema para administradores."""
-    logs = Log.objects.all().order_by('-fecha')[:100]
+    logs = Log.objects.select_related('usuario').order_by('-fecha')[:100]
     context = {
         'logs': logs,
         'active_page': 'admin',
     }
-    return render(request, 'administracion/logs.html', context)
+    return render(request, 'administracion/ver_logs.html', context)
 
 
 @login_required
@@ -26,3 +31,46 @@ def gestionar_usuarios(request):
         'active_page': 'admin',
     }
     return render(request, 'administracion/gestionar_usuarios.html', context)
+
+
+@require_safe
+@login_required
+def exportar_datos(request, recurso):
+    """
+    Exporta logs, actividades o valoraciones en streaming (solo staff).
+
+    Parámetros GET:
+        formato: ``csv`` (default) o ``ndjson``
+        desde, hasta: fechas ``AAAA-MM-DD`` (inclusive, opcionales)
+
+    Las filas se envían a medida que se leen, por lotes, así que la memoria
+    del worker no crece con el tamaño de la exportación.
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied("Solo el staff puede exportar datos.")
+    if recurso not in EXPORTACIONES:
+        raise Http404("Exportación inexistente.")
+
+    formato = request.GET.get('formato', 'csv')
+    if formato not in FORMATOS:
+        return HttpResponseBadRequest("Formato inválido: usa csv o ndjson.")
+
+    fechas = {}
+    for parametro in ('desde', 'hasta'):
+        valor = request.GET.get(parametro)
+        try:
+            fechas[parametro] = parse_date(valor) if valor else None
+        except ValueError:
+            fechas[parametro] = None
+        if valor and fechas[parametro] is None:
+            return HttpResponseBadRequest(f"Fecha inválida en '{parametro}': usa AAAA-MM-DD.")
+
+    response = StreamingHttpResponse(
+        exportar(recurso, formato, fechas['desde'], fechas['hasta']),
+        content_type=FORMATOS[formato],
+    )
+    rango = '_'.join(str(fecha) for fecha in fechas.values() if fecha)
+    nombre = f"{recurso}{'_' + rango if rango else ''}.{formato}"
+    response['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    response['Cache-Control'] = 'no-store'
+    return response
@@ -0,0 +1,208 @@
+"""API JSON de solo lectura para actividades (v1).
+
+Pensada para que el frontend (maps.js, actividades.js) pueda refrescar datos
+sin recargar la página completa.
+
+Características:
+- Campos dispersos: ``?fields=titulo,deporte,cupos``
+- Paginación por cursor: ``?cursor=<opaco>&limit=20``
+- ETags fuertes derivados de ``Actividad.actualizada_en`` y del nombre del
+  organizador (se publica y puede cambiar sin tocar la actividad). Si el
+  cliente envía ``If-None-Match`` y nada cambió, se responde
+  ``304 Not Modified`` tras una sola consulta indexada, sin serializar nada.
+"""
+import hashlib
+from functools import wraps
+
+from django.db.models import Count
+from django.http import JsonResponse
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_safe
+
+from ..models import Actividad
+from ..constants import API_LIMITE_DEFAULT, API_LIMITE_MAXIMO
+from ..paginacion import codificar_cursor, decodificar_cursor
+
+
+# Campo público -> expresión para .values(). None = campo calculado.
+CAMPOS_API = {
+    'id': 'id',
+    'titulo': 'titulo',
+    'deporte': 'deporte',
+    'descripcion': 'descripcion',
+    'lugar': 'lugar',
+    'fecha': 'fecha',
+    'hora_inicio': 'hora_inicio',
+    'hora_fin': 'hora_fin',
+    'nivel': 'nivel',
+    'cupos': 'cupos',
+    'cerrada': 'cerrada',
+    'organizador': 'organizador__username',
+    'participantes': None,
+    'creada_en': 'creada_en',
+    'actualizada_en': 'actualizada_en',
+}
+
+CAMPOS_POR_DEFECTO = (
+    'id', 'titulo', 'deporte', 'lugar', 'fecha', 'hora_inicio',
+    'hora_fin', 'nivel', 'cupos', 'cerrada', 'organizador',
+)
+
+
+def api_login_required(vista):
+    """Como login_required, pero responde 401 en JSON en vez de redirigir."""
+    @wraps(vista)
+    def _vista(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Autenticación requerida.'}, status=401)
+        return vista(request, *args, **kwargs)
+    return _vista
+
+
+def _campos_solicitados(request):
+    """Retorna la tupla de campos pedidos en ``?fields=`` o None si hay alguno inválido."""
+    crudo = request.GET.get('fields', '').strip()
+    if not crudo:
+        return CAMPOS_POR_DEFECTO
+
+    campos = ['id']
+    for campo in crudo.split(','):
+        campo = campo.strip()
+        if not campo or campo in campos:
+            continue
+        if campo not in CAMPOS_API:
+            return None
+        campos.append(campo)
+    return tuple(campos)
+
+
+def _limite_solicitado(request):
+    """Tamaño de página acotado a API_LIMITE_MAXIMO."""
+    try:
+        limite = int(request.GET.get('limit', API_LIMITE_DEFAULT))
+    except (TypeError, ValueError):
+        return API_LIMITE_DEFAULT
+    return max(1, min(limite, API_LIMITE_MAXIMO))
+
+
+def _etag(*partes):
+    """ETag fuerte a partir de las partes que determinan la representación."""
+    return hashlib.sha1('|'.join(str(p) for p in partes).encode()).hexdigest()
+
+
+def _serializar(queryset, campos, limite=None):
+    """Ejecuta la consulta pidiendo solo las columnas necesarias."""
+    if 'participantes' in campos:
+        queryset = queryset.annotate(participantes_count=Count('participantes'))
+
+    columnas = [CAMPOS_API[c] if CAMPOS_API[c] else 'participantes_count' for c in campos]
+    filas = queryset.values_list(*columnas)
+    if limite is not None:
+        filas = filas[:limite]
+
+    resultado = []
+    for fila in filas:
+        resultado.append(dict(zip(campos, fila)))
+    return resultado
+
+
+def _consulta_lista(request):
+    """Queryset filtrado y posicionado según el cursor. None si el cursor es inválido."""
+    queryset = Actividad.objects.all()
+
+    deporte = request.GET.get('deporte')
+    if deporte:
+        queryset = queryset.filter(deporte=deporte)
+
+    cerrada = request.GET.get('cerrada')
+    if cerrada in ('true', 'false'):
+        queryset = queryset.filter(cerrada=(cerrada == 'true'))
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        valores = decodificar_cursor(cursor)
+        if not valores or not isinstance(valores[0], int):
+            return None
+        queryset = queryset.filter(pk__lt=valores[0])
+
+    return queryset.order_by('-pk')
+
+
+# ============================================
+# ETAGS (se calculan antes de ejecutar la vista)
+# ============================================
+
+def _etag_lista(request):
+    """ETag de una página: id, actualizada_en y organizador de sus filas, en una sola consulta."""
+    campos = _campos_solicitados(request)
+    queryset = _consulta_lista(request)
+    if campos is None or queryset is None:
+        return None
+
+    limite = _limite_solicitado(request)
+    filas = queryset.values_list('pk', 'actualizada_en', 'organizador__username')[:limite + 1]
+    huella = ','.join(
+        f"{pk}:{actualizada.timestamp()}:{organizador}" for pk, actualizada, organizador in filas
+    )
+    return _etag('lista', request.get_full_path(), huella)
+
+
+def _etag_detalle(request, pk):
+    """ETag de una actividad a partir de su ``actualizada_en`` y su organizador (lookup por PK)."""
+    campos = _campos_solicitados(request)
+    if campos is None:
+        return None
+
+    fila = Actividad.objects.filter(pk=pk).values_list('actualizada_en', 'organizador__username').first()
+    if fila is None:
+        return None
+    actualizada, organizador = fila
+    return _etag('actividad', pk, actualizada.timestamp(), organizador, ','.join(campos))
+
+
+# ============================================
+# VISTAS
+# ============================================
+
+@require_safe
+@api_login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_etag_lista)
+def api_actividades(request):
+    """Lista paginada de actividades, más recientes primero."""
+    campos = _campos_solicitados(request)
+    if campos is None:
+        return JsonResponse({'error': 'Campo desconocido en "fields".'}, status=400)
+
+    queryset = _consulta_lista(request)
+    if queryset is None:
+        return JsonResponse({'error': 'Cursor inválido.'}, status=400)
+
+    limite = _limite_solicitado(request)
+    resultados = _serializar(queryset, campos, limite + 1)
+
+    siguiente = None
+    if len(resultados) > limite:
+        resultados = resultados[:limite]
+        parametros = request.GET.copy()
+        parametros['cursor'] = codificar_cursor(resultados[-1]['id'])
+        siguiente = f"{reverse('api_actividades')}?{parametros.urlencode()}"
+
+    return JsonResponse({'resultados': resultados, 'siguiente': siguiente})
+
+
+@require_safe
+@api_login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_etag_detalle)
+def api_actividad(request, pk):
+    """Detalle de una actividad."""
+    campos = _campos_solicitados(request)
+    if campos is None:
+        return JsonResponse({'error': 'Campo desconocido en "fields".'}, status=400)
+
+    resultado = _serializar(Actividad.objects.filter(pk=pk), campos)
+    if not resultado:
+        return JsonResponse({'error': 'Actividad no encontrada.'}, status=404)
+    return JsonResponse(resultado[0])
@@ -20,8 +20,11 @@ from django.contrib.auth.hashers import make_password
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
 
+from ..backends import normalizar_email
 from ..models import Perfil
+from ..throttling import permitir_intento_login
 
 
 def inicioSesion(request):
@@ -35,7 +38,8 @@ def inicioSesion(request):
     Seguridad implementada:
     - Mensajes genéricos (no revela si email existe)
     - Protección CSRF automática ({% csrf_token %} en template)
-    - Rate limiting (pendiente de implementar)
+    - Rate limiting por IP y por email (token bucket, ver throttling.py):
+      los intentos excedidos responden 429 sin calcular el hash
     
     Args:
         request: HttpRequest object
@@ -52,14 +56,17 @@ def inicioSesion(request):
         email = request.POST.get("email", "").strip()
         password = request.POST.get("password", "")
 
+        # ✅ Limitar intentos antes de cualquier cálculo de hash
+        if not permitir_intento_login(request, email):
+            return render(request, "sesion/inicioSesion.html", {
+                "error": "Demasiados intentos. Espera un momento e inténtalo de nuevo."
+            }, status=429)
+
         # ✅ Intentar autenticar sin revelar si el email existe
-        # Esto previene ataques de enumeración de usuarios
-        try:
-            user = User.objects.get(email=email)
-            user = authenticate(request, username=user.username, password=password)
-        except User.DoesNotExist:
-            # No revelamos que el email no existe
-            user = None
+        # EmailBackend busca por email en una sola consulta indexada y, si no
+        # existe, calcula igual un hash para que el tiempo de respuesta no
+        # permita enumerar usuarios
+        user = authenticate(request, email=email, password=password)
 
         if user is not None:
             # Login exitoso
@@ -116,7 +123,7 @@ def registroSesion(request):
     if request.method == "POST":
         # Obtener y limpiar datos del formulario
         username = request.POST.get('username', '').strip()
-        email = request.POST.get('email', '').strip()
+        email = normalizar_email(request.POST.get('email', ''))
         password = request.POST.get('password', '')
         
         # ✅ VALIDACIÓN 1: Formato de email
@@ -163,16 +170,29 @@ def registroSesion(request):
 
         # ✅ Crear usuario con contraseña hasheada
         # make_password() usa PBKDF2 por defecto (seguro)
-        user = User.objects.create(
-            username=username,
-            email=email,
-            password=make_password(password)
-        )
-
-        # Auto-login después de registro exitoso
-        user = authenticate(request, username=username, password=password)
-        if user is not None:
-            login(request, user)
+        # Los índices únicos de username y email cubren la carrera entre dos registros simultáneos
+        try:
+            with transaction.atomic():
+                user = User.objects.create(
+                    username=username,
+                    email=email,
+                    password=make_password(password)
+                )
+        except IntegrityError:
+            # Otro registro ganó la carrera: se informa la restricción que chocó
+            if User.objects.filter(username=username).exists():
+                error = 'El nombre de usuario ya está en uso'
+            elif User.objects.filter(email=email).exists():
+                error = 'El correo ya está registrado'
+            else:
+                error = 'No se pudo crear la cuenta. Intenta nuevamente.'
+            return render(request, 'sesion/registroSesion.html', {
+                'error': error,
+                'request': request
+            })
+
+        # Auto-login después de registro exitoso (sin volver a calcular el hash)
+        login(request, user, backend='MatchDeportivoAPP.backends.EmailBackend')
         
         # Redirigir a completar perfil (primera vez)
         return redirect('completar_perfil')
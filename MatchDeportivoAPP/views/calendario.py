@@ -0,0 +1,46 @@
+"""Feed iCalendar de las actividades de cada usuario."""
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, HttpResponse
+from django.shortcuts import redirect
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_POST, require_safe
+
+from ..calendario import obtener_calendario, regenerar_token, usuario_de_token
+
+
+@require_safe
+def calendario_ics(request, token):
+    """
+    Sirve el .ics del usuario identificado por ``token`` (sin sesión).
+
+    No usa ``request.user``: la firma del token basta, y un acierto de caché
+    o un ``304`` no consulta la base de datos.
+    """
+    datos = usuario_de_token(token)
+    calendario = obtener_calendario(*datos) if datos is not None else None
+    if calendario is None:
+        raise Http404("Calendario no encontrado.")
+
+    contenido, etag = calendario
+    etag = quote_etag(etag)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(contenido, content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = 'inline; filename="matchdeportivo.ics"'
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@login_required
+@require_POST
+def regenerar_calendario(request):
+    """Revoca el enlace del feed del usuario y genera uno nuevo (p. ej. si se filtró)."""
+    regenerar_token(request.user.pk)
+    messages.success(
+        request,
+        "🔄 Generamos un enlace nuevo para tu calendario. Vuelve a suscribirte con él: el anterior ya no funciona.",
+    )
+    return redirect('mis_actividades')
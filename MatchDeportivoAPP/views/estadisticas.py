@@ -0,0 +1,32 @@
+"""Panel de estadísticas del organizador (lee las filas agregadas de estadisticas.py)."""
+from datetime import timedelta
+
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import render
+from django.utils import timezone
+
+from ..constants import ESTADISTICAS_PERIODO_DEFAULT, ESTADISTICAS_PERIODOS_DIAS
+from ..decorators import lectura_en_replica
+from ..estadisticas import resumen_organizador, ultima_actualizacion
+
+
+@login_required
+@lectura_en_replica
+def estadisticas_organizador(request):
+    """Ocupación, valoraciones y desglose por deporte de las actividades que organizó el usuario."""
+    try:
+        dias = int(request.GET.get('dias', ESTADISTICAS_PERIODO_DEFAULT))
+    except ValueError:
+        dias = ESTADISTICAS_PERIODO_DEFAULT
+    if dias not in ESTADISTICAS_PERIODOS_DIAS:
+        dias = ESTADISTICAS_PERIODO_DEFAULT
+
+    desde = timezone.localdate() - timedelta(days=dias)
+    context = {
+        **resumen_organizador(request.user.pk, desde),
+        'dias': dias,
+        'periodos': ESTADISTICAS_PERIODOS_DIAS,
+        'actualizado': ultima_actualizacion(),
+        'active_page': 'mis_actividades',
+    }
+    return render(request, 'actividades/estadisticas.html', context)
@@ -1,23 +1,21 @@
 """Vistas de notificaciones."""
-from django.shortcuts import render
+from django.shortcuts import render, redirect
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 
 from ..models import Notificacion
+from ..constants import NOTIFICACIONES_BANDEJA_LIMITE
 
 
 @login_required
 def notificaciones(request):
-    """Muestra todas las notificaciones del usuario."""
+    """Muestra las notificaciones más recientes del usuario (los resúmenes agrupan avisos)."""
     usuario = request.user
-    notificaciones_list = Notificacion.objects.filter(usuario=usuario)
-    
-    no_leidas = notificaciones_list.filter(leida=False)
-    leidas = notificaciones_list.filter(leida=True)
+    bandeja = Notificacion.objects.filter(usuario=usuario).order_by('-actualizada_en', '-pk')
     
     context = {
-        'notificaciones': notificaciones_list,
-        'no_leidas': no_leidas,
-        'leidas': leidas,
+        'notificaciones': bandeja[:NOTIFICACIONES_BANDEJA_LIMITE],
+        'no_leidas': bandeja.filter(leida=False).count(),
         'active_page': 'notificaciones',
     }
     
@@ -33,9 +31,6 @@ def lista_notificaciones(request):
 @login_required
 def marcar_todas_leidas(request):
     """Marca todas las notificaciones del usuario como leídas."""
-    from django.contrib import messages
-    from django.shortcuts import redirect
-    
     # Actualizar todas las notificaciones no leídas del usuario
     count = Notificacion.objects.filter(
         usuario=request.user, 
@@ -1,12 +1,16 @@
 """Vistas de gestión de perfiles de usuario."""
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.contrib import messages
 from django.core.paginator import Paginator
+from django.db.models import Count, Max
 
 from ..models import Perfil
 from ..constants import ICONOS_PERFIL
+from ..decorators import lectura_en_replica, respuesta_condicional
+from ..eliminacion import iniciar_eliminacion
 
 
 @login_required
@@ -140,18 +144,16 @@ def editar_perfil(request):
 
         # Guardar icono - convertir value a path completo
         if icono:
-            # Buscar el path completo del icono seleccionado
+            # Buscar el icono seleccionado por value o por path
             icono_path = None
             for icono_data in ICONOS_PERFIL:
-                if icono_data['value'] == icono:
+                if icono in (icono_data['value'], icono_data['path']):
                     icono_path = icono_data['path']
                     break
-            
+
+            # Solo iconos conocidos: {% static %} falla con rutas fuera del manifiesto
             if icono_path:
                 perfil.icono_perfil = icono_path
-            else:
-                # Si no se encuentra, guardar el valor tal cual
-                perfil.icono_perfil = icono
         
         perfil.ubicacion = ubicacion or perfil.ubicacion
         perfil.nivel = nivel or perfil.nivel
@@ -188,7 +190,28 @@ def editar_perfil(request):
     return render(request, "usuarios/editar_perfil.html", context)
 
 
+def _estado_valoraciones_detalladas(request):
+    """
+    Marca de modificación de la página de valoraciones en una sola consulta.
+
+    Considera el perfil propio (se actualiza con cada valoración recibida),
+    las actividades valoradas y los perfiles de los evaluadores.
+    """
+    resumen = Perfil.objects.filter(usuario=request.user).aggregate(
+        propia=Max('actualizada_en'),
+        total=Count('usuario__valoraciones_recibidas'),
+        actividades=Max('usuario__valoraciones_recibidas__actividad__actualizada_en'),
+        evaluadores=Max('usuario__valoraciones_recibidas__evaluador__perfil__actualizada_en'),
+    )
+    marcas = [resumen[c] for c in ('propia', 'actividades', 'evaluadores') if resumen[c]]
+    if not marcas:
+        return None
+    return max(marcas), resumen['total']
+
+
 @login_required
+@lectura_en_replica
+@respuesta_condicional(_estado_valoraciones_detalladas)
 def valoraciones_detalladas(request):
     """
     Vista de valoraciones detalladas del usuario.
@@ -236,7 +259,18 @@ def perfil(request):
     return redirect('ver_perfil')
 
 
+def _estado_perfil_participante(request, user_id):
+    """Última modificación del perfil público consultado."""
+    return (
+        Perfil.objects.filter(usuario_id=user_id)
+        .values_list('actualizada_en', 'usuario__username')
+        .first()
+    )
+
+
 @login_required
+@lectura_en_replica
+@respuesta_condicional(_estado_perfil_participante)
 def perfil_participante(request, user_id):
     """Muestra la información pública de un participante."""
     usuario = get_object_or_404(User, pk=user_id)
@@ -262,7 +296,8 @@ def eliminar_cuenta(request):
     - Requiere autenticación (@login_required)
     - Requiere confirmación de contraseña
     - Requiere escribir "ELIMINAR" para confirmar
-    - Eliminación en cascada automática de Django
+    - La cuenta se desactiva y se cierra la sesión de inmediato; los datos
+      se borran en segundo plano por lotes (ver eliminacion.py)
     
     Datos eliminados:
     - Usuario (User)
@@ -286,14 +321,7 @@ def eliminar_cuenta(request):
         confirmacion = request.POST.get('confirmacion', '').strip()
         
         # Validación 1: Contraseña correcta
-        from django.contrib.auth import authenticate, logout
-        user = authenticate(
-            request, 
-            username=request.user.username, 
-            password=password
-        )
-        
-        if user is None:
+        if not request.user.check_password(password):
             messages.error(request, "Contraseña incorrecta. No se puede eliminar la cuenta.")
             return redirect('ver_perfil')
         
@@ -305,8 +333,8 @@ def eliminar_cuenta(request):
         # Guardar username para el mensaje
         username = request.user.username
         
-        # Eliminar cuenta (Django elimina en cascada automáticamente)
-        request.user.delete()
+        # Desactivar ahora y borrar los datos en segundo plano, por lotes
+        iniciar_eliminacion(request.user)
         
         # Cerrar sesión
         logout(request)
@@ -314,8 +342,8 @@ def eliminar_cuenta(request):
         # Mensaje de confirmación
         messages.success(
             request, 
-            f"La cuenta de {username} ha sido eliminada permanentemente. "
-            f"Todos tus datos han sido borrados."
+            f"La cuenta de {username} ha sido eliminada. "
+            f"Tus datos se están borrando y en unos minutos no quedará rastro de ellos."
         )
         return redirect('home')
     